@@ -86,8 +86,8 @@ define(IPA_DATA_VERSION, 20100614120000)
 #                                                      #
 ########################################################
 define(IPA_API_VERSION_MAJOR, 2)
-# Last change: add keeponly option to batch command
-define(IPA_API_VERSION_MINOR, 254)
+# Last change: add cert_request_batch command
+define(IPA_API_VERSION_MINOR, 257)
 
 ########################################################
 # Following values are auto-generated from values above
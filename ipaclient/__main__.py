@@ -4,10 +4,19 @@ Command Line Interface for IPA administration.
 
 The CLI functionality is implemented in ipalib/cli.py
 """
-from ipalib import api, cli
+import os
+import sys
 
 
 def main():
+    if os.environ.get('IPA_CLI_BROKER'):
+        # pass the command to the warm broker process, see ipaclient.broker
+        from ipaclient import broker
+        status = broker.forward(sys.argv[1:])
+        if status is not None:
+            sys.exit(status)
+
+    from ipalib import api, cli
     cli.run(api)
 
 
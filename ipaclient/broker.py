@@ -0,0 +1,357 @@
+#
+# Copyright (C) 2026  FreeIPA Contributors see COPYING for license
+#
+
+"""
+Per-user broker which runs ``ipa`` commands from a warm process.
+
+Starting ``ipa`` imports ipalib, bootstraps the API and builds the plugins
+from the cached schema before the command itself is run. Scripts calling
+``ipa`` many times spend most of their time on that.
+
+When the ``IPA_CLI_BROKER`` environment variable is set, ``ipa`` hands its
+command line, working directory, environment and standard file
+descriptors over a unix socket in ``$XDG_RUNTIME_DIR`` to the broker.
+The broker keeps a finalized API and forks a child for every command,
+which runs it directly on the passed file descriptors, so the output,
+prompts and terminal handling are the same as for a local run.
+
+If no broker is running, ``ipa`` starts one in the background and runs
+the command itself. The broker exits after being idle for
+``IDLE_TIMEOUT`` seconds or after ``MAX_AGE`` seconds, to pick up
+configuration and schema changes.
+
+Only the standard library may be imported at module level, the front end
+must stay cheap to import.
+"""
+
+import array
+import errno
+import json
+import os
+import select
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+
+BROKER_ENV = 'IPA_CLI_BROKER'
+SOCKET_NAME = 'ipa-cli-broker.sock'
+
+IDLE_TIMEOUT = 600
+MAX_AGE = 3600
+
+# environment variables which affect the API bootstrap, the broker is only
+# used when they are the same for the front end and the broker
+BOOTSTRAP_ENV = ('IPA_CONFDIR', 'XDG_CONFIG_HOME', 'XDG_CACHE_HOME')
+
+# exit status sent by the broker when the front end has to run the command
+RUN_LOCALLY = -1
+
+_LENGTH = struct.Struct('>I')
+_STATUS = struct.Struct('>i')
+_MAX_REQUEST = 16 * 1024 * 1024
+
+
+def socket_path():
+    """
+    :return: path of the broker socket, or ``None`` if the user has no
+        private runtime directory
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if not runtime_dir:
+        return None
+    try:
+        st = os.stat(runtime_dir)
+    except OSError:
+        return None
+    if st.st_uid != os.getuid() or st.st_mode & 0o077:
+        return None
+    return os.path.join(runtime_dir, SOCKET_NAME)
+
+
+def _recv_exact(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError("connection closed")
+        data += chunk
+    return data
+
+
+# socket.send_fds() and recv_fds() are new in Python 3.9
+def _send_fds(sock, data, fds):
+    sock.sendmsg([data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS,
+                           array.array('i', fds))])
+
+
+def _recv_fds(sock, bufsize, maxfds):
+    fds = array.array('i')
+    msg, ancdata, _flags, _addr = sock.recvmsg(
+        bufsize, socket.CMSG_LEN(maxfds * fds.itemsize))
+    for level, type_, data in ancdata:
+        if level == socket.SOL_SOCKET and type_ == socket.SCM_RIGHTS:
+            fds.frombytes(
+                data[:len(data) - (len(data) % fds.itemsize)])
+    return msg, list(fds)
+
+
+def _spawn_broker():
+    with open(os.devnull, 'r+b') as devnull:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.setsid()
+                if os.fork() != 0:
+                    os._exit(0)
+                for fd in (0, 1, 2):
+                    os.dup2(devnull.fileno(), fd)
+                os.execv(sys.executable,
+                         [sys.executable, '-m', 'ipaclient.broker'])
+            finally:
+                os._exit(1)
+        os.waitpid(pid, 0)
+
+
+def forward(argv):
+    """
+    Run a command in the broker.
+
+    :return: exit status of the command, or ``None`` if the command has to
+        be run locally
+    """
+    if not argv or argv[0].startswith('-'):
+        # global options are applied at bootstrap
+        return None
+    path = socket_path()
+    if path is None:
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(path)
+        except OSError as e:
+            if e.errno in (errno.ENOENT, errno.ECONNREFUSED):
+                _spawn_broker()
+            return None
+
+        request = json.dumps(dict(
+            argv=argv,
+            cwd=os.getcwd(),
+            env=dict(os.environ),
+        )).encode('utf-8')
+        try:
+            _send_fds(sock, _LENGTH.pack(len(request)), [0, 1, 2])
+            sock.sendall(request)
+            status, = _STATUS.unpack(_recv_exact(sock, _STATUS.size))
+        except KeyboardInterrupt:
+            # closing the connection interrupts the command
+            return 1
+        except (OSError, EOFError):
+            # the command may have been run, do not run it again
+            sys.stderr.write("ipa: ERROR: lost connection to the broker\n")
+            return 1
+    finally:
+        sock.close()
+
+    if status == RUN_LOCALLY:
+        return None
+    return status
+
+
+class Broker:
+    def __init__(self, api, path):
+        self.api = api
+        self.path = path
+        self.started = time.time()
+        self.bootstrap_env = {k: os.environ.get(k) for k in BOOTSTRAP_ENV}
+        self.children = set()
+        self.sock = None
+
+    def bind(self):
+        """
+        :return: False if another broker is already listening
+        """
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.bind(self.path)
+        except OSError as e:
+            if e.errno != errno.EADDRINUSE:
+                raise
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+            except OSError:
+                # stale socket of a dead broker
+                os.unlink(self.path)
+                self.sock.bind(self.path)
+            else:
+                return False
+            finally:
+                probe.close()
+        os.chmod(self.path, 0o600)
+        self.sock.listen(16)
+        return True
+
+    def serve(self):
+        last_request = time.time()
+        try:
+            while time.time() - self.started < MAX_AGE:
+                self._reap()
+                r, _w, _x = select.select([self.sock], [], [], 1.0)
+                if not r:
+                    if time.time() - last_request > IDLE_TIMEOUT:
+                        break
+                    continue
+                conn, _addr = self.sock.accept()
+                last_request = time.time()
+                try:
+                    self._accept(conn)
+                finally:
+                    conn.close()
+        finally:
+            # new front ends start a new broker from now on
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.sock.close()
+        while self.children:
+            pid, _status = os.waitpid(-1, 0)
+            self.children.discard(pid)
+
+    def _reap(self):
+        for pid in list(self.children):
+            done, _status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                self.children.discard(pid)
+
+    def _accept(self, conn):
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                                struct.calcsize('3i'))
+        _pid, uid, _gid = struct.unpack('3i', creds)
+        if uid != os.getuid():
+            return
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                self.sock.close()
+                status = self._handle(conn)
+            finally:
+                os._exit(status & 0xff)
+        self.children.add(pid)
+
+    def _handle(self, conn):
+        """Run a command in a forked child, return its exit status"""
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+        msg, fds = _recv_fds(conn, _LENGTH.size, 3)
+        if len(fds) != 3:
+            for fd in fds:
+                os.close(fd)
+            return 1
+        msg += _recv_exact(conn, _LENGTH.size - len(msg))
+        length, = _LENGTH.unpack(msg)
+        if length > _MAX_REQUEST:
+            return 1
+        request = json.loads(_recv_exact(conn, length).decode('utf-8'))
+
+        env = request['env']
+        if any(env.get(k) != v for k, v in self.bootstrap_env.items()):
+            conn.sendall(_STATUS.pack(RUN_LOCALLY))
+            return 0
+
+        for fd, target in zip(fds, (0, 1, 2)):
+            os.dup2(fd, target)
+            os.close(fd)
+        os.environ.clear()
+        os.environ.update(env)
+        os.chdir(request['cwd'])
+
+        # the front end closes the connection when interrupted
+        def watch():
+            try:
+                conn.recv(1)
+            except OSError:
+                pass
+            os.kill(os.getpid(), signal.SIGINT)
+
+        watcher = threading.Thread(target=watch)
+        watcher.daemon = True
+        watcher.start()
+
+        status = self._run(request['argv'])
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except (IOError, OSError):
+            pass
+        try:
+            conn.sendall(_STATUS.pack(status))
+        except OSError:
+            pass
+        return status
+
+    def _run(self, argv):
+        # the same error handling as ipalib.cli.run()
+        from ipalib import errors
+        from ipalib.cli import logger
+
+        error = None
+        try:
+            rval = self.api.Backend.cli.run(argv)
+        except SystemExit as e:
+            rval = e.code
+        except KeyboardInterrupt:
+            print('')
+            logger.info('operation aborted')
+            rval = 0
+        except errors.PublicError as e:
+            error = e
+        except Exception as e:
+            logger.exception('%s: %s', e.__class__.__name__, str(e))
+            error = errors.InternalError()
+        if error is not None:
+            logger.error(error.strerror)
+            return error.rval
+
+        if rval is None:
+            return 0
+        if not isinstance(rval, int):
+            sys.stderr.write('%s\n' % rval)
+            return 1
+        return rval
+
+
+def main():
+    path = socket_path()
+    if path is None:
+        sys.exit("%s: no private XDG_RUNTIME_DIR" % sys.argv[0])
+
+    from ipalib import api, cli
+    from ipalib.util import check_client_configuration
+
+    api.bootstrap_with_global_options(context='cli')
+    check_client_configuration(env=api.env)
+    for klass in cli.cli_plugins:
+        api.add_plugin(klass)
+    api.finalize()
+    if 'config_loaded' not in api.env:
+        sys.exit("%s: IPA client is not configured" % sys.argv[0])
+
+    broker = Broker(api, path)
+    if not broker.bind():
+        return
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    broker.serve()
+
+
+if __name__ == '__main__':
+    main()
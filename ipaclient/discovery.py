@@ -19,7 +19,10 @@
 
 from __future__ import absolute_import
 
+import concurrent.futures
 import logging
+import queue
+import threading
 
 import six
 
@@ -56,6 +59,9 @@ UNKNOWN_ERROR = -15
 
 IPA_BASEDN_INFO = 'ipa v2.0'
 
+# Maximum number of DNS queries and LDAP server checks run concurrently
+MAX_CONCURRENT_CHECKS = 8
+
 error_names = {
     SUCCESS: 'Success',
     NOT_FQDN: 'NOT_FQDN',
@@ -111,6 +117,103 @@ def get_ipa_basedn(conn):
     return None
 
 
+class _DeferredLog(logging.Filter):
+    """
+    Holds back the records logged by the checks run with capture(), so
+    that they can be emitted in the order of a sequential search.
+    """
+
+    def __init__(self):
+        super(_DeferredLog, self).__init__()
+        self.local = threading.local()
+
+    def filter(self, record):
+        records = getattr(self.local, 'records', None)
+        if records is None:
+            return True
+        records.append(record)
+        return False
+
+    def capture(self, func, *args):
+        """Call func, return its result and the records it logged"""
+        self.local.records = []
+        try:
+            return func(*args), self.local.records
+        finally:
+            del self.local.records
+
+
+class _CheckExecutor:
+    """
+    Runs the DNS queries and the LDAP server checks of a search.
+
+    The threads are daemon threads, the checks still running when the
+    search is over must not delay the exit. The log records of the checks
+    run with capture() are held back while the executor has threads.
+    """
+
+    def __init__(self, max_workers):
+        self.log = _DeferredLog()
+        self._max_workers = max_workers
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = 0
+
+    def submit(self, func, *args):
+        future = concurrent.futures.Future()
+        self._queue.put((future, func, args))
+        with self._lock:
+            if self._threads < self._max_workers:
+                if self._threads == 0:
+                    logger.addFilter(self.log)
+                self._threads += 1
+                t = threading.Thread(target=self._work)
+                t.daemon = True
+                t.start()
+        return future
+
+    def capture(self, func, *args):
+        """Submit func, its result comes with the records it logged"""
+        return self.submit(self.log.capture, func, *args)
+
+    def _work(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                future, func, args = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    result = func(*args)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+        finally:
+            with self._lock:
+                self._threads -= 1
+                if self._threads == 0:
+                    logger.removeFilter(self.log)
+
+    def shutdown(self):
+        """
+        Cancel the calls not started yet, the threads exit once the
+        running calls are done
+        """
+        while True:
+            try:
+                future, _func, _args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            future.cancel()
+        with self._lock:
+            threads = self._threads
+        for _i in range(threads):
+            self._queue.put(None)
+
+
 class IPADiscovery:
 
     def __init__(self):
@@ -125,6 +228,9 @@ class IPADiscovery:
         self.server_source = None
         self.basedn_source = None
 
+        self._executor = None
+        self._prefetched = {}
+
     def __get_resolver_domains(self):
         """Read /etc/resolv.conf and return all domains
 
@@ -200,6 +306,68 @@ class IPADiscovery:
                 domain = domain[p + 1:]
         return None, None
 
+    def _prefetch(self, func, *args):
+        """Start func(*args) in the background, see _fetch()"""
+        key = (func, args)
+        if self._executor is not None and key not in self._prefetched:
+            self._prefetched[key] = self._executor.submit(func, *args)
+
+    def _fetch(self, func, *args):
+        """Return func(*args), started already by _prefetch() if possible"""
+        future = self._prefetched.pop((func, args), None)
+        if future is None:
+            return func(*args)
+        return future.result()
+
+    def _prefetch_ldap_srv(self, domains):
+        """Start the LDAP SRV queries check_domain() runs for domains"""
+        for domain, _reason in domains:
+            try:
+                validate_domain_name(domain)
+            except ValueError:
+                continue
+            while True:
+                self._prefetch(query_srv, '_ldap._tcp.%s' % domain)
+                p = domain.find(".")
+                if p == -1:
+                    break
+                domain = domain[p + 1:]
+
+    def _check_servers(self, servers, ca_cert_path):
+        """
+        Check the servers concurrently.
+
+        Yields the result of ipacheckldap() and the base DN found for every
+        server, in the order of servers. The records logged by a check are
+        emitted before its result is yielded. The checks not started yet
+        are cancelled when the generator is closed.
+        """
+        def check(server, realm):
+            found = {}
+            ldapret = self._checkldap(server, realm, ca_cert_path, found)
+            return ldapret, found
+
+        realm = self.realm
+        futures = [
+            self._executor.capture(check, server, realm)
+            for server in servers
+        ]
+        try:
+            for server, future in zip(servers, futures):
+                if self.realm != realm:
+                    # the realm has been found by one of the previous checks,
+                    # which is then expected from the other servers too
+                    future.cancel()
+                    yield check(server, self.realm)
+                    continue
+                result, records = future.result()
+                for record in records:
+                    logger.handle(record)
+                yield result
+        finally:
+            for future in futures:
+                future.cancel()
+
     def search(self, domain="", servers="", realm=None, hostname=None,
                ca_cert_path=None):
         """
@@ -208,8 +376,25 @@ class IPADiscovery:
         servers may contain an optional list of servers which will be used
         instead of discovering available LDAP SRV records.
 
+        The DNS queries and the checks of the LDAP servers run concurrently,
+        their results are used in the same order as if they were run one
+        after another.
+
         Returns a constant representing the overall search result.
         """
+        self._executor = _CheckExecutor(MAX_CONCURRENT_CHECKS)
+        try:
+            return self._search(domain, servers, realm, hostname,
+                                ca_cert_path)
+        finally:
+            # do not wait for the lookups which are not needed anymore
+            for future in self._prefetched.values():
+                future.cancel()
+            self._prefetched = {}
+            self._executor.shutdown()
+            self._executor = None
+
+    def _search(self, domain, servers, realm, hostname, ca_cert_path):
         logger.debug("[IPA Discovery]")
         logger.debug(
             'Starting IPA discovery with domain=%s, servers=%s, hostname=%s',
@@ -243,6 +428,7 @@ class IPADiscovery:
                 # not first. We could end up with the wrong SRV record.
                 domains = self.__get_resolver_domains()
                 domains = [(domain, 'domain of the hostname')] + domains
+                self._prefetch_ldap_srv(domains)
                 tried = set()
                 for domain, reason in domains:
                     # Domain name should not be single-label
@@ -283,6 +469,13 @@ class IPADiscovery:
             self.domain = domain
             self.domain_source = self.server_source = 'Forced'
 
+        if self.domain:
+            if not realm:
+                self._prefetch(resolve, "_kerberos." + self.domain,
+                               rdatatype.TXT)
+            if autodiscovered:
+                self._prefetch(query_srv, '_kerberos._udp.%s' % self.domain)
+
         # search for kerberos
         logger.debug("[Kerberos realm search]")
         if realm:
@@ -312,13 +505,15 @@ class IPADiscovery:
         ldapaccess = True
         logger.debug("[LDAP server check]")
         valid_servers = []
+        checks = self._check_servers(servers, ca_cert_path)
         for server in servers:
             logger.debug('Verifying that %s (realm %s) is an IPA server',
                          server, self.realm)
             # check ldap now
-            ldapret = self.ipacheckldap(
-                server, self.realm, ca_cert_path=ca_cert_path
-            )
+            ldapret, found = next(checks)
+            if found:
+                self.basedn = found['basedn']
+                self.basedn_source = found['basedn_source']
 
             if ldapret[0] == SUCCESS:
                 # Make sure that realm is not single-label
@@ -359,6 +554,7 @@ class IPADiscovery:
             else:
                 logger.warning(
                     'Skip %s: cannot verify if this is an IPA server', server)
+        checks.close()
 
         # If one of LDAP servers checked rejects access (maybe anonymous
         # bind is disabled), assume realm and basedn generated off domain.
@@ -406,6 +602,18 @@ class IPADiscovery:
             0 means all ok
             negative number means something went wrong
         """
+        found = {}
+        ldapret = self._checkldap(thost, trealm, ca_cert_path, found)
+        if found:
+            self.basedn = found['basedn']
+            self.basedn_source = found['basedn_source']
+        return ldapret
+
+    def _checkldap(self, thost, trealm, ca_cert_path, found):
+        """
+        ipacheckldap() without side effects, so that it can run in a worker
+        thread. The IPA base DN and its source are stored in found.
+        """
         if ipaldap is None:
             return [PYTHON_LDAP_NOT_INSTALLED]
 
@@ -446,16 +654,16 @@ class IPADiscovery:
                 logger.debug("The server is not an IPA server")
                 return [NOT_IPA_SERVER]
 
-            self.basedn = basedn
-            self.basedn_source = 'From IPA server %s' % lh.ldap_uri
+            found['basedn'] = basedn
+            found['basedn_source'] = 'From IPA server %s' % lh.ldap_uri
 
             # search and return known realms
             logger.debug(
                 "Search for (objectClass=krbRealmContainer) in %s (sub)",
-                self.basedn)
+                basedn)
             try:
                 lret = lh.get_entries(
-                    DN(('cn', 'kerberos'), self.basedn),
+                    DN(('cn', 'kerberos'), basedn),
                     lh.SCOPE_SUBTREE, "(objectClass=krbRealmContainer)")
             except errors.NotFound:
                 # something very wrong
@@ -528,7 +736,7 @@ class IPADiscovery:
         logger.debug("Search DNS for SRV record of %s", qname)
 
         try:
-            answers = query_srv(qname)
+            answers = self._fetch(query_srv, qname)
         except DNSException as e:
             logger.debug("DNS record not found: %s", e.__class__.__name__)
             answers = []
@@ -562,7 +770,7 @@ class IPADiscovery:
         logger.debug("Search DNS for TXT record of %s", qname)
 
         try:
-            answers = resolve(qname, rdatatype.TXT)
+            answers = self._fetch(resolve, qname, rdatatype.TXT)
         except DNSException as e:
             logger.debug("DNS record not found: %s", e.__class__.__name__)
             answers = []
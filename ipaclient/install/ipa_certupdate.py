@@ -19,6 +19,8 @@
 
 from __future__ import absolute_import
 
+import collections
+import concurrent.futures
 import logging
 import os
 
@@ -149,24 +151,21 @@ def run_with_args(api):
 
 
 def update_client(certs):
-    update_file(paths.IPA_CA_CRT, certs)
-    update_file(paths.KDC_CA_BUNDLE_PEM, certs)
-    update_file(paths.CA_BUNDLE_PEM, certs)
-
-    ipa_db = certdb.NSSDatabase(api.env.nss_dir)
-
-    # Remove old IPA certs from /etc/ipa/nssdb
-    for nickname in ('IPA CA', 'External CA cert'):
-        while ipa_db.has_nickname(nickname):
-            try:
-                ipa_db.delete_cert(nickname)
-            except ipautil.CalledProcessError as e:
-                logger.error(
-                    "Failed to remove %s from %s: %s",
-                    nickname, ipa_db.secdir, e)
-                break
-
-    update_db(ipa_db.secdir, certs)
+    # The PEM bundles and the NSS database are independent of each other,
+    # update them concurrently
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        futures = [
+            executor.submit(update_file, filename, certs)
+            for filename in (paths.IPA_CA_CRT,
+                             paths.KDC_CA_BUNDLE_PEM,
+                             paths.CA_BUNDLE_PEM)
+        ]
+        # Remove old IPA certs from /etc/ipa/nssdb
+        futures.append(executor.submit(
+            update_db, api.env.nss_dir, certs,
+            obsolete=('IPA CA', 'External CA cert')))
+        for future in futures:
+            future.result()
 
     tasks.remove_ca_certs_from_systemwide_ca_store()
     tasks.insert_ca_certs_into_systemwide_ca_store(certs)
@@ -258,27 +257,89 @@ def update_server_ra_config(
 
 
 def update_file(filename, certs, mode=0o644):
-    certs = (c[0] for c in certs if c[2] is not False)
+    certs = [c[0] for c in certs if c[2] is not False]
+    data = b''.join(cert.public_bytes(x509.Encoding.PEM) for cert in certs)
+    try:
+        with open(filename, 'rb') as f:
+            if (f.read() == data
+                    and os.fstat(f.fileno()).st_mode & 0o7777 == mode):
+                logger.debug("%s is up to date", filename)
+                return
+    except (IOError, OSError):
+        pass
     try:
         x509.write_certificate_list(certs, filename, mode=mode)
     except Exception as e:
         logger.error("failed to update %s: %s", filename, e)
 
 
-def update_db(path, certs):
-    """Drop all CA certs from db then add certs from list provided
+def update_db(path, certs, obsolete=()):
+    """Make the CA certs in db match the list provided
 
-       This may result in some churn as existing certs are dropped
-       and re-added but this also provides the ability to change
-       the trust flags.
+       Only the differences are applied: CA certs not in the list and
+       certs with an ``obsolete`` nickname are dropped, and certs are
+       (re-)added only when they are missing or their trust flags
+       changed.  An unchanged database is not written to at all.
     """
     db = certdb.NSSDatabase(path)
-    for name, flags in db.list_certs():
-        if flags.ca:
-            db.delete_cert(name)
+
+    wanted = collections.OrderedDict()
     for cert, nickname, trusted, eku, _serial in certs:
         trust_flags = certstore.key_policy_to_trust_flags(trusted, True, eku)
-        try:
-            db.add_cert(cert, nickname, trust_flags)
-        except ipautil.CalledProcessError as e:
-            logger.error("failed to update %s in %s: %s", nickname, path, e)
+        wanted.setdefault(nickname, []).append((cert, trust_flags))
+
+    present = collections.OrderedDict()
+    for name, flags in db.list_certs():
+        present.setdefault(name, []).append(flags)
+
+    for name, flags in present.items():
+        if name in wanted:
+            continue
+        if name in obsolete:
+            try:
+                _delete_certs(db, name, len(flags))
+            except ipautil.CalledProcessError as e:
+                logger.error(
+                    "Failed to remove %s from %s: %s", name, db.secdir, e)
+        elif any(f.ca for f in flags):
+            _delete_certs(db, name, len(flags))
+
+    for nickname, entries in wanted.items():
+        if nickname in present:
+            if _db_certs_match(db, nickname, present[nickname], entries):
+                logger.debug("%s in %s is up to date", nickname, path)
+                continue
+            _delete_certs(db, nickname, len(present[nickname]))
+        for cert, trust_flags in entries:
+            try:
+                db.add_cert(cert, nickname, trust_flags)
+            except ipautil.CalledProcessError as e:
+                logger.error(
+                    "failed to update %s in %s: %s", nickname, path, e)
+
+
+def _delete_certs(db, nickname, count):
+    """Delete the ``count`` certs stored under nickname"""
+    for _i in range(count):
+        db.delete_cert(nickname)
+
+
+def _db_certs_match(db, nickname, present_flags, entries):
+    """
+    Check whether the certs stored under nickname are exactly the
+    certificates and trust flags of ``entries``.
+    """
+    # compare the flags as they read back from the database
+    wanted_flags = collections.Counter(
+        certdb.parse_trust_flags(certdb.unparse_trust_flags(f))
+        for _cert, f in entries)
+    if collections.Counter(present_flags) != wanted_flags:
+        return False
+    try:
+        present_certs = db.get_all_certs(nickname)
+    except RuntimeError:
+        return False
+    return (
+        sorted(c.public_bytes(x509.Encoding.DER) for c in present_certs)
+        == sorted(c.public_bytes(x509.Encoding.DER) for c, _f in entries)
+    )
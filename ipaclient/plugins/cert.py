@@ -132,3 +132,30 @@ class cert_find(MethodOverride):
                                             options.pop('file'))
 
         return super(cert_find, self).forward(*args, **options)
+
+
+class CertBatchOverride(MethodOverride):
+    def output_for_cli(self, textui, output, *args, **options):
+        for result in output['results']:
+            if result['error'] is not None:
+                textui.print_plain(
+                    _('%(serial)s: %(error)s') % dict(
+                        serial=result['serial_number'],
+                        error=result['error']))
+        textui.print_summary(
+            _('Processed %(done)d of %(count)d certificates') % dict(
+                done=output['count'] - output['failed'],
+                count=output['count']))
+        if output['failed']:
+            return 1
+        return 0
+
+
+@register(override=True, no_fail=True)
+class cert_revoke_batch(CertBatchOverride):
+    pass
+
+
+@register(override=True, no_fail=True)
+class cert_remove_hold_batch(CertBatchOverride):
+    pass
@@ -18,14 +18,20 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import csv
+import io
+
 from ipaclient.frontend import MethodOverride
 from ipaclient.plugins.baseuser import baseuser_add_passkey
-from ipalib import errors
-from ipalib import Flag
+from ipalib import api, errors
+from ipalib import File, Flag, Int, StrEnum
 from ipalib import util
+from ipalib.frontend import Local, Method
+from ipalib.output import Output
 from ipalib.plugable import Registry
 from ipalib import _
 from ipalib import x509
+from ipalib.util import classproperty
 
 register = Registry()
 
@@ -85,3 +91,211 @@ class user_show(MethodOverride):
 @register(override=True, no_fail=True)
 class user_add_passkey(baseuser_add_passkey):
     __doc__ = _("Add one or more passkey mappings to the user entry.")
+
+
+class _RecordSubmitter:
+    """
+    Collect user records and submit them in chunks.
+
+    Each full chunk is sent as one user_import_internal call. Only failed
+    records are kept, so memory use does not grow with the input size.
+    """
+    def __init__(self, command, batch_size, options):
+        self.command = command
+        self.batch_size = batch_size
+        self.options = options
+        self.chunk = []
+        self.count = 0
+        self.failures = []
+
+    def add(self, record):
+        self.chunk.append(record)
+        if len(self.chunk) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.chunk:
+            return
+        result = self.command.api.Command.user_import_internal(
+            self.chunk, **self.options)
+        self.chunk = []
+        for status in result['results']:
+            self.count += 1
+            if status['error'] is not None:
+                self.failures.append(status)
+            self.command.report(status)
+
+
+def _parse_ldif(input_file, callback):
+    """Call ``callback`` with each LDIF entry as a dict of text values"""
+    # python-ldap is an optional dependency of the client
+    import ldif
+
+    class UserLDIFParser(ldif.LDIFParser):
+        def handle(self, dn, entry):
+            callback({
+                name: [v.decode('utf-8') for v in values]
+                for name, values in entry.items()
+            })
+
+    UserLDIFParser(input_file).parse()
+
+
+@register(no_fail=True)
+class _fake_user_import_internal(Method):
+    name = 'user_import_internal'
+    NO_CLI = True
+
+
+@register()
+class user_import(Local):
+    __doc__ = _("""
+    Add users from a CSV or LDIF file.
+
+    CSV files need a header row naming the user-add options (for example
+    uid, first, last, email). LDIF files use attribute names. Records are
+    sent to the server in batches and the status of each record is
+    printed as soon as its batch completes.
+    """)
+
+    takes_options = (
+        File(
+            'in',
+            doc=_('File containing the user records'),
+        ),
+        StrEnum(
+            'format?',
+            doc=_('Input format (default: guessed from the file content)'),
+            values=(u'csv', u'ldif'),
+        ),
+        Int(
+            'batch_size?',
+            doc=_('Number of records sent to the server in one call'),
+            default=100,
+            minvalue=1,
+            autofill=True,
+        ),
+    )
+
+    has_output = (
+        Output('count', int, doc=_('Number of records processed')),
+        Output('failed', int, doc=_('Number of records not added')),
+        Output('results', (list, tuple), doc=_('Records not added')),
+    )
+
+    # attributes which are not user-add options
+    ignored_attributes = ('dn', 'objectclass', 'changetype')
+
+    @classmethod
+    def __NO_CLI_getter(cls):
+        return (api.Command.get_plugin('user_import_internal') is
+                _fake_user_import_internal)
+
+    NO_CLI = classproperty(__NO_CLI_getter)
+
+    @property
+    def api_version(self):
+        return self.api.Command.user_import_internal.api_version
+
+    def get_options(self):
+        for option in self.api.Command.user_import_internal.options():
+            if option.name != 'version':
+                yield option
+        for option in super(user_import, self).get_options():
+            yield option
+
+    def _record_converter(self):
+        """
+        Return a function mapping a raw record to user-add options.
+
+        Column and attribute names may be either option names or their
+        CLI names; single-valued options take the first value.
+        """
+        params = {}
+        for param in self.api.Command.user_add.params():
+            params[param.name.lower()] = param
+            params[param.cli_name.lower()] = param
+
+        def convert(raw):
+            record = {}
+            for name, value in raw.items():
+                name = name.strip().lower()
+                if not name or name in self.ignored_attributes:
+                    continue
+                param = params.get(name)
+                key = param.name if param is not None else name
+                if isinstance(value, list):
+                    if param is not None and not param.multivalue:
+                        value = value[0]
+                elif not value:
+                    continue
+                record[key] = value
+            return record
+
+        return convert
+
+    def report(self, status):
+        if self.api.env.context != 'cli':
+            return
+        textui = self.api.Backend.textui
+        if status['error'] is None:
+            textui.print_plain(_('%(uid)s: added') % status)
+        else:
+            textui.print_plain(
+                _('%(uid)s: %(error)s') % dict(
+                    uid=status['uid'] or _('(no login)'),
+                    error=status['error']))
+
+    def _guess_format(self, data):
+        """LDIF records start with a dn line, optionally after a version"""
+        for line in data.splitlines():
+            line = line.strip().lower()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith(('dn:', 'version:')):
+                return u'ldif'
+            break
+        return u'csv'
+
+    def forward(self, **options):
+        data = options.pop('in')
+        input_format = options.pop('format', None)
+        batch_size = options.pop('batch_size', 100)
+        if input_format is None:
+            input_format = self._guess_format(data)
+
+        if not self.api.Backend.rpcclient.isconnected():
+            self.api.Backend.rpcclient.connect()
+
+        options['version'] = self.api_version
+        submitter = _RecordSubmitter(self, batch_size, options)
+        convert = self._record_converter()
+
+        try:
+            if input_format == u'ldif':
+                _parse_ldif(io.BytesIO(data.encode('utf-8')),
+                            lambda raw: submitter.add(convert(raw)))
+            else:
+                for row in csv.DictReader(io.StringIO(data, newline='')):
+                    submitter.add(convert(row))
+        except (csv.Error, ValueError, UnicodeError) as exc:
+            raise errors.ValidationError(
+                name='in',
+                error=_("Cannot parse the records: %(exc)s") % {'exc': exc}
+            )
+        submitter.flush()
+
+        return dict(
+            count=submitter.count,
+            failed=len(submitter.failures),
+            results=submitter.failures,
+        )
+
+    def output_for_cli(self, textui, output, *args, **options):
+        textui.print_summary(
+            _('Added %(added)d of %(count)d users') % dict(
+                added=output['count'] - output['failed'],
+                count=output['count']))
+        if output['failed']:
+            return 1
+        return 0
@@ -90,6 +90,10 @@ register = Registry()
 
 MAX_VAULT_DATA_SIZE = 2**20  # = 1 MB
 
+# The session key cipher processes the vault data in segments of this size,
+# so that no padded copy of the whole data is needed
+CIPHER_SEGMENT_SIZE = 2**16  # = 64 kB
+
 
 def generate_symmetric_key(password, salt):
     """
@@ -865,18 +869,28 @@ class vault_archive(ModVaultData):
         :param bytes json_vault_data: dumped vault data
         :return:
         """
-        nonce = os.urandom(algo.block_size // 8)
+        block_size = algo.block_size // 8
+        nonce = os.urandom(block_size)
 
         # wrap vault_data with session key
         padder = PKCS7(algo.block_size).padder()
-        padded_data = padder.update(json_vault_data)
-        padded_data += padder.finalize()
-
         cipher = Cipher(algo, modes.CBC(nonce), backend=default_backend())
         encryptor = cipher.encryptor()
-        wrapped_vault_data = encryptor.update(padded_data) + encryptor.finalize()
 
-        return nonce, wrapped_vault_data
+        # padding adds up to one block, update_into() needs one block less
+        # of spare room in the output buffer
+        wrapped = memoryview(bytearray(len(json_vault_data) + 2 * block_size))
+        data = memoryview(json_vault_data)
+        length = 0
+        for start in range(0, len(data), CIPHER_SEGMENT_SIZE):
+            segment = padder.update(data[start:start + CIPHER_SEGMENT_SIZE])
+            length += encryptor.update_into(segment, wrapped[length:])
+        length += encryptor.update_into(padder.finalize(), wrapped[length:])
+        encryptor.finalize()
+
+        # the vault_data parameter only accepts bytes, this copy of the
+        # encrypted data is needed
+        return nonce, wrapped[:length].tobytes()
 
     def forward(self, *args, **options):
         data = options.get('data')
@@ -1012,6 +1026,8 @@ class vault_archive(ModVaultData):
                 .decode('utf-8')
 
         json_vault_data = json.dumps(vault_data).encode('utf-8')
+        # only the wrapped copy is needed from now on
+        del data, vault_data
 
         # get config
         transport_cert, wrapping_algo = self._get_vaultconfig()
@@ -1026,6 +1042,7 @@ class vault_archive(ModVaultData):
         algo = self._generate_session_key(wrapping_algo)
         # wrap vault data
         nonce, wrapped_vault_data = self._wrap_data(algo, json_vault_data)
+        del json_vault_data
         options.update(
             nonce=nonce,
             vault_data=wrapped_vault_data
@@ -1111,17 +1128,27 @@ class vault_retrieve(ModVaultData):
         return self.api.Command.vault_retrieve_internal.output()
 
     def _unwrap_response(self, algo, nonce, vault_data):
+        block_size = algo.block_size // 8
         cipher = Cipher(algo, modes.CBC(nonce), backend=default_backend())
         # decrypt
         decryptor = cipher.decryptor()
-        padded_data = decryptor.update(vault_data)
-        padded_data += decryptor.finalize()
-        # remove padding
+        json_vault_data = bytearray(len(vault_data) + block_size)
+        padded = memoryview(json_vault_data)
+        data = memoryview(vault_data)
+        length = 0
+        for start in range(0, len(data), CIPHER_SEGMENT_SIZE):
+            length += decryptor.update_into(
+                data[start:start + CIPHER_SEGMENT_SIZE], padded[length:])
+        decryptor.finalize()
+        # remove padding, it is contained in the last block
         unpadder = PKCS7(algo.block_size).unpadder()
-        json_vault_data = unpadder.update(padded_data)
-        json_vault_data += unpadder.finalize()
+        last_block = padded[max(length - block_size, 0):length]
+        last_block = unpadder.update(last_block) + unpadder.finalize()
+        length -= block_size - len(last_block)
+        padded.release()
+        del json_vault_data[length:]
         # load JSON
-        return json.loads(json_vault_data.decode('utf-8'))
+        return json.loads(json_vault_data)
 
     def forward(self, *args, **options):
         output_file = options.get('out')
@@ -1181,6 +1208,7 @@ class vault_retrieve(ModVaultData):
         if 'encrypted_key' in vault_data:
             encrypted_key = base64.b64decode(vault_data[u'encrypted_key']
                                              .encode('utf-8'))
+        del vault_data
 
         if vault_type == u'standard':
 
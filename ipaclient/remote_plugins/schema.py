@@ -6,11 +6,13 @@ from collections.abc import Mapping, Sequence
 import errno
 import json
 import logging
+import mmap
 import os
+import struct
 import sys
 import tempfile
 import types
-import zipfile
+import zlib
 
 from cryptography import x509 as crypto_x509
 
@@ -29,7 +31,20 @@ from ipapython.dnsutil import DNSName
 
 logger = logging.getLogger(__name__)
 
-FORMAT = '1'
+FORMAT = '2'
+
+# Schema cache file layout (FORMAT 2):
+#
+#   header: magic, length of the index
+#   index:  JSON object mapping each namespace (and "_help" to the help
+#           namespaces) to {member name: [offset, length]}
+#   data:   zlib compressed JSON of each member, at offset from the end
+#           of the index
+#
+# The file is memory-mapped and a member is only decompressed and decoded
+# when it is first used.
+_MAGIC = b'IPASCHEMA'
+_HEADER = struct.Struct('>9sI')
 
 if six.PY3:
     unicode = str
@@ -75,13 +90,15 @@ class _SchemaCommand(ClientCommand):
 
 
 class _SchemaMethod(ClientMethod):
+    # look the names up on the plugin, not on its instance, so that the
+    # object class is not built just for them
     @property
     def obj_name(self):
-        return self.api.Object[self.obj_full_name].name
+        return self.api.Object.get_plugin(self.obj_full_name).name
 
     @property
     def obj_version(self):
-        return self.api.Object[self.obj_full_name].version
+        return self.api.Object.get_plugin(self.obj_full_name).version
 
 
 class _SchemaObject(Object):
@@ -91,6 +108,9 @@ class _SchemaObject(Object):
 class _SchemaPlugin:
     bases = None
     schema_key = None
+    # the class and params of a plugin are only built when the plugin is
+    # used, most of the schema is never needed in a single run
+    on_demand = True
 
     def __init__(self, schema, full_name):
         self.name, _slash, self.version = full_name.partition('/')
@@ -372,6 +392,8 @@ class Schema:
         self._dict = {}
         self._namespaces = {}
         self._help = None
+        self._data = None
+        self._data_offset = 0
 
         for ns in self.namespaces:
             self._dict[ns] = {}
@@ -436,16 +458,27 @@ class Schema:
         return (fp, ttl,)
 
     def _read_schema(self, fingerprint):
-        # It's more efficient to read zip file members at once than to open
-        # the zip file a couple of times, see #6690.
         filename = os.path.join(self._dir, fingerprint)
-        with zipfile.ZipFile(filename, 'r') as schema:
-            for name in schema.namelist():
-                ns, _slash, key = name.partition('/')
-                if ns in self.namespaces:
-                    self._dict[ns][key] = schema.read(name)
-                elif name == '_help':
-                    self._help = schema.read(name)
+        with open(filename, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, index_length = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("{}: not a schema cache file".format(filename))
+        self._data_offset = _HEADER.size + index_length
+        index = json.loads(
+            data[_HEADER.size:self._data_offset].decode('utf-8'))
+
+        self._data = data
+        for ns in self.namespaces:
+            self._dict[ns] = index[ns]
+        self._help = index['_help']
+
+    def _read_member(self, location):
+        offset, length = location
+        start = self._data_offset + offset
+        value = zlib.decompress(self._data[start:start + length])
+        return json.loads(value.decode('utf-8'))
 
     def __getitem__(self, key):
         try:
@@ -494,27 +527,45 @@ class Schema:
                 os.rename(f.name, os.path.join(self._dir, fingerprint))
 
     def _write_schema_data(self, fileobj):
-        with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED) as schema:
-            for key, value in self._dict.items():
-                if key in self.namespaces:
-                    ns = value
-                    for member in ns:
-                        path = '{}/{}'.format(key, member)
-                        s = json.dumps(ns[member], default=json_default)
-                        schema.writestr(path, s.encode('utf-8'))
-                else:
-                    schema.writestr(key, json.dumps(value).encode('utf-8'))
-
-            schema.writestr(
-                '_help',
-                json.dumps(self._help, default=json_default).encode('utf-8')
-            )
+        index = {}
+        chunks = []
+        offset = 0
+
+        for key, members in self._dict.items():
+            if key not in self.namespaces:
+                continue
+            index[key] = {}
+            for member in members:
+                value = self.read_namespace_member(key, member)
+                s = json.dumps(value, default=json_default)
+                chunk = zlib.compress(s.encode('utf-8'))
+                index[key][member] = [offset, len(chunk)]
+                chunks.append(chunk)
+                offset += len(chunk)
+
+        index['_help'] = {}
+        for key, members in self._help.items():
+            index['_help'][key] = {}
+            for member in members:
+                value = self.get_help(key, member)
+                s = json.dumps(value, default=json_default)
+                chunk = zlib.compress(s.encode('utf-8'))
+                index['_help'][key][member] = [offset, len(chunk)]
+                chunks.append(chunk)
+                offset += len(chunk)
+
+        index = json.dumps(index).encode('utf-8')
+        fileobj.write(_HEADER.pack(_MAGIC, len(index)))
+        fileobj.write(index)
+        for chunk in chunks:
+            fileobj.write(chunk)
 
     def read_namespace_member(self, namespace, member):
         value = self._dict[namespace][member]
 
-        if isinstance(value, bytes):
-            value = json.loads(value.decode('utf-8'))
+        if isinstance(value, list):
+            # location in the cache file
+            value = self._read_member(value)
             self._dict[namespace][member] = value
 
         return value
@@ -523,12 +574,13 @@ class Schema:
         return iter(self._dict[namespace])
 
     def get_help(self, namespace, member):
-        if isinstance(self._help, bytes):
-            self._help = json.loads(
-                self._help.decode('utf-8')
-            )
+        value = self._help[namespace][member]
+
+        if isinstance(value, list):
+            value = self._read_member(value)
+            self._help[namespace][member] = value
 
-        return self._help[namespace][member]
+        return value
 
 
 def get_package(server_info, client):
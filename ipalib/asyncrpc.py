@@ -0,0 +1,504 @@
+#
+# Copyright (C) 2026  FreeIPA Contributors see COPYING for license
+#
+
+"""
+Asyncio JSON-RPC client.
+
+`ipalib.rpc.jsonclient` is bound to the per thread ``context`` and sends one
+request at a time, so running many calls concurrently takes as many threads
+or processes. `AsyncJSONClient` runs any number of calls from a single event
+loop over a pool of keep-alive HTTPS connections, with at most
+``concurrency`` requests in flight at a time.
+
+The requests are encoded and the responses decoded the same way as by
+`ipalib.rpc.JSONServerProxy`, and the client authenticates like
+`ipalib.rpc.KerbTransport`: it uses the session cookie of the principal from
+the persistent session storage, falls back to Kerberos Negotiate when there
+is none or it has expired and stores the cookie it gets in return. Only one
+Kerberos authentication runs at a time, the calls waiting for it reuse the
+session it establishes.
+
+For example::
+
+    async with AsyncJSONClient.from_api(api) as client:
+        results = await asyncio.gather(*(
+            client.call('user_show', uid) for uid in uids
+        ), return_exceptions=True)
+
+The client does not look up servers in DNS, it talks to the server given by
+the URL.
+"""
+
+import asyncio
+import base64
+import datetime
+import email.parser
+import http.client
+import logging
+import urllib.parse
+
+import gssapi
+
+from ipalib import errors
+from ipalib.errors import errors_by_code, JSONError, NetworkError, UnknownError
+from ipalib.ipajson import json_encode_binary, json_decode_binary
+from ipalib.krb_utils import get_principal
+from ipalib.rpc import (
+    COOKIE_NAME,
+    DelegatedKerbTransport,
+    KerbTransport,
+    delete_persistent_client_session_data,
+    get_accept_language,
+    read_persistent_client_session_data,
+    update_persistent_client_session_data,
+)
+from ipalib.text import _
+from ipalib.util import create_ssl_context
+from ipapython.cookie import Cookie
+from ipapython.version import API_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Default maximum number of requests in flight, which is also the maximum
+# number of open connections
+DEFAULT_CONCURRENCY = 32
+
+SESSION_PATH = '/ipa/session/json'
+
+# the same limit as in ipalib.rpc.RPCClient.forward()
+MAX_TRIES = 5
+
+
+class _Disconnected(Exception):
+    """A keep-alive connection was closed before the response started"""
+
+
+class _Connection:
+    """An HTTP/1.1 connection sending one request at a time"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    def is_usable(self):
+        return (not self.writer.transport.is_closing()
+                and not self.reader.at_eof())
+
+    def close(self):
+        self.writer.close()
+
+    async def request(self, host, path, headers, body):
+        """
+        Send a POST request and read the response.
+
+        :return: tuple (status, reason, headers, body, keep_alive)
+        """
+        lines = ['POST %s HTTP/1.1' % path, 'Host: %s' % host]
+        lines.extend('%s: %s' % h for h in headers)
+        lines.append('Content-Length: %d' % len(body))
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        self.writer.write(body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise _Disconnected()
+        try:
+            version, status, reason = status_line.decode(
+                'latin-1').rstrip('\r\n').split(' ', 2)
+            status = int(status)
+        except ValueError:
+            raise http.client.BadStatusLine(status_line)
+
+        header_lines = []
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            header_lines.append(line)
+        msg = email.parser.Parser(_class=http.client.HTTPMessage).parsestr(
+            b''.join(header_lines).decode('latin-1'))
+
+        keep_alive = (version == 'HTTP/1.1'
+                      and msg.get('Connection', '').lower() != 'close')
+        if msg.get('Transfer-Encoding', '').lower() == 'chunked':
+            data = await self._read_chunked()
+        elif msg.get('Content-Length') is not None:
+            data = await self.reader.readexactly(int(msg['Content-Length']))
+        else:
+            data = await self.reader.read()
+            keep_alive = False
+
+        return status, reason, msg, data, keep_alive
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = await self.reader.readline()
+            size = int(size.split(b';', 1)[0], 16)
+            if size == 0:
+                break
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+        # skip the trailer
+        while await self.reader.readline() not in (b'\r\n', b'\n', b''):
+            pass
+        return b''.join(chunks)
+
+
+class _ConnectionPool:
+    """Idle keep-alive connections to a single server"""
+
+    def __init__(self, host, port, ssl_context, size):
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.size = size
+        self.idle = []
+
+    async def acquire(self):
+        while self.idle:
+            conn = self.idle.pop()
+            if conn.is_usable():
+                conn.reused = True
+                return conn
+            conn.close()
+        return await self.connect()
+
+    async def connect(self):
+        reader, writer = await asyncio.open_connection(
+            self.host, self.port, ssl=self.ssl_context)
+        logger.debug("New HTTP connection (%s)", self.host)
+        return _Connection(reader, writer)
+
+    def release(self, conn, keep_alive):
+        if keep_alive and len(self.idle) < self.size and conn.is_usable():
+            self.idle.append(conn)
+        else:
+            conn.close()
+
+    def close(self):
+        while self.idle:
+            self.idle.pop().close()
+
+
+class AsyncJSONClient:
+    """
+    Asyncio client of the IPA JSON-RPC API.
+
+    :param url: JSON-RPC URL of the server, e.g.
+        ``https://ipa.example.test/ipa/json``
+    :param ca_certfile: file with the CA certificates trusted for the server
+    :param ccache: name of the Kerberos credential cache to use
+    :param delegate: delegate the Kerberos credentials to the server
+    :param concurrency: maximum number of requests in flight
+    :param timeout: timeout of a single request in seconds, or ``None``
+
+    The client has to be created in the event loop it is used in.
+    """
+
+    def __init__(self, url, ca_certfile=None, ccache=None, delegate=False,
+                 concurrency=DEFAULT_CONCURRENCY, timeout=None,
+                 tls_version_min=None, tls_version_max=None):
+        split_url = urllib.parse.urlsplit(url)
+        if split_url.scheme == 'https':
+            ssl_kw = {}
+            if tls_version_min is not None:
+                ssl_kw['tls_version_min'] = tls_version_min
+            if tls_version_max is not None:
+                ssl_kw['tls_version_max'] = tls_version_max
+            ssl_context = create_ssl_context(ca_certfile, **ssl_kw)
+            default_port = 443
+        elif split_url.scheme == 'http':
+            # no authentication over plain HTTP
+            ssl_context = None
+            default_port = 80
+        else:
+            raise ValueError("unsupported JSON-RPC protocol")
+
+        self.url = url
+        self.host = split_url.netloc
+        self.path = split_url.path
+        self.session_url = urllib.parse.urlunsplit(
+            (split_url.scheme, split_url.netloc, SESSION_PATH, '', ''))
+        self.ccache = ccache
+        self.delegate = delegate
+        self.timeout = timeout
+        self.kerberos = ssl_context is not None
+
+        self._pool = _ConnectionPool(
+            split_url.hostname, split_url.port or default_port,
+            ssl_context, concurrency)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._auth_lock = asyncio.Lock()
+        self._headers = [
+            ('Content-Type', 'application/json'),
+            ('Accept', 'application/json'),
+            ('Accept-Language', get_accept_language()),
+            ('Referer', 'https://%s/ipa/xml' % split_url.hostname),
+        ]
+        self._principal = None
+        self._cookie = None
+        # None until the persistent session storage has been read, False if
+        # the server did not send a session cookie for Kerberos requests
+        self._sessions = None
+
+    @classmethod
+    def from_api(cls, api, **kwargs):
+        """Create a client for the server configured in ``api.env``"""
+        kwargs.setdefault('ca_certfile', api.env.tls_ca_cert)
+        kwargs.setdefault('delegate', api.env.delegate)
+        kwargs.setdefault('tls_version_min', api.env.tls_version_min)
+        kwargs.setdefault('tls_version_max', api.env.tls_version_max)
+        return cls(api.env.jsonrpc_uri, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the idle connections"""
+        self._pool.close()
+
+    async def call(self, name, *args, **options):
+        """
+        Call the command ``name`` and return its result.
+
+        :raises PublicError: the error raised by the command, `NetworkError`
+            if the server cannot be reached
+        """
+        options.setdefault('version', API_VERSION)
+        payload = {'method': name, 'params': [list(args), options], 'id': 0}
+        body = json_encode_binary(payload, options['version']).encode('utf-8')
+
+        async with self._semaphore:
+            try:
+                data = await asyncio.wait_for(self._post(body), self.timeout)
+            except asyncio.TimeoutError:
+                raise NetworkError(uri=self.url, error=_('Request timed out'))
+
+        try:
+            response = json_decode_binary(data)
+        except ValueError as e:
+            raise JSONError(error=str(e))
+
+        error = response.get('error')
+        if error:
+            try:
+                error_class = errors_by_code[error['code']]
+            except KeyError:
+                raise UnknownError(
+                    code=error.get('code'),
+                    error=error.get('message'),
+                    server=self.host,
+                )
+            else:
+                kw = error.get('data', {})
+                kw['message'] = error['message']
+                raise error_class(**kw)
+
+        return response['result']
+
+    async def _post(self, body):
+        for try_num in range(MAX_TRIES):
+            logger.debug("[try %d]: Sending request to %s", try_num + 1,
+                         self.host)
+            if self.kerberos and (self._sessions is None
+                                  or self._cookie is None and self._sessions):
+                async with self._auth_lock:
+                    if self._sessions is None:
+                        await self._load_session_cookie()
+                    if self._cookie is None and self._sessions:
+                        # establish the session for the waiting calls
+                        return await self._send(body, None)
+            data = await self._send(body, self._cookie)
+            if data is not None:
+                return data
+        raise NetworkError(
+            uri=self.url,
+            error=_("Exceeded number of tries to forward a request."))
+
+    async def _send(self, body, cookie):
+        """
+        Send a request with the session cookie, or authenticate it.
+
+        :return: body of the response, or ``None`` if the session cookie
+            was rejected and the request has to be sent again
+        """
+        headers = list(self._headers)
+        sec_context = None
+        if cookie is not None:
+            path = SESSION_PATH
+            headers.append(('Cookie', cookie))
+        else:
+            path = self.path
+            if self.kerberos:
+                sec_context, token = await self._run(self._init_sec_context)
+                headers.append(
+                    ('Authorization',
+                     'negotiate %s' % base64.b64encode(token).decode('ascii')))
+
+        status, reason, msg, data = await self._request(path, headers, body)
+        if status == 401 and cookie is not None:
+            await self._drop_session_cookie(cookie)
+            return None
+        if status != 200:
+            raise NetworkError(uri=self.host + path, error=reason)
+
+        if sec_context is not None:
+            self._auth_complete(sec_context, msg)
+            cookie_header = msg.get_all('Set-Cookie')
+            if cookie_header:
+                await self._store_session_cookie(cookie_header)
+            if self._cookie is None:
+                # do not serialize the calls waiting for a session
+                self._sessions = False
+        return data
+
+    async def _request(self, path, headers, body):
+        while True:
+            try:
+                conn = await self._pool.acquire()
+            except OSError as e:
+                raise NetworkError(uri=self.url, error=str(e))
+            keep_alive = False
+            try:
+                (status, reason, msg, data,
+                 keep_alive) = await conn.request(
+                    self.host, path, headers, body)
+            except (_Disconnected, ConnectionResetError,
+                    asyncio.IncompleteReadError) as e:
+                if conn.reused and not isinstance(
+                        e, asyncio.IncompleteReadError):
+                    # keep-alive connection was terminated by remote peer,
+                    # the request was not processed
+                    logger.debug("HTTP server has closed connection (%s)",
+                                 self.host)
+                    continue
+                raise NetworkError(uri=self.url, error=(
+                    str(e) or _('Connection closed by server')))
+            except (OSError, http.client.HTTPException) as e:
+                raise NetworkError(uri=self.url, error=str(e))
+            finally:
+                self._pool.release(conn, keep_alive)
+            return status, reason, msg, data
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    # pylint: disable=inconsistent-return-statements
+    # _handle_exception() always raises an exception
+    def _init_sec_context(self):
+        service = 'HTTP@' + self._pool.host
+        if self.delegate:
+            flags = DelegatedKerbTransport.flags
+        else:
+            flags = KerbTransport.flags
+        try:
+            creds = None
+            if self.ccache:
+                creds = gssapi.Credentials(usage='initiate',
+                                           store={'ccache': self.ccache})
+            name = gssapi.Name(service, gssapi.NameType.hostbased_service)
+            sec_context = gssapi.SecurityContext(creds=creds, name=name,
+                                                 flags=flags)
+            return sec_context, sec_context.step()
+        except gssapi.exceptions.GSSError as e:
+            KerbTransport._handle_exception(e, service=service)
+    # pylint: enable=inconsistent-return-statements
+
+    def _auth_complete(self, sec_context, msg):
+        """Check the mutual authentication token of the server"""
+        header = msg.get('WWW-Authenticate', '')
+        token = None
+        for field in header.split(','):
+            k, _dummy, v = field.strip().partition(' ')
+            if k.lower() == 'negotiate':
+                try:
+                    token = base64.b64decode(v.encode('ascii'))
+                    break
+                except (TypeError, ValueError):
+                    pass
+        if not token:
+            raise errors.KerberosError(
+                message=u"No valid Negotiate header in server response")
+        try:
+            sec_context.step(token=token)
+        except gssapi.exceptions.GSSError as e:
+            KerbTransport._handle_exception(e)
+        if not sec_context.complete:
+            raise errors.KerberosError(
+                message=u"Kerberos authentication did not complete")
+
+    async def _load_session_cookie(self):
+        # the credentials are only delegated with Kerberos
+        self._sessions = not self.delegate
+        try:
+            self._principal = await self._run(get_principal, self.ccache)
+        except (errors.CCacheError, ValueError):
+            return
+        if self.delegate:
+            return
+        try:
+            cookie_string = await self._run(
+                read_persistent_client_session_data, self._principal)
+            if cookie_string is None:
+                return
+            session_cookie = Cookie.get_named_cookie_from_string(
+                cookie_string.decode('utf-8'), COOKIE_NAME,
+                timestamp=datetime.datetime.now(tz=datetime.timezone.utc))
+            if session_cookie is None:
+                return
+            session_cookie.http_return_ok(self.session_url)
+        except Exception as e:
+            logger.debug("not using the stored session cookie: %s", e)
+            return
+        self._cookie = session_cookie.http_cookie()
+
+    async def _store_session_cookie(self, cookie_header):
+        session_cookie = None
+        try:
+            for cookie in cookie_header:
+                session_cookie = Cookie.get_named_cookie_from_string(
+                    cookie, COOKIE_NAME, self.session_url,
+                    timestamp=datetime.datetime.now(
+                        tz=datetime.timezone.utc))
+                if session_cookie is not None:
+                    break
+        except Exception as e:
+            logger.error("unable to parse cookie header '%s': %s",
+                         cookie_header, e)
+            return
+        if session_cookie is None:
+            return
+
+        self._cookie = session_cookie.http_cookie()
+        self._sessions = True
+        if self._principal is None:
+            return
+        try:
+            await self._run(
+                update_persistent_client_session_data, self._principal,
+                KerbTransport._slice_session_cookie(session_cookie))
+        except Exception:
+            # Not fatal, the cookie is used by this client anyway
+            pass
+
+    async def _drop_session_cookie(self, cookie):
+        if self._cookie != cookie:
+            # already renewed by another call
+            return
+        self._cookie = None
+        if self._principal is None:
+            return
+        try:
+            await self._run(
+                delete_persistent_client_session_data, self._principal)
+        except Exception as e:
+            logger.debug("Error trying to remove persisent session data: %s",
+                         e)
@@ -65,10 +65,12 @@ from ipalib.errors import (PublicError, CommandError, HelpError, InternalError,
                            NoSuchNamespaceError, ValidationError, NotFound,
                            NotConfiguredError, PromptFailed)
 from ipalib.constants import CLI_TAB, LDAP_GENERALIZED_TIME_FORMAT
+from ipalib.ipajson import json_encode_binary
 from ipalib.parameters import File, BinaryFile, Str, Enum, Any, Flag
 from ipalib.text import _
 from ipalib import api
 from ipapython.dnsutil import DNSName
+from ipapython.version import API_VERSION
 from ipapython.admintool import ScriptError
 from ipapython.config import (IPAOptionParser, IPAFormatter,
                               OptionGroup, make_option)
@@ -377,7 +379,8 @@ class textui(backend.Backend):
             print_attr(attr)
 
     def print_entries(self, entries, order=None, labels=None, flags=None, print_all=True, format='%s: %s', indent=1):
-        assert isinstance(entries, (list, tuple))
+        # entries may be any iterable, each entry is printed as soon as it
+        # is produced
         first = True
         for entry in entries:
             if not first:
@@ -431,6 +434,27 @@ class textui(backend.Backend):
                     key, entry[key], format, indent, one_value_per_line
                 )
 
+    def print_json_lines(self, entries, file=None):
+        """
+        Print entries as JSON lines, one JSON object per entry.
+
+        The lines are written to ``file``, stdout by default.
+
+        Each line is flushed as soon as it is written, so that a consumer
+        reading from a pipe can process the entries while the rest are
+        still being printed.
+
+        For example:
+
+        >>> ui = textui(api)
+        >>> ui.print_json_lines([{'uid': (u'admin',)}, {'uid': (u'tuser',)}])
+        {"uid": ["admin"]}
+        {"uid": ["tuser"]}
+        """
+        for entry in entries:
+            print(json_encode_binary(entry, API_VERSION), file=file,
+                  flush=True)
+
     def print_dashed(self, string, above=True, below=True, indent=0, dash='-'):
         """
         Print a string with a dashed line above and/or below.
@@ -235,6 +235,7 @@ DEFAULT_CONFIG = (
     ('interactive', True),
     ('fallback', True),
     ('delegate', False),
+    ('output_format', 'text'),
 
     # Enable certain optional plugins:
     ('enable_ra', False),
@@ -244,6 +245,12 @@ DEFAULT_CONFIG = (
     # Used when verifying that the API hasn't changed. Not for production.
     ('validate_api', False),
 
+    # Percentage of calls whose output is fully validated against the
+    # command's has_output in production mode. The remaining calls only get
+    # the structural checks (keys and top-level types). Other modes always
+    # validate fully.
+    ('output_validation_sample', 0),
+
     # Skip client vs. server API version checking. Can lead to errors/strange
     # behavior when newer clients talk to older servers. Use with caution.
     ('skip_version_check', False),
@@ -21,6 +21,8 @@
 Base classes for all front-end plugins.
 """
 import logging
+import random
+import sys
 
 import six
 
@@ -417,6 +419,8 @@ class Command(HasParam):
     options = Plugin.finalize_attr('options')
     params = Plugin.finalize_attr('params')
     params_by_default = Plugin.finalize_attr('params_by_default')
+    _default_params = Plugin.finalize_attr('_default_params')
+    _default_deps = Plugin.finalize_attr('_default_deps')
     obj = None
 
     use_output_validation = True
@@ -523,17 +527,21 @@ class Command(HasParam):
                 # add message only on server side
                 self.add_message(
                     messages.VersionMissing(server_version=self.api_version))
+        # formatting the call is expensive, only do it when it gets logged
+        debug = logger.isEnabledFor(logging.DEBUG)
         params = self.args_options_2_params(*args, **options)
-        logger.debug(
-            'raw: %s(%s)', self.name, ', '.join(self._repr_iter(**params))
-        )
+        if debug:
+            logger.debug(
+                'raw: %s(%s)', self.name, ', '.join(self._repr_iter(**params))
+            )
         if self.api.env.in_server:
             params.update(self.get_default(**params))
         params = self.normalize(**params)
         params = self.convert(**params)
-        logger.debug(
-            '%s(%s)', self.name, ', '.join(self._repr_iter(**params))
-        )
+        if debug:
+            logger.debug(
+                '%s(%s)', self.name, ', '.join(self._repr_iter(**params))
+            )
         if self.api.env.in_server:
             self.validate(**params)
             if all([self.name != "console",
@@ -557,11 +565,32 @@ class Command(HasParam):
         ):
             ret['summary'] = self.get_summary_default(ret)
         if self.use_output_validation and (self.output or ret is not None):
-            self.validate_output(ret, options['version'])
+            self.validate_output(ret, options['version'],
+                                 full=self.__sample_output_validation())
         if self.api.env.in_server:
             self.__audit_to_journal(self.name, params, 'SUCCESS')
         return ret
 
+    def __sample_output_validation(self):
+        """
+        Decide whether the output of this call is validated fully.
+
+        In production mode only ``output_validation_sample`` percent of the
+        calls are, so that large results do not pay for an extra traversal
+        on every call. Env only converts integral values, so the setting is
+        coerced here; an invalid value disables full validation.
+        """
+        if not self.api.is_production_mode():
+            return True
+        try:
+            sample = float(self.api.env.output_validation_sample)
+        except (TypeError, ValueError):
+            logger.warning("Invalid output_validation_sample %r",
+                           self.api.env.output_validation_sample)
+            return False
+        sample = min(max(sample, 0), 100)
+        return sample >= 100 or random.random() * 100 < sample
+
     def add_message(self, message):
         self.context.__messages.append(message)
 
@@ -780,8 +809,8 @@ class Command(HasParam):
         {}
         """
         if _params is None:
-            _params = [p.name for p in self.params()
-                       if p.name not in kw and (p.required or p.autofill)]
+            _params = [name for name in self._default_params
+                       if name not in kw]
         return dict(self.__get_default_iter(_params, kw))
 
     def get_default_of(self, _name, **kw):
@@ -798,12 +827,8 @@ class Command(HasParam):
         # Find out what additional parameters are needed to dynamically create
         # the default values with default_from.
         dep = set()
-        for param in reversed(self.params_by_default):
-            if param.name in params or param.name in dep:
-                if param.default_from is None:
-                    continue
-                for name in param.default_from.keys:
-                    dep.add(name)
+        for name in params:
+            dep.update(self._default_deps.get(name, ()))
 
         for param in self.params_by_default():
             default = None
@@ -961,6 +986,20 @@ class Command(HasParam):
                     pass
             params.insert(pos, i)
         self.params_by_default = NameSpace(params, sort=False)
+        # params get_default() fills in when they are missing
+        self._default_params = tuple(
+            p.name for p in self.params() if p.required or p.autofill)
+        # names of the params the default_from of each param depends on,
+        # directly or indirectly, used by __get_default_iter()
+        default_deps = {}
+        for param in self.params_by_default():
+            dep = set()
+            if param.default_from is not None:
+                for name in param.default_from.keys:
+                    dep.add(name)
+                    dep.update(default_deps.get(name, ()))
+            default_deps[param.name] = frozenset(dep)
+        self._default_deps = default_deps
         self.output = NameSpace(self._iter_output(), sort=False)
         self._create_param_namespace('output_params')
         super(Command, self)._on_finalize()
@@ -1050,9 +1089,13 @@ class Command(HasParam):
             flags=['no_option', 'no_output'],
         )
 
-    def validate_output(self, output, version=API_VERSION):
+    def validate_output(self, output, version=API_VERSION, full=True):
         """
         Validate the return value to make sure it meets the interface contract.
+
+        When ``full`` is false, only the keys and the types of the values are
+        checked and the per-output ``validate`` callbacks, which may walk
+        every returned entry, are skipped.
         """
         nice = '%s.validate_output()' % self.name
         if not isinstance(output, dict):
@@ -1078,7 +1121,7 @@ class Command(HasParam):
                 raise TypeError('%s:\n  output[%r]: need %r; got %r: %r' % (
                     nice, o.name, o.type, type(value), value)
                 )
-            if callable(o.validate):
+            if full and callable(o.validate):
                 o.validate(self, value, version)
 
     def get_output_params(self):
@@ -1116,12 +1159,18 @@ class Command(HasParam):
         with the --all option. Attribute labelling is disabled if the --raw
         option was given.
 
+        With the ``jsonl`` output format the entries are printed as one
+        JSON object per line. The other outputs, such as the summary or
+        the failed members, are printed to stderr as ``{name: value}``
+        JSON objects, so that the standard output holds only entries.
+
         Subclasses can override this method, if custom output is needed.
         """
         if not isinstance(output, dict):
             return None
 
         rv = 0
+        json_lines = self.api.env.output_format == 'jsonl'
 
         self.log_messages(output)
 
@@ -1159,7 +1208,14 @@ class Command(HasParam):
                     continue
                 # Return an error to the shell
                 rv = 1
-            if isinstance(outp, ListOfEntries):
+            if json_lines:
+                if isinstance(outp, ListOfEntries):
+                    textui.print_json_lines(result)
+                elif isinstance(outp, Entry):
+                    textui.print_json_lines([result])
+                elif result is not None:
+                    textui.print_json_lines([{o: result}], file=sys.stderr)
+            elif isinstance(outp, ListOfEntries):
                 textui.print_entries(result, order, labels, flags, print_all)
             elif isinstance(result, (tuple, list)):
                 textui.print_entries(result, order, labels, flags, print_all)
@@ -132,6 +132,10 @@ class Plugin(ReadOnly):
 
     version = '1'
 
+    # Instantiate the plugin when it is first used, even if the
+    # plugins_on_demand environment variable is False
+    on_demand = False
+
     def __init__(self, api):
         assert api is not None
         self.__api = api
@@ -583,6 +587,10 @@ class API(ReadOnly):
                 dest='fallback',
                 help='Only use the server configured in /etc/ipa/default.conf'
             )
+            parser.add_option('--output-format', type='choice',
+                              choices=('text', 'jsonl'), metavar='FORMAT',
+                              help='Print results as text (default) or as '
+                                   'JSON lines, one entry per line')
 
         return parser
 
@@ -607,7 +615,7 @@ class API(ReadOnly):
                     raise errors.OptionError(_('Unable to parse option {item}'
                                                .format(item=item)))
         for key in ('conf', 'debug', 'verbose', 'prompt_all', 'interactive',
-            'fallback', 'delegate'):
+                    'fallback', 'delegate', 'output_format'):
             value = getattr(options, key, None)
             if value is not None:
                 overrides[key] = value
@@ -782,7 +790,8 @@ class API(ReadOnly):
             for plugin in self.__plugins:
                 if not any(issubclass(b, base) for b in plugin.bases):
                     continue
-                if not self.env.plugins_on_demand:
+                if not (self.env.plugins_on_demand
+                        or getattr(plugin, 'on_demand', False)):
                     self._get(plugin)
 
             name = base.__name__
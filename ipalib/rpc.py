@@ -33,15 +33,21 @@ Also see the `ipaserver.rpcserver` module.
 from __future__ import absolute_import
 
 from decimal import Decimal
+import collections
 import datetime
+import errno
 import logging
 import os
 import locale
 import base64
 import json
+import queue
 import re
 import socket
 import gzip
+import tempfile
+import threading
+import time
 import urllib
 from ssl import SSLError
 
@@ -60,7 +66,7 @@ from ipalib.x509 import Encoding as x509_Encoding
 from ipapython import ipautil
 from ipapython import session_storage
 from ipapython.cookie import Cookie
-from ipapython.dnsutil import DNSName, query_srv
+from ipapython.dnsutil import DNSName, resolve, sort_prio_weight
 from ipalib.text import _
 from ipalib.util import create_https_connection
 from ipalib.krb_utils import (
@@ -124,6 +130,32 @@ logger = logging.getLogger(__name__)
 COOKIE_NAME = 'ipa_session'
 CCACHE_COOKIE_KEY = 'X-IPA-Session-Cookie'
 
+# Delay between the start of two connection attempts when looking for a
+# reachable server (the "Connection Attempt Delay" of RFC 8305)
+PROBE_DELAY = 0.25
+# Time to wait for any server to accept a connection
+PROBE_TIMEOUT = 10
+
+# A session is renewed by negotiating a new one when it expires in less than
+# this many seconds. Only expirations exposed to the client are known, see
+# KerbTransport._session_cookie_expiration(); other sessions are renewed
+# when the server refuses the cookie.
+SESSION_RENEWAL_MARGIN = 60
+
+# Commands which do not modify anything on the server, they are sent again
+# after a transient network error
+IDEMPOTENT_COMMANDS = frozenset([
+    'env', 'i18n_messages', 'json_metadata', 'ping', 'plugins', 'schema',
+    'whoami',
+])
+IDEMPOTENT_SUFFIXES = ('_find', '_show')
+# Seconds to wait before sending a command again after a network error,
+# multiplied by the number of the try
+RETRY_DELAY = 1
+
+_SRVRecord = collections.namedtuple(
+    '_SRVRecord', ['priority', 'weight', 'port', 'target'])
+
 
 def update_persistent_client_session_data(principal, data):
     '''
@@ -167,6 +199,22 @@ def delete_persistent_client_session_data(principal):
         raise ValueError(str(e))
 
 
+def _forget_session_cookie():
+    for name in ('session_cookie', 'session_expiration'):
+        try:
+            delattr(context, name)
+        except AttributeError:
+            pass
+
+
+def is_idempotent(name):
+    """
+    Return True if the command ``name`` may safely be sent again.
+    """
+    name = name.split('/', 1)[0]
+    return name in IDEMPOTENT_COMMANDS or name.endswith(IDEMPOTENT_SUFFIXES)
+
+
 def xml_wrap(value, version):
     """
     Wrap all ``str`` in ``xmlrpc.client.Binary``.
@@ -383,6 +431,18 @@ class MultiProtocolTransport(Transport):
         connection.endheaders(request_body)
 
 
+def get_accept_language():
+    """Return the value of the Accept-Language header for the locale"""
+    try:
+        lang = locale.setlocale(
+            locale.LC_MESSAGES, ''
+        ).split('.', maxsplit=1)[0].lower()
+    except locale.Error:
+        # fallback to default locale
+        lang = 'en_us'
+    return lang.replace('_', '-')
+
+
 class LanguageAwareTransport(MultiProtocolTransport):
     """Transport sending Accept-Language header"""
 
@@ -390,19 +450,11 @@ class LanguageAwareTransport(MultiProtocolTransport):
         host, extra_headers, x509 = MultiProtocolTransport.get_host_info(
             self, host)
 
-        try:
-            lang = locale.setlocale(
-                locale.LC_MESSAGES, ''
-            ).split('.', maxsplit=1)[0].lower()
-        except locale.Error:
-            # fallback to default locale
-            lang = 'en_us'
-
         if not isinstance(extra_headers, list):
             extra_headers = []
 
         extra_headers.append(
-            ('Accept-Language', lang.replace('_', '-'))
+            ('Accept-Language', get_accept_language())
         )
         extra_headers.append(
             ('Referer', 'https://%s/ipa/xml' % str(host))
@@ -444,10 +496,12 @@ class KerbTransport(SSLTransport):
     def __init__(self, *args, **kwargs):
         SSLTransport.__init__(self, *args, **kwargs)
         self._sec_context = None
+        self._session_expiration = None
         self.service = kwargs.pop("service", "HTTP")
         self.ccache = kwargs.pop("ccache", None)
 
-    def _handle_exception(self, e, service=None):
+    @staticmethod
+    def _handle_exception(e, service=None):
         minor = e.min_code
         if minor == KRB5KDC_ERR_S_PRINCIPAL_UNKNOWN:
             raise errors.ServiceError(service=service)
@@ -485,11 +539,17 @@ class KerbTransport(SSLTransport):
 
         # Remove any existing Cookie first
         self._remove_extra_header('Cookie')
+        session_cookie = None
         if use_cookie:
             session_cookie = getattr(context, 'session_cookie', None)
-            if session_cookie:
+            expiration = getattr(context, 'session_expiration', None)
+            if session_cookie and (
+                    expiration is None
+                    or time.time() < expiration - SESSION_RENEWAL_MARGIN):
                 self._extra_headers.append(('Cookie', session_cookie))
                 return
+            if session_cookie:
+                logger.debug("session expires soon, negotiating a new one")
 
         # Set the remote host principal
         host = self._get_host()
@@ -505,6 +565,12 @@ class KerbTransport(SSLTransport):
                                                        flags=self.flags)
             response = self._sec_context.step()
         except gssapi.exceptions.GSSError as e:
+            if session_cookie:
+                # the session is still valid, use it until it expires
+                logger.debug("failed to renew the session: %s", e)
+                self._sec_context = None
+                self._extra_headers.append(('Cookie', session_cookie))
+                return
             self._handle_exception(e, service=service)
 
         self._set_auth_header(response)
@@ -539,11 +605,17 @@ class KerbTransport(SSLTransport):
                     message=u"No valid Negotiate header in server response")
             token = self._sec_context.step(token=token)
             if self._sec_context.complete:
+                # the session created by the server does not outlive the
+                # security context
+                self._session_expiration = (
+                    time.time() + self._sec_context.lifetime)
                 self._sec_context = None
                 return True
             self._set_auth_header(token)
             return False
         elif response.status == 401:
+            # the session cookie was refused, do not send it again
+            _forget_session_cookie()
             self.get_auth_info(use_cookie=False)
             return False
         return True
@@ -636,15 +708,37 @@ class KerbTransport(SSLTransport):
 
     # Find all occurrences of the expiry component
     expiry_re = re.compile(r'.*?(&expiry=\d+).*?')
+    # mod_session stores the expiration of the session in microseconds since
+    # the epoch, when SessionMaxAge is set
+    session_expiry_re = re.compile(r'(?:^|&)expiry=(\d+)')
+
+    @classmethod
+    def _session_cookie_expiration(cls, session_cookie):
+        """
+        Return the expiration of a session cookie as UNIX time, or None if
+        the server does not expose it.
 
-    def _slice_session_cookie(self, session_cookie):
+        The expiration is taken from the mod_session ``expiry`` in the
+        cookie value and from the Expires and Max-Age attributes.
+        """
+        expirations = [
+            int(expiry) / 1000000
+            for expiry in cls.session_expiry_re.findall(session_cookie.value)
+        ]
+        cookie_expiration = session_cookie.get_expiration()
+        if cookie_expiration is not None:
+            expirations.append(Cookie.datetime_to_time(cookie_expiration))
+        return min(expirations, default=None)
+
+    @classmethod
+    def _slice_session_cookie(cls, session_cookie):
         # Keep only the cookie value and strip away all other info.
         # This is to reduce the churn on FILE ccaches which grow every time we
         # set new data. The expiration time for the cookie is set in the
         # encrypted data anyway and will be enforced by the server
         http_cookie = session_cookie.http_cookie()
         # We also remove the "expiry" part from the data which is not required
-        for exp in self.expiry_re.findall(http_cookie):
+        for exp in cls.expiry_re.findall(http_cookie):
             http_cookie = http_cookie.replace(exp, '')
         return http_cookie
 
@@ -667,6 +761,13 @@ class KerbTransport(SSLTransport):
             request_url
                 The URL of the HTTP request.
 
+        Unless the credentials are delegated, the per thread context will
+        be updated with:
+            session_cookie
+                The session cookie, sent with the following requests.
+            session_expiration
+                The time the session expires, or None if unknown.
+
         '''
 
         if cookie_header is None:
@@ -709,6 +810,18 @@ class KerbTransport(SSLTransport):
             # Not fatal, we just can't use the session cookie we were sent.
             pass
 
+        if gssapi.RequirementFlag.delegate_to_peer not in self.flags:
+            # use the session for the next requests instead of negotiating
+            # each of them. A session created by mod_auth_gssapi does not
+            # outlive the security context it was created with.
+            expiration = self._session_cookie_expiration(session_cookie)
+            if self._session_expiration is not None and (
+                    expiration is None
+                    or self._session_expiration < expiration):
+                expiration = self._session_expiration
+            setattr(context, 'session_cookie', cookie_string)
+            setattr(context, 'session_expiration', expiration)
+
     def parse_response(self, response):
         if six.PY2:
             header = response.msg.getheaders('Set-Cookie')
@@ -728,6 +841,141 @@ class DelegatedKerbTransport(KerbTransport):
              gssapi.RequirementFlag.out_of_sequence_detection]
 
 
+class DomainCache:
+    """
+    Client side cache of the IPA server discovery data of a domain.
+
+    Holds the ``_ldap._tcp`` SRV records of the domain until their TTL
+    expires, and the server which last answered a request.
+    """
+    def __init__(self, cache_dir, domain):
+        self._dir = os.path.join(cache_dir, 'domains')
+        self._filename = os.path.join(
+            self._dir, DNSName(domain).ToASCII())
+        self._dict = {}
+        self._read()
+
+    def _read(self):
+        try:
+            with open(self._filename, 'r') as f:
+                self._dict = json.load(f)
+        except Exception as e:
+            if not (isinstance(e, EnvironmentError)
+                    and e.errno == errno.ENOENT):  # pylint: disable=no-member
+                logger.debug('Failed to read domain cache: %s', e)
+
+    def _write(self):
+        try:
+            try:
+                os.makedirs(self._dir)
+            except EnvironmentError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+            # several clients may update the cache at the same time
+            with tempfile.NamedTemporaryFile(
+                    'w', dir=self._dir, delete=False) as f:
+                try:
+                    json.dump(self._dict, f)
+                    f.close()
+                    os.rename(f.name, self._filename)
+                except Exception:
+                    os.unlink(f.name)
+                    raise
+        except EnvironmentError as e:
+            logger.debug('Failed to write domain cache: %s', e)
+
+    def get_srv_records(self):
+        """
+        :return: list of cached SRV records, or None if there are none or
+            they expired
+        """
+        try:
+            if self._dict['srv_expiration'] < time.time():
+                return None
+            return [_SRVRecord(*r) for r in self._dict['srv']]
+        except (KeyError, TypeError):
+            return None
+
+    def set_srv_records(self, records, ttl):
+        self._dict['srv'] = [
+            [r.priority, r.weight, r.port, str(r.target)] for r in records
+        ]
+        self._dict['srv_expiration'] = time.time() + ttl
+        self._write()
+
+    @property
+    def last_server(self):
+        return self._dict.get('last_server')
+
+    @last_server.setter
+    def last_server(self, hostname):
+        if self._dict.get('last_server') != hostname:
+            self._dict['last_server'] = hostname
+            self._write()
+
+
+def _probe_connect(url, timeout, results):
+    parts = urllib.parse.urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    try:
+        sock = socket.create_connection((parts.hostname, port), timeout)
+    except OSError as e:
+        results.put((url, e))
+    else:
+        sock.close()
+        results.put((url, None))
+
+
+def order_by_reachability(urls, delay=PROBE_DELAY, timeout=PROBE_TIMEOUT):
+    """
+    Find the server which accepts a connection first.
+
+    Connections to the servers are started one after another in list
+    order, every ``delay`` seconds or as soon as the previous attempt
+    failed, and all race to be accepted first.  The unreachable servers
+    do not make the caller wait for their full timeout.
+
+    :return: ``urls`` with the first server to accept a connection
+        first, followed by the untried or still pending servers and then
+        the unreachable ones
+    """
+    results = queue.Queue()
+    pending = list(urls)
+    running = 0
+    failed = []
+    deadline = None
+    while pending or running:
+        if pending:
+            url = pending.pop(0)
+            # daemon threads, a pending attempt must not delay the exit
+            t = threading.Thread(
+                target=_probe_connect, args=(url, timeout, results))
+            t.daemon = True
+            t.start()
+            running += 1
+            wait = delay
+        else:
+            if deadline is None:
+                deadline = time.time() + timeout
+            wait = deadline - time.time()
+            if wait <= 0:
+                break
+
+        try:
+            url, error = results.get(timeout=wait)
+        except queue.Empty:
+            continue
+        running -= 1
+        if error is None:
+            logger.debug('%s is reachable', url)
+            return [url] + [u for u in urls
+                            if u != url and u not in failed] + failed
+        logger.debug('%s is unreachable: %s', url, error)
+        failed.append(url)
+
+    return [u for u in urls if u not in failed] + failed
+
+
 class RPCClient(Connectible):
     """
     Forwarding backend plugin for XML-RPC client.
@@ -751,10 +999,20 @@ class RPCClient(Connectible):
         servers = []
         name = '_ldap._tcp.%s.' % self.env.domain
 
-        try:
-            answers = query_srv(name)
-        except DNSException:
-            answers = []
+        cache = DomainCache(self.env.cache_dir, self.env.domain)
+        records = cache.get_srv_records()
+        if records is None:
+            try:
+                answer = resolve(name, rdtype='SRV')
+            except DNSException:
+                records = []
+            else:
+                records = [
+                    _SRVRecord(r.priority, r.weight, r.port, r.target)
+                    for r in answer
+                ]
+                cache.set_srv_records(records, answer.rrset.ttl)
+        answers = sort_prio_weight(records)
 
         for answer in answers:
             server = str(answer.target).rstrip(".")
@@ -862,6 +1120,8 @@ class RPCClient(Connectible):
         logger.debug("setting session_cookie into context '%s'",
                      session_cookie.http_cookie())
         setattr(context, 'session_cookie', session_cookie.http_cookie())
+        # the expiration is not stored with the cookie
+        setattr(context, 'session_expiration', None)
 
         # Form the session URL by substituting the session path
         # into the original URL
@@ -890,10 +1150,7 @@ class RPCClient(Connectible):
             principal = get_principal(ccache_name=ccache)
             stored_principal = getattr(context, 'principal', None)
             if principal != stored_principal:
-                try:
-                    delattr(context, 'session_cookie')
-                except AttributeError:
-                    pass
+                _forget_session_cookie()
             setattr(context, 'principal', principal)
             # We have a session cookie, try using the session URI to see if it
             # is still valid
@@ -903,6 +1160,16 @@ class RPCClient(Connectible):
             # No session key, do full Kerberos auth
             pass
         urls = self.get_url_list(rpc_uri)
+        cache = None
+        if fallback and len(urls) > 1:
+            # the session or configured URL stays first: another server
+            # would reject the session cookie and the session would be
+            # forgotten. Among the fallback servers, try the one which
+            # answered last time first.
+            cache = DomainCache(self.env.cache_dir, self.env.domain)
+            fallback_urls = sorted(urls[1:], key=lambda u: (
+                urllib.parse.urlsplit(u).hostname != cache.last_server))
+            urls = urls[:1] + order_by_reachability(fallback_urls)
 
         proxy_kw = {
             'allow_none': True,
@@ -948,6 +1215,9 @@ class RPCClient(Connectible):
                                 server=url,
                             )
                     # We don't care about the response, just that we got one
+                    if cache is not None:
+                        cache.last_server = urllib.parse.urlsplit(
+                            url).hostname
                     return serverproxy
                 except errors.KerberosError:
                     # kerberos error on one server is likely on all
@@ -955,7 +1225,7 @@ class RPCClient(Connectible):
                 except ProtocolError as e:
                     if hasattr(context, 'session_cookie') and e.errcode == 401:
                         # Unauthorized. Remove the session and try again.
-                        delattr(context, 'session_cookie')
+                        _forget_session_cookie()
                         try:
                             delete_persistent_client_session_data(principal)
                         except Exception:
@@ -1007,15 +1277,20 @@ class RPCClient(Connectible):
         :param kw: Keyword arguments to pass to remote command.
         """
         server = getattr(context, 'request_url', None)
-        command = getattr(self.conn, name)
         params = [args, kw]
+        idempotent = is_idempotent(name)
 
         # we'll be trying to connect multiple times with a new session cookie
-        # each time should we be getting UNAUTHORIZED error from the server
+        # each time should we be getting UNAUTHORIZED error from the server,
+        # idempotent commands are also sent again after network errors
         max_tries = 5
         for try_num in range(0, max_tries):
             logger.debug("[try %d]: Forwarding '%s' to %s server '%s'",
                          try_num + 1, name, self.protocol, server)
+            # the connection is replaced when the session is renewed
+            command = getattr(self.conn, name)
+            # the transport forgets a refused session cookie
+            session_cookie = getattr(context, 'session_cookie', None)
             try:
                 return self._call_command(command, params)
             except Fault as e:
@@ -1034,10 +1309,9 @@ class RPCClient(Connectible):
                 # By catching a 401 here we can detect the case where we have
                 # a single IPA server and the session is invalid. Otherwise
                 # we always have to do a ping().
-                session_cookie = getattr(context, 'session_cookie', None)
                 if session_cookie and e.errcode == 401:
                     # Unauthorized. Remove the session and try again.
-                    delattr(context, 'session_cookie')
+                    _forget_session_cookie()
                     try:
                         principal = getattr(context, 'principal', None)
                         delete_persistent_client_session_data(principal)
@@ -1058,6 +1332,13 @@ class RPCClient(Connectible):
                     continue
                 raise NetworkError(uri=server, error=e.errmsg)
             except (SSLError, socket.error) as e:
+                if (idempotent and try_num + 1 < max_tries
+                        and isinstance(e, (ConnectionError, socket.timeout))):
+                    # the transport reconnects on the next request
+                    logger.debug("Sending '%s' again after error: %s",
+                                 name, e)
+                    time.sleep(RETRY_DELAY * (try_num + 1))
+                    continue
                 raise NetworkError(uri=server, error=str(e))
             except (OverflowError, TypeError) as e:
                 raise XMLRPCMarshallError(error=str(e))
@@ -292,21 +292,16 @@ def get_proper_tls_version_span(tls_version_min, tls_version_max):
     return TLS_VERSIONS[min_version_idx:max_version_idx+1]
 
 
-def create_https_connection(
-    host, port=HTTPSConnection.default_port,
+def create_ssl_context(
     cafile=None,
     client_certfile=None, client_keyfile=None,
     keyfile_passwd=None,
     tls_version_min=TLS_VERSION_DEFAULT_MIN,
     tls_version_max=TLS_VERSION_DEFAULT_MAX,
-    **kwargs
 ):
     """
-    Create a customized HTTPSConnection object.
+    Create a client SSLContext verifying the server certificate.
 
-    :param host:  The host to connect to
-    :param port:  The port to connect to, defaults to
-               HTTPSConnection.default_port
     :param cafile:  A PEM-format file containning the trusted
                     CA certificates
     :param client_certfile:
@@ -319,7 +314,7 @@ def create_https_connection(
             A path to the file which stores the password that is used to
             encrypt client_keyfile. Leave default value if the keyfile
             is not encrypted.
-    :returns An established HTTPS connection to host:port
+    :returns An SSLContext for client connections
     """
     tls_cutoff_map = {
         "ssl2": ssl.OP_NO_SSLv2,
@@ -383,6 +378,41 @@ def create_https_connection(
             passwd = None
         ctx.load_cert_chain(client_certfile, client_keyfile, passwd)
 
+    return ctx
+
+
+def create_https_connection(
+    host, port=HTTPSConnection.default_port,
+    cafile=None,
+    client_certfile=None, client_keyfile=None,
+    keyfile_passwd=None,
+    tls_version_min=TLS_VERSION_DEFAULT_MIN,
+    tls_version_max=TLS_VERSION_DEFAULT_MAX,
+    **kwargs
+):
+    """
+    Create a customized HTTPSConnection object.
+
+    :param host:  The host to connect to
+    :param port:  The port to connect to, defaults to
+               HTTPSConnection.default_port
+    :param cafile:  A PEM-format file containning the trusted
+                    CA certificates
+    :param client_certfile:
+            A PEM-format client certificate file that will be used to
+            identificate the user to the server.
+    :param client_keyfile:
+            A file with the client private key. If this argument is not
+            supplied, the key will be sought in client_certfile.
+    :param keyfile_passwd:
+            A path to the file which stores the password that is used to
+            encrypt client_keyfile. Leave default value if the keyfile
+            is not encrypted.
+    :returns An established HTTPS connection to host:port
+    """
+    ctx = create_ssl_context(
+        cafile, client_certfile, client_keyfile, keyfile_passwd,
+        tls_version_min, tls_version_max)
     return HTTPSConnection(host, port, context=ctx, **kwargs)
 
 
@@ -35,6 +35,7 @@ import os
 import binascii
 import datetime
 import enum
+import functools
 import ipaddress
 import base64
 import re
@@ -87,6 +88,9 @@ EKU_PLACEHOLDER = '1.3.6.1.4.1.3319.6.10.16'
 SAN_UPN = '1.3.6.1.4.1.311.20.2.3'
 SAN_KRB5PRINCIPALNAME = '1.3.6.1.5.2.2'
 
+# Number of parsed DER certificates kept by load_der_x509_certificate()
+DER_CACHE_SIZE = 1024
+
 
 class IPACertificate:
     """
@@ -100,6 +104,7 @@ class IPACertificate:
         """
         self._cert = cert
         self.backend = default_backend() if backend is None else backend()
+        self._reset_memo()
 
         # initialize the certificate fields
         # we have to do it this way so that some systems don't explode since
@@ -124,9 +129,18 @@ class IPACertificate:
     def __setstate__(self, state):
         self._subject = state['_subject']
         self._issuer = state['_issuer']
-        self._issuer = state['_serial_number']
+        self._serial_number = state['_serial_number']
         self._cert = crypto_x509.load_der_x509_certificate(
             state['_cert'], backend=default_backend())
+        self._reset_memo()
+
+    def _reset_memo(self):
+        # values derived from the (immutable) certificate, computed on
+        # first use
+        self._tbs = None
+        self._san_general_names = None
+        self._extended_key_usage = None
+        self._fingerprints = {}
 
     def __eq__(self, other):
         """
@@ -175,10 +189,10 @@ class IPACertificate:
         """
         :returns: a field of the certificate in pyasn1 representation
         """
-        cert_bytes = self.tbs_certificate_bytes
-        cert = decoder.decode(cert_bytes, rfc2459.TBSCertificate())[0]
-        field = cert[field]
-        return field
+        if self._tbs is None:
+            self._tbs = decoder.decode(
+                self.tbs_certificate_bytes, rfc2459.TBSCertificate())[0]
+        return self._tbs[field]
 
     def __get_der_field(self, field):
         """
@@ -203,7 +217,12 @@ class IPACertificate:
         """
         Counts fingerprint of the wrapped cryptography.Certificate
         """
-        return self._cert.fingerprint(algorithm)
+        try:
+            return self._fingerprints[algorithm.name]
+        except KeyError:
+            fp = self._fingerprints[algorithm.name] = (
+                self._cert.fingerprint(algorithm))
+            return fp
 
     @property
     def cert(self):
@@ -324,13 +343,19 @@ class IPACertificate:
 
     @property
     def extended_key_usage(self):
-        try:
-            ext_key_usage = self._cert.extensions.get_extension_for_oid(
-                crypto_x509.oid.ExtensionOID.EXTENDED_KEY_USAGE).value
-        except crypto_x509.ExtensionNotFound:
+        if self._extended_key_usage is None:
+            try:
+                ext_key_usage = self._cert.extensions.get_extension_for_oid(
+                    crypto_x509.oid.ExtensionOID.EXTENDED_KEY_USAGE).value
+            except crypto_x509.ExtensionNotFound:
+                self._extended_key_usage = ()
+            else:
+                self._extended_key_usage = frozenset(
+                    oid.dotted_string for oid in ext_key_usage)
+
+        if self._extended_key_usage == ():
             return None
-
-        return set(oid.dotted_string for oid in ext_key_usage)
+        return set(self._extended_key_usage)
 
     @property
     def extended_key_usage_bytes(self):
@@ -369,6 +394,9 @@ class IPACertificate:
         and should go away.
 
         """
+        if self._san_general_names is not None:
+            return list(self._san_general_names)
+
         gns = self.__pyasn1_get_san_general_names()
 
         GENERAL_NAME_CONSTRUCTORS = {
@@ -391,6 +419,7 @@ class IPACertificate:
                 result.append(
                     GENERAL_NAME_CONSTRUCTORS[gn_type](gn.getComponent()))
 
+        self._san_general_names = tuple(result)
         return result
 
     def __pyasn1_get_san_general_names(self):
@@ -472,11 +501,20 @@ def load_der_x509_certificate(data):
     """
     Load an X.509 certificate in DER format.
 
+    The same certificates are loaded over and over (from LDAP entries, the
+    CA or CA chains), so parsed certificates are cached by their content.
+    The returned object is shared and must not be modified.
+
     :returns: a ``IPACertificate`` object.
     :raises: ``ValueError`` if unable to load the certificate.
     """
     if isinstance(data, IPACertificate):
         return data
+    return _load_der_x509_certificate(bytes(data))
+
+
+@functools.lru_cache(maxsize=DER_CACHE_SIZE)
+def _load_der_x509_certificate(data):
     return IPACertificate(
         crypto_x509.load_der_x509_certificate(data, backend=default_backend())
     )
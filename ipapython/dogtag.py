@@ -22,6 +22,9 @@ import gzip
 import io
 import json
 import logging
+import select
+import threading
+import time
 from urllib.parse import urlencode
 import xml.dom.minidom
 import zlib
@@ -64,6 +67,13 @@ INCLUDED_PROFILES = {
 DEFAULT_PROFILE = u'caIPAserviceCert'
 KDC_PROFILE = u'KDCs_PKINIT_Certs'
 
+# Seconds a persistent HTTPS connection may stay idle in the pool before it
+# is closed instead of being reused. It must stay below the keep-alive
+# timeout of the Tomcat connector of Dogtag (20 seconds by default), or the
+# server may close a connection just as it is reused and a non-idempotent
+# request sent on it fails.
+POOL_IDLE_TIMEOUT = 15
+
 
 if six.PY3:
     gzip_decompress = gzip.decompress
@@ -190,11 +200,13 @@ def acme_status(ca_host=None):
 
 def https_request(
         host, port, url, cafile, client_certfile, client_keyfile,
-        method='POST', headers=None, body=None, **kw):
+        method='POST', headers=None, body=None, idempotent=None, **kw):
     """
     :param method: HTTP request method (defalut: 'POST')
     :param url: The path (not complete URL!) to post to.
     :param body: The request body (encodes kw if None)
+    :param idempotent: whether the request may be sent twice, see
+        ``_httplib_request``
     :param kw:  Keyword arguments to encode into POST body.
     :return:   (http_status, http_headers, http_body)
                as (integer, dict, str)
@@ -215,7 +227,8 @@ def https_request(
         body = urlencode(kw)
     return _httplib_request(
         'https', host, port, url, connection_factory, body,
-        method=method, headers=headers)
+        method=method, headers=headers, idempotent=idempotent,
+        pool_key=(host, port, cafile, client_certfile, client_keyfile))
 
 
 def http_request(host, port, url, timeout=None, **kw):
@@ -239,9 +252,87 @@ def http_request(host, port, url, timeout=None, **kw):
         connection_options=conn_opt)
 
 
+class _ConnectionPool(threading.local):
+    """
+    Per-thread pool of persistent HTTP(S) connections.
+
+    Connections are keyed by everything that determines the identity of the
+    TLS session (host, port, trust anchors and client credentials), so a
+    connection authenticated with one client certificate is never handed out
+    for a request made with another one.
+    """
+    def __init__(self):
+        super(_ConnectionPool, self).__init__()
+        self.connections = {}
+
+    @staticmethod
+    def _is_usable(conn):
+        sock = conn.sock
+        if sock is None:
+            return False
+        try:
+            # An idle keep-alive socket must not be readable; if it is, the
+            # server either closed it or sent unsolicited data.
+            readable, _w, _x = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def get(self, key):
+        """Return a live idle connection for ``key`` or None"""
+        pooled = self.connections.pop(key, None)
+        if pooled is None:
+            return None
+        conn, last_used = pooled
+        if (time.monotonic() - last_used > POOL_IDLE_TIMEOUT
+                or not self._is_usable(conn)):
+            logger.debug("discarding stale connection to %s:%s",
+                         key[0], key[1])
+            conn.close()
+            return None
+        return conn
+
+    def put(self, key, conn):
+        """Return ``conn`` to the pool, replacing any idle one for ``key``"""
+        previous = self.connections.pop(key, None)
+        if previous is not None:
+            previous[0].close()
+        self.connections[key] = (conn, time.monotonic())
+
+    def clear(self, host=None):
+        """Close idle connections, either all of them or those to ``host``"""
+        for key in list(self.connections):
+            if host is None or key[0] == host:
+                conn, _last_used = self.connections.pop(key)
+                conn.close()
+
+
+_connection_pool = _ConnectionPool()
+
+
+def close_connections(host=None):
+    """
+    Close the persistent connections of the calling thread.
+
+    :param host: only close connections to this host
+    """
+    _connection_pool.clear(host)
+
+
+# Errors raised when a reused keep-alive connection turns out to have been
+# closed by the server before it answered. The server may have processed the
+# request anyway, so only idempotent requests are sent again.
+_STALE_CONNECTION_ERRORS = (
+    httplib.RemoteDisconnected, ConnectionResetError, BrokenPipeError,
+)
+
+_IDEMPOTENT_METHODS = ('GET', 'HEAD')
+
+
 def _httplib_request(
         protocol, host, port, path, connection_factory, request_body,
-        method='POST', headers=None, connection_options=None):
+        method='POST', headers=None, connection_options=None,
+        pool_key=None, idempotent=None):
     """
     :param request_body: Request body
     :param connection_factory: Connection class to use. Will be called
@@ -249,11 +340,18 @@ def _httplib_request(
     :param method: HTTP request method (default: 'POST')
     :param connection_options: a dictionary that will be passed to
         connection_factory as keyword arguments.
+    :param pool_key: if set, the connection is kept open after the request
+        and reused by later requests of the same thread with the same key.
+    :param idempotent: whether the request may be resent on a fresh
+        connection when a reused one turns out to be closed (default: only
+        for GET and HEAD requests)
 
     Perform a HTTP(s) request.
     """
     if connection_options is None:
         connection_options = {}
+    if idempotent is None:
+        idempotent = method in _IDEMPOTENT_METHODS
 
     uri = u'%s://%s%s' % (protocol, ipautil.format_netloc(host, port), path)
     logger.debug('request %s %s', method, uri)
@@ -266,19 +364,46 @@ def _httplib_request(
     ):
         headers['content-type'] = 'application/x-www-form-urlencoded'
 
+    conn = None
+    if pool_key is not None:
+        conn = _connection_pool.get(pool_key)
+    reused = conn is not None
+
     try:
-        conn = connection_factory(host, port, **connection_options)
-        conn.request(method, path, body=request_body, headers=headers)
-        res = conn.getresponse()
+        while True:
+            if conn is None:
+                conn = connection_factory(host, port, **connection_options)
+            try:
+                conn.request(method, path, body=request_body, headers=headers)
+                res = conn.getresponse()
+            except _STALE_CONNECTION_ERRORS:
+                if not (reused and idempotent):
+                    raise
+                logger.debug("pooled connection to %s was closed, "
+                             "reconnecting", uri)
+                conn.close()
+                conn = None
+                reused = False
+                continue
+            break
 
         http_status = res.status
         http_headers = res.msg
         http_body = res.read()
-        conn.close()
     except Exception as e:
         logger.debug("httplib request failed:", exc_info=True)
+        if conn is not None:
+            conn.close()
+        if pool_key is not None:
+            # the host may be down, do not hand out its other connections
+            _connection_pool.clear(host)
         raise NetworkError(uri=uri, error=str(e))
 
+    if pool_key is not None and not res.will_close:
+        _connection_pool.put(pool_key, conn)
+    else:
+        conn.close()
+
     encoding = res.getheader('Content-Encoding')
     if encoding == 'gzip':
         http_body = gzip_decompress(http_body)
@@ -19,6 +19,7 @@
 
 from __future__ import absolute_import
 
+import ctypes
 import os
 
 from ipapython.ipautil import run
@@ -36,6 +37,49 @@ from ipaplatform.tasks import tasks
 KEYRING = '@s'
 KEYTYPE = 'user'
 
+# keyutils.h KEY_SPEC_SESSION_KEYRING, the id of KEYRING
+KEY_SPEC_SESSION_KEYRING = -3
+
+# The keys are accessed through libkeyutils when it is available, which saves
+# a fork and exec of keyctl for every operation. keyctl is the fallback.
+LIBKEYUTILS_FILENAME = 'libkeyutils.so.1'
+
+key_serial_t = ctypes.c_int32
+
+
+def _load_libkeyutils():
+    try:
+        lib = ctypes.CDLL(LIBKEYUTILS_FILENAME, use_errno=True)
+        signatures = (
+            ('add_key', key_serial_t,
+             [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p,
+              ctypes.c_size_t, key_serial_t]),
+            ('keyctl_search', ctypes.c_long,
+             [key_serial_t, ctypes.c_char_p, ctypes.c_char_p, key_serial_t]),
+            ('keyctl_read', ctypes.c_long,
+             [key_serial_t, ctypes.c_char_p, ctypes.c_size_t]),
+            ('keyctl_update', ctypes.c_long,
+             [key_serial_t, ctypes.c_char_p, ctypes.c_size_t]),
+            ('keyctl_unlink', ctypes.c_long, [key_serial_t, key_serial_t]),
+            ('keyctl_get_persistent', ctypes.c_long,
+             [ctypes.c_uint, key_serial_t]),
+        )
+        for name, restype, argtypes in signatures:
+            func = getattr(lib, name)
+            func.restype = restype
+            func.argtypes = argtypes
+    except (OSError, AttributeError):
+        # library missing or too old
+        return None
+    return lib
+
+
+_libkeyutils = _load_libkeyutils()
+
+
+def _strerror():
+    return os.strerror(ctypes.get_errno())
+
 
 def dump_keys():
     """
@@ -46,17 +90,32 @@ def dump_keys():
     return result.output
 
 
+def _search(key):
+    """Return the id of the key with description key, or None"""
+    if _libkeyutils is not None:
+        serial = _libkeyutils.keyctl_search(
+            KEY_SPEC_SESSION_KEYRING, KEYTYPE.encode('utf-8'),
+            key.encode('utf-8'), 0)
+        if serial == -1:
+            return None
+        return serial
+    result = run([paths.KEYCTL, 'search', KEYRING, KEYTYPE, key],
+                 raiseonerr=False, capture_output=True)
+    if result.returncode:
+        return None
+    return int(result.raw_output)
+
+
 def get_real_key(key):
     """
     One cannot request a key based on the description it was created with
     so find the one we're looking for.
     """
     assert isinstance(key, str)
-    result = run([paths.KEYCTL, 'search', KEYRING, KEYTYPE, key],
-                 raiseonerr=False, capture_output=True)
-    if result.returncode:
+    serial = _search(key)
+    if serial is None:
         raise ValueError('key %s not found' % key)
-    return result.raw_output.rstrip()
+    return str(serial).encode('ascii')
 
 
 def get_persistent_key(key):
@@ -67,6 +126,12 @@ def get_persistent_key(key):
     Assert when key is not a string-type.
     """
     assert isinstance(key, str)
+    if _libkeyutils is not None:
+        serial = _libkeyutils.keyctl_get_persistent(
+            int(key), KEY_SPEC_SESSION_KEYRING)
+        if serial == -1:
+            raise ValueError('persistent key %s not found' % key)
+        return str(serial).encode('ascii')
     result = run([paths.KEYCTL, 'get_persistent', KEYRING, key],
                  raiseonerr=False, capture_output=True)
     if result.returncode:
@@ -96,11 +161,7 @@ def has_key(key):
     Returns True/False whether the key exists in the keyring.
     """
     assert isinstance(key, str)
-    try:
-        get_real_key(key)
-        return True
-    except ValueError:
-        return False
+    return _search(key) is not None
 
 
 def read_key(key):
@@ -111,6 +172,18 @@ def read_key(key):
     """
     assert isinstance(key, str)
     real_key = get_real_key(key)
+    if _libkeyutils is not None:
+        size = 0
+        while True:
+            buf = ctypes.create_string_buffer(size)
+            length = _libkeyutils.keyctl_read(int(real_key), buf, size)
+            if length == -1:
+                raise ValueError('keyctl pipe failed: %s' % _strerror())
+            if length <= size:
+                return buf.raw[:length]
+            # the key was too large for the buffer
+            size = length
+
     result = run([paths.KEYCTL, 'pipe', real_key], raiseonerr=False,
                  capture_output=True)
     if result.returncode:
@@ -125,14 +198,17 @@ def update_key(key, value):
     """
     assert isinstance(key, str)
     assert isinstance(value, bytes)
-    if has_key(key):
-        real_key = get_real_key(key)
-        result = run([paths.KEYCTL, 'pupdate', real_key], stdin=value,
+    serial = _search(key)
+    if serial is None:
+        add_key(key, value)
+    elif _libkeyutils is not None:
+        if _libkeyutils.keyctl_update(serial, value, len(value)) == -1:
+            raise ValueError('keyctl pupdate failed: %s' % _strerror())
+    else:
+        result = run([paths.KEYCTL, 'pupdate', str(serial)], stdin=value,
                      raiseonerr=False)
         if result.returncode:
             raise ValueError('keyctl pupdate failed: %s' % result.error_log)
-    else:
-        add_key(key, value)
 
 
 def add_key(key, value):
@@ -143,6 +219,13 @@ def add_key(key, value):
     assert isinstance(value, bytes)
     if has_key(key):
         raise ValueError('key %s already exists' % key)
+    if _libkeyutils is not None:
+        serial = _libkeyutils.add_key(
+            KEYTYPE.encode('utf-8'), key.encode('utf-8'), value, len(value),
+            KEY_SPEC_SESSION_KEYRING)
+        if serial == -1:
+            raise ValueError('keyctl padd failed: %s' % _strerror())
+        return
     result = run([paths.KEYCTL, 'padd', KEYTYPE, key, KEYRING],
                  stdin=value, raiseonerr=False)
     if result.returncode:
@@ -155,6 +238,11 @@ def del_key(key):
     """
     assert isinstance(key, str)
     real_key = get_real_key(key)
+    if _libkeyutils is not None:
+        if _libkeyutils.keyctl_unlink(
+                int(real_key), KEY_SPEC_SESSION_KEYRING) == -1:
+            raise ValueError('keyctl unlink failed: %s' % _strerror())
+        return
     result = run([paths.KEYCTL, 'unlink', real_key, KEYRING],
                  raiseonerr=False)
     if result.returncode:
@@ -0,0 +1,177 @@
+#
+# Copyright (C) 2026  FreeIPA Contributors see COPYING for license
+#
+
+"""
+Streaming reader of DER encoded CRLs.
+
+Loading a CRL with python-cryptography keeps the whole file in memory and
+every revoked certificate becomes an object when the CRL is iterated.
+``CRLSummary`` instead reads the CRL sequentially, one revoked certificate
+entry at a time, and only keeps the figures ``ipa-crlgen-manage status``
+reports.
+"""
+
+import datetime
+
+_TAG_INTEGER = 0x02
+_TAG_OCTET_STRING = 0x04
+_TAG_OID = 0x06
+_TAG_UTC_TIME = 0x17
+_TAG_GENERALIZED_TIME = 0x18
+_TAG_SEQUENCE = 0x30
+_TAG_CRL_EXTENSIONS = 0xa0
+
+# DER encoded content of OID 2.5.29.20 (cRLNumber)
+_OID_CRL_NUMBER = b'\x55\x1d\x14'
+
+
+def _decode_length(first, read):
+    if first < 0x80:
+        return first
+    num = first & 0x7f
+    if num == 0 or num > 8:
+        raise ValueError("unsupported DER length encoding")
+    return int.from_bytes(read(num), 'big')
+
+
+def _parse_tlv(buf, pos):
+    """
+    :return: (tag, content start, content end) of the TLV at ``pos``
+    """
+    if pos + 2 > len(buf):
+        raise ValueError("truncated DER data")
+    tag = buf[pos]
+    offset = [pos + 2]
+
+    def read(n):
+        start = offset[0]
+        offset[0] += n
+        if offset[0] > len(buf):
+            raise ValueError("truncated DER data")
+        return buf[start:offset[0]]
+
+    length = _decode_length(buf[pos + 1], read)
+    start = offset[0]
+    if start + length > len(buf):
+        raise ValueError("truncated DER data")
+    return tag, start, start + length
+
+
+def _decode_time(tag, value):
+    value = value.decode('ascii')
+    if tag == _TAG_UTC_TIME:
+        t = datetime.datetime.strptime(value, '%y%m%d%H%M%SZ')
+        # RFC 5280: YY >= 50 is 19YY
+        if t.year >= 2050:
+            t = t.replace(year=t.year - 100)
+        return t
+    elif tag == _TAG_GENERALIZED_TIME:
+        # drop fractional seconds, not used by RFC 5280 CRLs
+        return datetime.datetime.strptime(value[:14], '%Y%m%d%H%M%S')
+    raise ValueError("unexpected time tag 0x{:02x}".format(tag))
+
+
+class _StreamReader:
+    def __init__(self, f):
+        self._f = f
+
+    def read(self, n):
+        data = self._f.read(n)
+        if len(data) != n:
+            raise ValueError("truncated CRL")
+        return data
+
+    def header(self):
+        """:return: (tag, length) of the next TLV"""
+        tag, first = self.read(2)
+        return tag, _decode_length(first, self.read)
+
+
+class CRLSummary:
+    """
+    Update times, number and size of a CRL.
+
+    ``this_update`` and ``next_update`` are naive UTC datetimes, as the
+    ``last_update`` and ``next_update`` attributes of python-cryptography
+    CRLs.
+    """
+    def __init__(self, this_update, next_update=None, crl_number=None,
+                 revoked=0):
+        self.this_update = this_update
+        self.next_update = next_update
+        self.crl_number = crl_number
+        self.revoked = revoked
+
+    @classmethod
+    def read(cls, crl_filename):
+        """
+        Read a DER encoded CRL
+
+        :raises: ``ValueError`` if the file is not a valid CRL
+        """
+        next_update = None
+        crl_number = None
+        revoked = 0
+
+        with open(crl_filename, 'rb') as f:
+            reader = _StreamReader(f)
+
+            # CertificateList and TBSCertList
+            for _i in range(2):
+                tag, length = reader.header()
+                if tag != _TAG_SEQUENCE:
+                    raise ValueError("not a DER encoded CRL")
+            end = f.tell() + length
+
+            # the fields up to thisUpdate are short, read them whole
+            tag, length = reader.header()
+            if tag == _TAG_INTEGER:  # version
+                reader.read(length)
+                tag, length = reader.header()
+            reader.read(length)  # signature
+            tag, length = reader.header()
+            reader.read(length)  # issuer
+            tag, length = reader.header()
+            this_update = _decode_time(tag, reader.read(length))
+
+            while f.tell() < end:
+                tag, length = reader.header()
+                if tag in (_TAG_UTC_TIME, _TAG_GENERALIZED_TIME):
+                    next_update = _decode_time(tag, reader.read(length))
+                elif tag == _TAG_SEQUENCE:
+                    # revokedCertificates, read one entry at a time
+                    list_end = f.tell() + length
+                    while f.tell() < list_end:
+                        _tag, length = reader.header()
+                        entry = reader.read(length)
+                        tag, _start, _stop = _parse_tlv(entry, 0)
+                        if tag != _TAG_INTEGER:
+                            raise ValueError("malformed revoked entry")
+                        revoked += 1
+                elif tag == _TAG_CRL_EXTENSIONS:
+                    crl_number = _parse_crl_number(reader.read(length))
+                else:
+                    raise ValueError(
+                        "unexpected tag 0x{:02x} in CRL".format(tag))
+
+        return cls(this_update, next_update, crl_number, revoked)
+
+
+def _parse_crl_number(data):
+    """:return: the cRLNumber in the content of [0] crlExtensions"""
+    _tag, pos, end = _parse_tlv(data, 0)  # Extensions
+    while pos < end:
+        _tag, ext_pos, ext_end = _parse_tlv(data, pos)
+        pos = ext_end
+        tag, start, stop = _parse_tlv(data, ext_pos)
+        if tag != _TAG_OID or data[start:stop] != _OID_CRL_NUMBER:
+            continue
+        # skip the optional critical flag
+        tag, start, stop = _parse_tlv(data, stop)
+        if tag != _TAG_OCTET_STRING:
+            tag, start, stop = _parse_tlv(data, stop)
+        value = data[start:stop]
+        _tag, start, stop = _parse_tlv(value, 0)
+        return int.from_bytes(value[start:stop], 'big')
+    return None
@@ -6,13 +6,12 @@ from __future__ import print_function, absolute_import
 
 import os
 import logging
-from cryptography.hazmat.backends import default_backend
-from cryptography import x509
 
 from ipalib import api
 from ipalib.errors import NetworkError
 from ipaplatform.paths import paths
 from ipapython.admintool import AdminTool
+from ipaserver.crlsummary import CRLSummary
 from ipaserver.install import cainstance
 from ipaserver.install import installutils
 
@@ -105,14 +104,16 @@ class CRLGenManage(AdminTool):
             try:
                 crl_filename = os.path.join(paths.PKI_CA_PUBLISH_DIR,
                                             'MasterCRL.bin')
-                with open(crl_filename, 'rb') as f:
-                    crl = x509.load_der_x509_crl(f.read(), default_backend())
-                    print("Last CRL update: {}".format(crl.last_update))
-                    for ext in crl.extensions:
-                        if ext.oid == x509.oid.ExtensionOID.CRL_NUMBER:
-                            print("Last CRL Number: {}".format(
-                                ext.value.crl_number))
+                # the CRL can list hundreds of thousands of certificates,
+                # stream it instead of loading it whole
+                crl = CRLSummary.read(crl_filename)
+                print("Last CRL update: {}".format(crl.this_update))
+                if crl.crl_number is not None:
+                    print("Last CRL Number: {}".format(crl.crl_number))
+                print("Revoked certificates in CRL: {}".format(crl.revoked))
             except IOError:
                 logger.error("Unable to find last CRL")
+            except ValueError as e:
+                logger.error("Unable to parse last CRL: %s", e)
         else:
             print("CRL generation: disabled")
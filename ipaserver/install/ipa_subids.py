@@ -10,7 +10,6 @@ from ipalib.facts import is_ipa_configured
 from ipaplatform.paths import paths
 from ipapython.admintool import AdminTool, ScriptError
 from ipapython.dn import DN
-from ipapython.version import API_VERSION
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +50,13 @@ class IPASubids(AdminTool):
             default=False,
             help="Dry run mode.",
         )
+        parser.add_option(
+            "--batch-size",
+            dest="batch_size",
+            type="int",
+            default=100,
+            help="Number of users updated per batch (default: 100).",
+        )
 
     def validate_options(self, needs_root=False):
         super().validate_options(needs_root=True)
@@ -60,6 +66,8 @@ class IPASubids(AdminTool):
             raise ScriptError("--group and --all-users are mutually exclusive")
         if not opt.all_users and not opt.group:
             raise ScriptError("Either --group or --all-users required")
+        if opt.batch_size < 1:
+            raise ScriptError("--batch-size must be a positive number")
 
     def get_group_info(self):
         assert api.isdone("finalize")
@@ -121,38 +129,40 @@ class IPASubids(AdminTool):
             print("Support for subordinate IDs is disabled.")
             return 2
 
-        subid_generate = api.Command.subid_generate
+        subid = api.Object.subid
 
         dry_run = self.safe_options.dry_run
+        batch_size = self.safe_options.batch_size
         group_info = self.get_group_info()
         filters = self.make_filter(
             group_info, self.safe_options.user_filter
         )
 
+        # Users which already have subordinate ids are excluded by the
+        # filter, so an interrupted run continues where it stopped.
         entries = self.search_users(filters)
         total = len(entries)
         logger.info("Found %i user(s) without subordinate ids", total)
 
-        total = len(entries)
-        for i, entry in enumerate(entries, start=1):
-            logger.info(
-                "  Processing user '%s' (%i/%i)",
-                entry.single_value["uid"],
-                i,
-                total
-            )
+        updated = 0
+        for start in range(0, total, batch_size):
+            batch = entries[start:start + batch_size]
+            for entry in batch:
+                logger.debug(
+                    "  Processing user '%s'", entry.single_value["uid"]
+                )
             if not dry_run:
-                # TODO: check for duplicate entry (race condition)
-                # TODO: log new subid
-                subid_generate(
-                    ipaowner=entry.single_value["uid"],
-                    version=API_VERSION
+                updated += subid.add_subid_entries(
+                    self.ldap2, [entry.dn for entry in batch]
                 )
+            logger.info(
+                "  Processed %i/%i user(s)", start + len(batch), total
+            )
 
         if dry_run:
             logger.info("Dry run mode, no user was modified")
         else:
-            logger.info("Updated %s user(s)", total)
+            logger.info("Updated %s user(s)", updated)
 
         return 0
 
@@ -216,20 +216,8 @@ def get_effective_rights(ldap, dn, attrs=None):
     assert isinstance(dn, DN)
     if attrs is None:
         attrs = ['*', 'nsaccountlock', 'cospriority']
-    rights = ldap.get_effective_rights(dn, attrs)
-    rdict = {}
-    if 'attributelevelrights' in rights:
-        rights = rights['attributelevelrights']
-        rights = rights[0].split(', ')
-        for r in rights:
-            (k,v) = r.split(':')
-            if v == 'none':
-                # the string "none" means "no rights found"
-                # see https://fedorahosted.org/freeipa/ticket/4359
-                v = u''
-            rdict[k.strip().lower()] = v
-
-    return rdict
+    _entry_rights, rights = ldap.get_entry_rights(dn, attrs)
+    return dict(rights)
 
 def entry_from_entry(entry, newentry):
     """
@@ -286,6 +274,25 @@ def pkey_to_value(key, options):
         return key
     return pkey_to_unicode(key)
 
+
+def failure_to_dict(key, value, error):
+    """
+    Return the status of a record a bulk command failed to process.
+
+    The record is identified by ``value`` stored under ``key``. Errors
+    which are not a PublicError are reported as an InternalError so that
+    no internal details leak to the client.
+    """
+    if not isinstance(error, errors.PublicError):
+        error = errors.InternalError()
+    return {
+        key: value,
+        'error': error.strerror,
+        'error_code': error.errno,
+        'error_name': unicode(type(error).__name__),
+    }
+
+
 def wait_for_value(ldap, dn, attr, value):
     """
     389-ds postoperation plugins are executed after the data has been
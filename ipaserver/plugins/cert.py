@@ -19,8 +19,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import abc
 import base64
 import collections
+import concurrent.futures
 import datetime
 import itertools
 import logging
@@ -40,12 +42,12 @@ from ipalib.constants import IPA_CA_CN, IPA_CA_RECORD
 from ipalib.crud import Create, PKQuery, Retrieve, Search
 from ipalib.frontend import Method, Object
 from ipalib.parameters import (
-    Bytes, Certificate, CertificateSigningRequest, DateTime, DNParam,
+    Bytes, Certificate, CertificateSigningRequest, DateTime, Dict, DNParam,
     DNSNameParam, Principal
 )
 from ipalib.plugable import Registry
 from .virtual import VirtualCommand
-from .baseldap import pkey_to_value
+from .baseldap import failure_to_dict, pkey_to_value
 from .certprofile import validate_profile_id
 from ipalib.text import _
 from ipalib.request import context
@@ -58,11 +60,6 @@ from ipaserver.masters import (
     ENABLED_SERVICE, CONFIGURED_SERVICE, HIDDEN_SERVICE, is_service_enabled
 )
 
-try:
-    import pyhbac
-except ImportError:
-    raise errors.SkipPluginModule(reason=_('pyhbac is not installed.'))
-
 if six.PY3:
     unicode = str
 
@@ -107,6 +104,9 @@ EXAMPLES:
 """) + _("""
  Revoke a certificate (see RFC 5280 for reason details):
    ipa cert-revoke --revocation-reason=6 1032
+""") + _("""
+ Revoke all valid certificates of two hosts:
+   ipa cert-revoke-batch --revocation-reason=1 --hosts={a,b}.example.com
 """) + _("""
  Remove a certificate from revocation hold status:
    ipa cert-remove-hold 1032
@@ -164,19 +164,189 @@ register = Registry()
 PKIDATE_FORMAT = '%Y-%m-%d'
 
 
-def _acl_make_request(principal_type, principal, ca_id, profile_id):
-    """Construct HBAC request for the given principal, CA and profile"""
+class _CAACLIndex:
+    """
+    Enabled CA ACLs compiled into member sets.
+
+    The rules are keyed by principal type ('user', 'host' or 'service'),
+    profile ID and CA name, with ``None`` standing for the "all" category
+    of profiles or CAs. Each key maps to a tuple ``(all, names, groups)``
+    merging the principals of all the rules for that key, so evaluating a
+    request needs only a few set lookups. Names are compared case
+    insensitively.
+    """
+    def __init__(self, acls):
+        rules = {}
+        for obj in acls:
+            if not obj['ipaenabledflag'][0]:
+                continue
+            if _is_category_all(obj, 'ipacacategory'):
+                cas = [None]
+            else:
+                # For compatibility with pre-lightweight-CAs CA ACLs,
+                # no CA members implies the host authority (only)
+                cas = [ca.lower()
+                       for ca in obj.get('ipamemberca_ca', [IPA_CA_CN])]
+            if _is_category_all(obj, 'ipacertprofilecategory'):
+                profiles = [None]
+            else:
+                profiles = [
+                    p.lower()
+                    for p in obj.get('ipamembercertprofile_certprofile', [])
+                ]
+
+            for principal_type in ('user', 'host', 'service'):
+                members = self._members(principal_type, obj)
+                if members is None:
+                    continue
+                for key in itertools.product(
+                        (principal_type,), profiles, cas):
+                    rule = rules.setdefault(key, [False, set(), set()])
+                    rule[0] = rule[0] or members[0]
+                    rule[1].update(members[1])
+                    rule[2].update(members[2])
+
+        self._rules = {
+            key: (all_, frozenset(names), frozenset(groups))
+            for key, (all_, names, groups) in rules.items()
+        }
 
-    req = pyhbac.HbacRequest()
-    req.targethost.name = ca_id
-    req.service.name = profile_id
-    if principal_type == 'user':
-        req.user.name = principal.username
-    elif principal_type == 'host':
-        req.user.name = principal.hostname
-    elif principal_type == 'service':
-        req.user.name = unicode(principal)
-    groups = []
+    @staticmethod
+    def _members(principal_type, obj):
+        """
+        :return: ``(all, names, groups)`` of the rule for the principal
+            type, or ``None`` if it contains no such principals
+        """
+        if _is_category_all(obj, '{}category'.format(principal_type)):
+            return True, (), ()
+        if principal_type == 'user':
+            names = obj.get('memberuser_user', [])
+            groups = obj.get('memberuser_group', [])
+        elif principal_type == 'host':
+            names = obj.get('memberhost_host', [])
+            groups = obj.get('memberhost_hostgroup', [])
+        else:
+            names = [unicode(p) for p in obj.get('memberservice_service', [])]
+            groups = []
+        if not names and not groups:
+            return None
+        return (False,
+                [n.lower() for n in names], [g.lower() for g in groups])
+
+    def evaluate(self, principal_type, name, get_groups, ca_id, profile_id):
+        """
+        :param get_groups: callable returning the groups of the principal,
+            only called when a matching rule has group members
+        """
+        groups = set()
+        name = name.lower()
+        for key in itertools.product(
+                (principal_type,), (profile_id.lower(), None),
+                (ca_id.lower(), None)):
+            rule = self._rules.get(key)
+            if rule is None:
+                continue
+            if rule[0] or name in rule[1]:
+                return True
+            groups.update(rule[2])
+        if groups:
+            return any(g.lower() in groups for g in get_groups())
+        return False
+
+
+def _is_category_all(obj, attr):
+    return attr in obj and obj[attr][0].lower() == 'all'
+
+
+# Attributes of the CA ACL entries read to compile them
+_CAACL_ATTRS = (
+    'ipaenabledflag', 'ipacacategory', 'ipacertprofilecategory',
+    'usercategory', 'hostcategory', 'servicecategory',
+    'ipamemberca', 'ipamembercertprofile',
+    'memberuser', 'memberhost', 'memberservice',
+)
+
+# Maximum number of compiled CA ACLs kept by this process
+_CAACL_INDEX_CACHE_SIZE = 8
+
+# _CAACLIndex of the CA ACLs keyed by the raw attributes they were
+# compiled from
+_caacl_indexes = {}
+
+
+def _caacl_from_entry(entry):
+    """
+    Convert a CA ACL entry to the member names of a ``caacl_find``
+    result.
+    """
+    obj = {attr: entry[attr] for attr in (
+        'ipacacategory', 'ipacertprofilecategory',
+        'usercategory', 'hostcategory', 'servicecategory',
+    ) if attr in entry}
+    obj['ipaenabledflag'] = entry.get('ipaenabledflag', [False])
+
+    groups_dn = DN(api.env.container_group, api.env.basedn)
+    hostgroups_dn = DN(api.env.container_hostgroup, api.env.basedn)
+    for attr, member_attr in (
+            ('ipamemberca', 'ipamemberca_ca'),
+            ('ipamembercertprofile', 'ipamembercertprofile_certprofile'),
+            ('memberservice', 'memberservice_service')):
+        for dn in entry.get(attr, []):
+            obj.setdefault(member_attr, []).append(dn[0].value)
+    for dn in entry.get('memberuser', []):
+        if dn.endswith(groups_dn):
+            member_attr = 'memberuser_group'
+        else:
+            member_attr = 'memberuser_user'
+        obj.setdefault(member_attr, []).append(dn[0].value)
+    for dn in entry.get('memberhost', []):
+        if dn.endswith(hostgroups_dn):
+            member_attr = 'memberhost_hostgroup'
+        else:
+            member_attr = 'memberhost_host'
+        obj.setdefault(member_attr, []).append(dn[0].value)
+    return obj
+
+
+def get_caacl_index():
+    """
+    Return the compiled CA ACLs.
+
+    The CA ACL entries are read with a single search of their container.
+    Compiling them is skipped when the same attributes were compiled
+    before; as the key is what the search returned, a principal whose
+    view of the CA ACLs is restricted by ACIs never gets an index
+    compiled from the view of another one.
+    """
+    ldap = api.Backend.ldap2
+    try:
+        entries, _truncated = ldap.find_entries(
+            base_dn=DN(api.env.container_caacl, api.env.basedn),
+            scope=ldap.SCOPE_ONELEVEL,
+            filter='(objectclass=ipacaacl)',
+            attrs_list=list(_CAACL_ATTRS),
+            time_limit=0,
+            size_limit=0,
+        )
+    except errors.NotFound:
+        entries = []
+
+    key = frozenset(
+        (entry.dn, frozenset(
+            (attr.lower(), frozenset(values))
+            for attr, values in entry.raw.items()))
+        for entry in entries
+    )
+    index = _caacl_indexes.get(key)
+    if index is None:
+        index = _CAACLIndex([_caacl_from_entry(e) for e in entries])
+        if len(_caacl_indexes) >= _CAACL_INDEX_CACHE_SIZE:
+            _caacl_indexes.clear()
+        _caacl_indexes[key] = index
+    return index
+
+
+def _principal_groups(principal_type, principal):
     if principal_type == 'user':
         user_obj = api.Command.user_show(
             str(principal.username))['result']
@@ -187,67 +357,27 @@ def _acl_make_request(principal_type, principal, ca_id, profile_id):
             str(principal.hostname))['result']
         groups = host_obj.get('memberof_hostgroup', [])
         groups += host_obj.get('memberofindirect_hostgroup', [])
-    req.user.groups = sorted(set(groups))
-    return req
-
-
-def _acl_make_rule(principal_type, obj):
-    """Turn CA ACL object into HBAC rule.
-
-    ``principal_type``
-        String in {'user', 'host', 'service'}
-    """
-    rule = pyhbac.HbacRule(obj['cn'][0])
-    rule.enabled = obj['ipaenabledflag'][0]
-    rule.srchosts.category = {pyhbac.HBAC_CATEGORY_ALL}
-
-    # add CA(s)
-    if 'ipacacategory' in obj and obj['ipacacategory'][0].lower() == 'all':
-        rule.targethosts.category = {pyhbac.HBAC_CATEGORY_ALL}
-    else:
-        # For compatibility with pre-lightweight-CAs CA ACLs,
-        # no CA members implies the host authority (only)
-        rule.targethosts.names = obj.get('ipamemberca_ca', [IPA_CA_CN])
-
-    # add profiles
-    if ('ipacertprofilecategory' in obj
-            and obj['ipacertprofilecategory'][0].lower() == 'all'):
-        rule.services.category = {pyhbac.HBAC_CATEGORY_ALL}
     else:
-        attr = 'ipamembercertprofile_certprofile'
-        rule.services.names = obj.get(attr, [])
+        groups = []
+    return groups
 
-    # add principals and principal's groups
-    category_attr = '{}category'.format(principal_type)
-    if category_attr in obj and obj[category_attr][0].lower() == 'all':
-        rule.users.category = {pyhbac.HBAC_CATEGORY_ALL}
-    else:
-        if principal_type == 'user':
-            rule.users.names = obj.get('memberuser_user', [])
-            rule.users.groups = obj.get('memberuser_group', [])
-        elif principal_type == 'host':
-            rule.users.names = obj.get('memberhost_host', [])
-            rule.users.groups = obj.get('memberhost_hostgroup', [])
-        elif principal_type == 'service':
-            rule.users.names = [
-                unicode(principal)
-                for principal in obj.get('memberservice_service', [])
-            ]
 
-    return rule
-
-
-def acl_evaluate(principal, ca_id, profile_id):
+def acl_evaluate(principal, ca_id, profile_id, index=None):
     if principal.is_user:
         principal_type = 'user'
+        name = principal.username
     elif principal.is_host:
         principal_type = 'host'
+        name = principal.hostname
     else:
         principal_type = 'service'
-    req = _acl_make_request(principal_type, principal, ca_id, profile_id)
-    acls = api.Command.caacl_find(no_members=False)['result']
-    rules = [_acl_make_rule(principal_type, obj) for obj in acls]
-    return req.evaluate(rules) == pyhbac.HBAC_EVAL_ALLOW
+        name = unicode(principal)
+    if index is None:
+        index = get_caacl_index()
+    return index.evaluate(
+        principal_type, name,
+        lambda: _principal_groups(principal_type, principal),
+        ca_id, profile_id)
 
 
 def normalize_pkidate(value):
@@ -283,8 +413,8 @@ def ca_enabled_check(_api):
         raise errors.NotFound(reason=_('CA is not configured'))
 
 
-def caacl_check(principal, ca, profile_id):
-    if not acl_evaluate(principal, ca, profile_id):
+def caacl_check(principal, ca, profile_id, index=None):
+    if not acl_evaluate(principal, ca, profile_id, index):
         raise errors.ACIError(info=_(
                 "Principal '%(principal)s' "
                 "is not permitted to use CA '%(ca)s' "
@@ -653,7 +783,9 @@ class cert_request(Create, BaseCertMethod, VirtualCommand):
         # referencing nonexistant CA) and look up authority ID.
         #
         ca = kw['cacn']
-        ca_obj = api.Command.ca_show(ca, all=all, chain=chain)['result']
+        ca_obj = self._batch_cached(
+            ('ca_show', ca, all, chain),
+            lambda: api.Command.ca_show(ca, all=all, chain=chain)['result'])
         ca_id = ca_obj['ipacaid'][0]
 
         """
@@ -708,10 +840,12 @@ class cert_request(Create, BaseCertMethod, VirtualCommand):
         if (bind_principal_string != principal_string and
                 bind_principal_type != HOST):
             # Can the bound principal request certs for another principal?
-            self.check_access()
+            self._batch_cached(('check_access', None), self.check_access)
 
         try:
-            self.check_access("request certificate ignore caacl")
+            self._batch_cached(
+                ('check_access', "request certificate ignore caacl"),
+                lambda: self.check_access("request certificate ignore caacl"))
             bypass_caacl = True
         except errors.ACIError:
             bypass_caacl = False
@@ -720,7 +854,7 @@ class cert_request(Create, BaseCertMethod, VirtualCommand):
             if principal_type == KRBTGT:
                 ca_kdc_check(self.api, bind_principal.hostname)
             else:
-                caacl_check(principal, ca, profile_id)
+                self._caacl_check(principal, ca, profile_id)
 
         try:
             ext_san = csr.extensions.get_extension_for_oid(
@@ -884,7 +1018,7 @@ class cert_request(Create, BaseCertMethod, VirtualCommand):
                     if principal_type == KRBTGT:
                         ca_kdc_check(self.api, alt_principal.hostname)
                     else:
-                        caacl_check(alt_principal, ca, profile_id)
+                        self._caacl_check(alt_principal, ca, profile_id)
 
             elif isinstance(gn, (x509.KRB5PrincipalName, x509.UPN)):
                 if principal_type == KRBTGT:
@@ -933,7 +1067,8 @@ class cert_request(Create, BaseCertMethod, VirtualCommand):
                     % type(gn).__name__)
 
         if san_ipaddrs:
-            _validate_san_ips(san_ipaddrs, san_dnsnames)
+            _validate_san_ips(san_ipaddrs, san_dnsnames,
+                              self._batch_cached('san_lookups', _SANLookups))
 
         # Request the certificate
         try:
@@ -966,7 +1101,9 @@ class cert_request(Create, BaseCertMethod, VirtualCommand):
 
         # Success? Then add it to the principal's entry
         # (unless the profile tells us not to)
-        profile = api.Command['certprofile_show'](profile_id)
+        profile = self._batch_cached(
+            ('certprofile_show', profile_id),
+            lambda: api.Command['certprofile_show'](profile_id))
         store = profile['result']['ipacertprofilestoreissued'][0]
         if store and 'certificate' in result:
             cert = result.get('certificate')
@@ -995,6 +1132,42 @@ class cert_request(Create, BaseCertMethod, VirtualCommand):
             value=pkey_to_value(result['request_id'], kw),
         )
 
+    def _batch_cached(self, key, func):
+        """
+        Call ``func``, or reuse its result (or ACIError) within a
+        ``cert_request_batch`` call.
+
+        Outside of a batch nothing is cached.
+        """
+        cache = getattr(context, 'cert_request_batch', None)
+        if cache is None:
+            return func()
+
+        try:
+            result, error = cache[key]
+        except KeyError:
+            try:
+                result, error = func(), None
+            except errors.ACIError as e:
+                result, error = None, e
+            cache[key] = (result, error)
+
+        if error is not None:
+            raise error
+        return result
+
+    def _caacl_check(self, principal, ca, profile_id):
+        """
+        Run ``caacl_check``.
+
+        Within a ``cert_request_batch`` call the CA ACLs are compiled once
+        and the outcome is reused for the same principal, CA and profile.
+        """
+        index = self._batch_cached('caacl_index', get_caacl_index)
+        self._batch_cached(
+            ('caacl_check', unicode(principal), ca, profile_id),
+            lambda: caacl_check(principal, ca, profile_id, index))
+
     def lookup_principal(self, principal):
         """
         Look up a principal's account.  Only works for users, hosts, services.
@@ -1041,6 +1214,73 @@ class cert_request(Create, BaseCertMethod, VirtualCommand):
                     reason=_("The principal for this request doesn't exist."))
 
 
+@register()
+class cert_request_batch(Command):
+    __doc__ = _('Submit multiple certificate signing requests.')
+
+    NO_CLI = True
+
+    takes_args = (
+        Dict(
+            'requests+',
+            doc=_('Requests, each a dictionary of cert-request options '
+                  'including the PEM encoded CSR as "csr"'),
+        ),
+    )
+
+    has_output = (
+        output.Output('count', int, doc=_('Number of requests processed')),
+        output.Output('failed', int, doc=_('Number of requests that failed')),
+        output.Output('results', (list, tuple),
+                      doc=_('Per-request status, in input order')),
+    )
+
+    def execute(self, requests, **options):
+        """
+        Run ``cert_request`` for each request.
+
+        The CA and profile lookups, access checks and DNS lookups for SAN
+        validation are done once for the whole batch. The CA ACLs are
+        compiled once and evaluated once per principal, CA and profile.
+        Certificates are submitted over the same CA connection.
+        """
+        op_account = getattr(context, 'principal', '[autobind]')
+        cmd = self.api.Command.cert_request
+
+        results = []
+        setattr(context, 'cert_request_batch', {})
+        try:
+            for request in requests:
+                kw = dict((str(k), v) for k, v in request.items())
+                kw.pop('version', None)
+                kw.pop('all', None)
+                kw.pop('chain', None)
+                csr = kw.pop('csr', None)
+                principal = kw.get('principal')
+                try:
+                    if not csr:
+                        raise errors.RequirementError(name='csr')
+                    result = cmd(csr, version=options['version'],
+                                 **kw)['result']
+                except Exception as e:
+                    logger.info('%s: cert_request_batch(%s): %s',
+                                op_account, principal, e.__class__.__name__)
+                    results.append(failure_to_dict('principal', principal, e))
+                else:
+                    results.append(dict(
+                        principal=principal,
+                        error=None,
+                        request_id=result.get('request_id'),
+                        serial_number=result.get('serial_number'),
+                        certificate=result.get('certificate'),
+                    ))
+        finally:
+            delattr(context, 'cert_request_batch')
+
+        failed = sum(1 for r in results if r['error'] is not None)
+        return dict(count=len(results), failed=failed, results=results)
+
+
 def _emails_are_valid(csr_emails, principal_emails):
     """
     Checks if any email address from certificate request does not
@@ -1118,7 +1358,78 @@ def _principal_name_matches_principal(name, principal_obj):
     return principal in principal_obj.get('krbprincipalname', [])
 
 
-def _validate_san_ips(san_ipaddrs, san_dnsnames):
+class _SANLookups:
+    """
+    Cache of the DNS lookups done to validate SAN IP addresses.
+
+    Finding the zone of a name takes DNS round trips, so the zones of all
+    names known up front are looked up concurrently.  Records are then
+    read from the IPA DNS tree in the calling thread, as the LDAP
+    connection is not shared with worker threads.
+
+    An instance is meant to live for a single request only.
+    """
+    max_workers = 8
+
+    def __init__(self):
+        self._zones = {}
+        self._records = {}
+
+    @staticmethod
+    def _find_zone(fqdn):
+        try:
+            return dnsutil.DNSName(dnsutil.zone_for_name(fqdn))
+        except resolver.NoNameservers:
+            return None  # if there's no zone, there are no records
+
+    def prefetch_zones(self, fqdns):
+        """Look up the zones of ``fqdns`` concurrently"""
+        pending = list(set(fqdns) - set(self._zones))
+        if len(pending) < 2:
+            return
+        workers = min(len(pending), self.max_workers)
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            zones = executor.map(self._find_zone, pending)
+            self._zones.update(zip(pending, zones))
+
+    def zone_for_name(self, fqdn):
+        """
+        :return: the zone of absolute ``fqdn``, ``None`` if there is none
+        """
+        try:
+            return self._zones[fqdn]
+        except KeyError:
+            zone = self._zones[fqdn] = self._find_zone(fqdn)
+            return zone
+
+    def dnsrecord(self, fqdn):
+        """
+        :return: the ``dnsrecord_show`` result for absolute ``fqdn`` and its
+            zone, or ``(None, None)`` if it does not exist
+        """
+        try:
+            return self._records[fqdn]
+        except KeyError:
+            pass
+
+        zone = self.zone_for_name(fqdn)
+        if zone is None:
+            result = None
+        else:
+            try:
+                result = api.Command['dnsrecord_show'](
+                    zone, fqdn.relativize(zone))['result']
+            except errors.NotFound as nf:
+                logger.debug("Skipping records of %s: %s", fqdn, nf)
+                result = None
+        if result is None:
+            zone = None
+
+        self._records[fqdn] = (result, zone)
+        return result, zone
+
+
+def _validate_san_ips(san_ipaddrs, san_dnsnames, lookups=None):
     """
     Check the IP addresses in a CSR subjectAltName.
 
@@ -1136,17 +1447,27 @@ def _validate_san_ips(san_ipaddrs, san_dnsnames):
 
     :param san_ipaddrs: The IP addresses in the subjectAltName
     :param san_dnsnames: The DNS names in the subjectAltName
+    :param lookups: ``_SANLookups`` to reuse, a new one is used if ``None``
 
     :raises: errors.ValidationError if the SAN containes a non-matching IP
         address.
 
     """
+    if lookups is None:
+        lookups = _SANLookups()
+
     san_ip_set = frozenset(unicode(ip) for ip in san_ipaddrs)
 
+    lookups.prefetch_zones(itertools.chain(
+        (dnsutil.DNSName(name).make_absolute() for name in san_dnsnames),
+        (dnsutil.DNSName(reversename.from_address(ip)) for ip in san_ip_set),
+    ))
+
     # Build a dict of IPs that are reachable from the SAN dNSNames
     reachable = {}
     for name in san_dnsnames:
-        _san_ip_update_reachable(reachable, name, cname_depth=1)
+        _san_ip_update_reachable(reachable, name, cname_depth=1,
+                                 lookups=lookups)
 
     # Each iPAddressName must be reachable from a dNSName
     unreachable_ips = san_ip_set - six.viewkeys(reachable)
@@ -1161,7 +1482,7 @@ def _validate_san_ips(san_ipaddrs, san_dnsnames):
     # Collect PTR records for each IP address
     ptrs_by_ip = {}
     for ip in san_ipaddrs:
-        ptrs = _ip_ptr_records(unicode(ip))
+        ptrs = _ip_ptr_records(unicode(ip), lookups=lookups)
         if len(ptrs) > 0:
             ptrs_by_ip[unicode(ip)] = set(s.rstrip('.') for s in ptrs)
 
@@ -1188,7 +1509,7 @@ def _validate_san_ips(san_ipaddrs, san_dnsnames):
             )
 
 
-def _san_ip_update_reachable(reachable, dnsname, cname_depth):
+def _san_ip_update_reachable(reachable, dnsname, cname_depth, lookups):
     """
     Update dict of reachable IPs and the names that reach them.
 
@@ -1196,19 +1517,12 @@ def _san_ip_update_reachable(reachable, dnsname, cname_depth):
                       values are sets of DNS names.
     :param dnsname: the DNS name to resolve
     :param cname_depth: How many levels of CNAME indirection are permitted.
+    :param lookups: ``_SANLookups`` used to resolve names
 
     """
     fqdn = dnsutil.DNSName(dnsname).make_absolute()
-    try:
-        zone = dnsutil.DNSName(dnsutil.zone_for_name(fqdn))
-    except resolver.NoNameservers:
-        return  # if there's no zone, there are no records
-    name = fqdn.relativize(zone)
-
-    try:
-        result = api.Command['dnsrecord_show'](zone, name)['result']
-    except errors.NotFound as nf:
-        logger.debug("Skipping IPs for %s: %s", dnsname, nf)
+    result, zone = lookups.dnsrecord(fqdn)
+    if result is None:
         return  # nothing to do
 
     for ip in itertools.chain(result.get('arecord', ()),
@@ -1222,10 +1536,11 @@ def _san_ip_update_reachable(reachable, dnsname, cname_depth):
         for cname in result.get('cnamerecord', []):
             if not cname.endswith('.'):
                 cname = u'%s.%s' % (cname, zone)
-            _san_ip_update_reachable(reachable, cname, cname_depth - 1)
+            _san_ip_update_reachable(reachable, cname, cname_depth - 1,
+                                     lookups)
 
 
-def _ip_ptr_records(ip):
+def _ip_ptr_records(ip, lookups):
     """
     Look up PTR record(s) for IP address.
 
@@ -1233,17 +1548,10 @@ def _ip_ptr_records(ip):
 
     """
     rname = dnsutil.DNSName(reversename.from_address(ip))
-    try:
-        zone = dnsutil.DNSName(dnsutil.zone_for_name(rname))
-        name = rname.relativize(zone)
-        result = api.Command['dnsrecord_show'](zone, name)['result']
-    except resolver.NoNameservers:
-        ptrs = set()  # if there's no zone, there are no records
-    except errors.NotFound:
-        ptrs = set()
-    else:
-        ptrs = set(result.get('ptrrecord', []))
-    return ptrs
+    result, _zone = lookups.dnsrecord(rname)
+    if result is None:
+        return set()
+    return set(result.get('ptrrecord', []))
 
 
 @register()
@@ -1500,6 +1808,182 @@ class cert_remove_hold(PKQuery, CertMethod, VirtualCommand):
         )
 
 
+class CertBatchMethod(BaseCertMethod, VirtualCommand,
+                      metaclass=abc.ABCMeta):
+    """
+    Base class for commands applying a CA operation to many certificates.
+
+    Certificates are given by serial number, or selected by owner with
+    ``cert_find``. A failure only affects its own certificate; the outcome
+    of each certificate is reported in ``results``.
+    """
+    takes_args = (
+        SerialNumber(
+            'serial_number*',
+            label=_('Serial number'),
+            doc=_('Serial number in decimal or if prefixed with 0x in '
+                  'hexadecimal'),
+            normalizer=normalize_serial_number,
+        ),
+    )
+
+    has_output = (
+        output.Output('count', int,
+                      doc=_('Number of certificates processed')),
+        output.Output('failed', int,
+                      doc=_('Number of certificates that failed')),
+        output.Output('results', (list, tuple),
+                      doc=_('Per-certificate status')),
+    )
+
+    # cert_find criteria of the certificates the operation applies to
+    find_criteria = {}
+
+    # whether a host may operate on the certificates of its own services
+    # without being granted the operation by an ACI
+    owner_can_manage = False
+
+    def get_options(self):
+        for owner, search_key in self.obj._owners():
+            yield search_key.clone_rename(
+                owner.name,
+                required=False,
+                multivalue=True,
+                primary_key=False,
+                query=True,
+                cli_name='{0}s'.format(owner.name),
+                doc=(_("Select the certificates of these %s.") %
+                     owner.object_name_plural),
+                label=owner.object_name,
+            )
+
+        yield from super(CertBatchMethod, self).get_options()
+
+    def _get_serial_numbers(self, serial_number, cacn, **options):
+        serial_numbers = list(serial_number or ())
+
+        owners = {}
+        for owner, _search_key in self.obj._owners():
+            if options.get(owner.name):
+                owners[owner.name] = options[owner.name]
+        if owners:
+            owners.update(self.find_criteria)
+            found = self.api.Command.cert_find(
+                cacn=cacn, pkey_only=True, sizelimit=0, **owners)['result']
+            serial_numbers.extend(
+                unicode(obj['serial_number']) for obj in found)
+        elif not serial_numbers:
+            raise errors.RequirementError(name='serial_number')
+
+        # drop duplicates, keeping the order
+        seen = set()
+        result = []
+        for value in serial_numbers:
+            value = normalize_serial_number(value)
+            if value not in seen:
+                seen.add(value)
+                result.append(value)
+        return result
+
+    @abc.abstractmethod
+    def _operate(self, serial_number, **options):
+        """Apply the operation to a single certificate"""
+
+    def execute(self, serial_number=None, **options):
+        ca_enabled_check(self.api)
+
+        serial_numbers = self._get_serial_numbers(serial_number, **options)
+
+        ca_sdn = DN(self.api.Command.ca_show(
+            options['cacn'])['result']['ipacasubjectdn'][0])
+        ra = self.Backend.ra
+
+        try:
+            self.check_access()
+        except errors.ACIError as e:
+            if not self.owner_can_manage:
+                raise
+            logger.debug("Not granted by ACI to %s, looking at principal",
+                         self.operation)
+            acierr = e
+        else:
+            acierr = None
+
+        results = []
+        for value in serial_numbers:
+            try:
+                # Dogtag lightweight CAs have shared serial number domain,
+                # so check that the certificate was issued by the named ca.
+                # Will raise NotFound if it does not exist at all.
+                cert = x509.load_der_x509_certificate(base64.b64decode(
+                    ra.get_certificate(value)['certificate']))
+                if DN(cert.issuer) != ca_sdn:
+                    raise errors.NotFound(
+                        reason=_("Certificate with serial number %(serial)s "
+                                 "issued by CA '%(ca)s' not found")
+                        % dict(serial=value, ca=options['cacn']))
+                if acierr is not None:
+                    try:
+                        if not bind_principal_can_manage_cert(cert):
+                            raise acierr
+                    except errors.NotImplementedError:
+                        raise acierr
+                self._operate(value, **options)
+            except Exception as e:
+                logger.info('%s: %s', self.name, e.__class__.__name__)
+                results.append(failure_to_dict('serial_number', value, e))
+            else:
+                results.append(dict(serial_number=value, error=None))
+
+        failed = sum(1 for r in results if r['error'] is not None)
+        return dict(count=len(results), failed=failed, results=results)
+
+
+@register()
+class cert_revoke_batch(CertBatchMethod):
+    __doc__ = _('Revoke many certificates.')
+
+    operation = "revoke certificate"
+
+    find_criteria = {'status': u'VALID'}
+
+    owner_can_manage = True
+
+    def get_options(self):
+        yield self.obj.params['revocation_reason'].clone(
+            default=0,
+            autofill=True,
+        )
+
+        yield from super(cert_revoke_batch, self).get_options()
+
+    def execute(self, serial_number=None, **options):
+        if options['revocation_reason'] == 7:
+            raise errors.CertificateOperationError(
+                error=_('7 is not a valid revocation reason'))
+        return super(cert_revoke_batch, self).execute(
+            serial_number, **options)
+
+    def _operate(self, serial_number, revocation_reason, **options):
+        self.Backend.ra.revoke_certificate(
+            serial_number, revocation_reason=revocation_reason)
+
+
+@register()
+class cert_remove_hold_batch(CertBatchMethod):
+    __doc__ = _('Take many revoked certificates off hold.')
+
+    operation = "certificate remove hold"
+
+    find_criteria = {'status': u'REVOKED', 'revocation_reason': 6}
+
+    def _operate(self, serial_number, **options):
+        result = self.Backend.ra.take_certificate_off_hold(serial_number)
+        if 'error_string' in result:
+            raise errors.CertificateOperationError(
+                error=result['error_string'])
+
+
 @register()
 class cert_find(Search, CertMethod):
     __doc__ = _('Search for existing certificates.')
@@ -1745,6 +2229,55 @@ class cert_find(Search, CertMethod):
 
         return result, False, complete
 
+    def _ldap_cert_matches(self, cert, exactly=False, **options):
+        """
+        Evaluate the CA search criteria against a certificate stored in
+        LDAP, for deployments without a CA to run the search.
+
+        Criteria which need data only known to the CA (revocation status
+        and reason, issuance and revocation dates) are ignored.
+        """
+        if 'issuer' in options:
+            if DN(cert.issuer) != DN(options['issuer']):
+                return False
+
+        if 'min_serial_number' in options:
+            if cert.serial_number < options['min_serial_number']:
+                return False
+        if 'max_serial_number' in options:
+            if cert.serial_number > options['max_serial_number']:
+                return False
+
+        for name, value in (
+                ('validnotbefore', cert.not_valid_before_utc),
+                ('validnotafter', cert.not_valid_after_utc)):
+            for suffix in ('_from', '_to'):
+                try:
+                    bound = options[name + suffix]
+                except KeyError:
+                    continue
+                if bound.tzinfo is None:
+                    bound = bound.replace(tzinfo=datetime.timezone.utc)
+                if suffix == '_from' and value < bound:
+                    return False
+                if suffix == '_to' and value > bound:
+                    return False
+
+        if 'subject' in options:
+            subject = options['subject'].lower()
+            cns = [
+                attr.value.lower() for attr in
+                cert.subject.get_attributes_for_oid(
+                    cryptography.x509.oid.NameOID.COMMON_NAME)
+            ]
+            if exactly:
+                if subject not in cns:
+                    return False
+            elif not any(subject in cn for cn in cns):
+                return False
+
+        return True
+
     def _ldap_search(self, all, pkey_only, no_members, **options):
         ldap = self.api.Backend.ldap2
 
@@ -1805,7 +2338,10 @@ class cert_find(Search, CertMethod):
         for entry in entries:
             for attr in ('usercertificate', 'usercertificate;binary'):
                 for der in entry.raw.get(attr, []):
-                    cert = cryptography.x509.load_der_x509_certificate(der)
+                    cert = x509.load_der_x509_certificate(der)
+                    if not ca_enabled and not self._ldap_cert_matches(
+                            cert, **options):
+                        continue
                     cert_key = self._get_cert_key(cert)
                     try:
                         obj = result[cert_key]
@@ -1917,9 +2453,19 @@ class cert_find(Search, CertMethod):
                             # retrieve.
                             ca_obj = []
 
-                    obj.update(
-                        ra.get_certificate(serial_number)
-                    )
+                    # The certificate body is usually known already from
+                    # _cert_search() or _ldap_search(); only go to the CA
+                    # when it is not, or for the revocation reason.
+                    if ('certificate' not in obj
+                            or obj.get('status') in (u'REVOKED',
+                                                     u'REVOKED_EXPIRED')):
+                        obj.update(
+                            ra.get_certificate(serial_number)
+                        )
+                    else:
+                        # same representation get_certificate() returns
+                        obj['serial_number'] = unicode(serial_number)
+                        obj['serial_number_hex'] = u'0x%X' % serial_number
                     if not raw:
                         obj['certificate'] = (
                             obj['certificate'].replace('\r\n', ''))
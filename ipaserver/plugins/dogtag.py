@@ -259,10 +259,11 @@ import contextlib
 import six
 
 from ipalib import Backend, api, x509
+from ipalib.request import context
 from ipapython.dn import DN
 import ipapython.cookie
 from ipapython import dogtag, ipautil
-from ipaserver.masters import find_providing_server
+from ipaserver.masters import find_providing_server, find_providing_servers
 
 import pki
 from pki.client import PKIConnection
@@ -589,14 +590,7 @@ class RestClient(Backend):
         object.__setattr__(self, '_ca_host', ca_host)
         return ca_host
 
-    def __enter__(self):
-        """Log into the REST API"""
-        if self.cookie is not None:
-            return None
-
-        # Refresh the ca_host property
-        object.__setattr__(self, '_ca_host', None)
-
+    def _login(self):
         status, resp_headers, _resp_body = dogtag.https_request(
             self.ca_host, self.override_port or self.env.ca_agent_port,
             url='/ca/rest/account/login',
@@ -609,6 +603,39 @@ class RestClient(Backend):
         if status != 200 or len(cookies) == 0:
             raise errors.RemoteRetrieveError(reason=_('Failed to authenticate to CA REST API'))
         object.__setattr__(self, 'cookie', str(cookies[0]))
+
+    def __enter__(self):
+        """Log into the REST API"""
+        if self.cookie is not None:
+            return None
+
+        # Refresh the ca_host property
+        object.__setattr__(self, '_ca_host', None)
+
+        try:
+            self._login()
+        except errors.NetworkError as e:
+            # Fail over to the other servers providing the CA service
+            failed = self.ca_host
+            candidates = [
+                host for host in find_providing_servers(
+                    'CA', conn=self.api.Backend.ldap2, api=self.api)
+                if host != failed
+            ]
+            if not candidates:
+                raise
+            logger.warning("CA %s is unreachable (%s), trying %s",
+                           failed, e, ', '.join(candidates))
+            for host in candidates:
+                object.__setattr__(self, '_ca_host', host)
+                try:
+                    self._login()
+                except errors.NetworkError as err:
+                    logger.warning("CA %s is unreachable (%s)", host, err)
+                else:
+                    break
+            else:
+                raise
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
@@ -1067,7 +1094,14 @@ class ra(rabase.rabase, RestClient):
             GET /pki/rest/info HTTP/1.1
 
         The response is: {"Version":"11.5.0","Attributes":{"Attribute":[]}}
+
+        The version is cached for the rest of the request, so that
+        operations on many certificates ask for it only once.
         """
+        cached = getattr(context, 'pki_version', None)
+        if cached is not None and cached[0] == self.ca_host:
+            return cached[1]
+
         path = "/pki/rest/info"
         logger.debug('%s.get_pki_version()', type(self).__name__)
         http_status, _http_headers, http_body = self._ssldo(
@@ -1090,7 +1124,9 @@ class ra(rabase.rabase, RestClient):
                 reason=_("Response from CA was not valid JSON")
             )
 
-        return response.get('Version')
+        version = response.get('Version')
+        setattr(context, 'pki_version', (self.ca_host, version))
+        return version
 
 
     def revoke_certificate(self, serial_number, revocation_reason=0):
@@ -762,6 +762,10 @@ class group_detach(LDAPQuery):
             user_attrs = ldap.get_entry(user_dn)
         except errors.NotFound:
             raise self.obj.handle_not_found(*keys)
+        # evaluate all rights checked below with one search per entry
+        ldap.get_rights([user_dn], ["objectclass", "mepManagedEntry"])
+        ldap.get_rights([group_dn], ["objectclass", "mepManagedBy"])
+
         is_managed = self.obj.has_objectclass(
             user_attrs['objectclass'], 'mepmanagedentry'
         )
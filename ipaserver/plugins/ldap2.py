@@ -220,6 +220,7 @@ class ldap2(CrudBackend, LDAPCache):
         object.__delattr__(self, 'time_limit')
         object.__delattr__(self, 'size_limit')
         self.clear_cache()
+        self._drop_cached_rights()
 
     def get_ipa_config(self, attrs_list=None):
         """Returns the IPA configuration entry (dn, entry_attrs)."""
@@ -292,36 +293,121 @@ class ldap2(CrudBackend, LDAPCache):
         assert isinstance(dn, DN)
         return self.get_entry(dn, attrs_list, get_effective_rights=True)
 
+    @staticmethod
+    def _parse_effective_rights(entry):
+        """Split a GetEffectiveRights result into entry and attribute rights"""
+        entry_rights = u''
+        if 'entrylevelrights' in entry:
+            entry_rights = entry.single_value['entrylevelrights']
+        attr_rights = {}
+        for value in entry.get('attributelevelrights', []):
+            for r in value.split(', '):
+                (k, v) = r.split(':')
+                if v == 'none':
+                    # the string "none" means "no rights found"
+                    # see https://fedorahosted.org/freeipa/ticket/4359
+                    v = u''
+                attr_rights[k.strip().lower()] = v
+        return entry_rights, attr_rights
+
+    def _drop_cached_rights(self):
+        """Forget effective rights cached for the current request"""
+        if hasattr(context, 'effective_rights'):
+            del context.effective_rights
+
+    def get_rights(self, dns, attrs_list):
+        """Returns effective rights of the currently bound user for many DNs.
+
+        The result maps each DN to a tuple (entry_rights, attr_rights) where
+        ``entry_rights`` is the entryLevelRights string and ``attr_rights``
+        maps lower-case attribute names to their rights. Rights are cached
+        for the rest of the request; entries sharing a parent are evaluated
+        with a single search. DNs which do not exist are left out.
+        """
+        try:
+            conn, cache = getattr(context, 'effective_rights')
+            if conn is not self.conn:
+                raise AttributeError()
+        except AttributeError:
+            # Not in our context yet or cached for another connection
+            cache = {}
+            setattr(context, 'effective_rights', (self.conn, cache))
+
+        wanted = set(attr.lower() for attr in attrs_list)
+        result = {}
+        missing = {}
+        for dn in dns:
+            assert isinstance(dn, DN)
+            cached = cache.get(dn)
+            if cached is not None:
+                requested, entry_rights, attr_rights = cached
+                if wanted.issubset(requested.union(attr_rights)):
+                    result[dn] = (entry_rights, attr_rights)
+                    continue
+                wanted_dn = wanted.union(requested)
+            else:
+                wanted_dn = wanted
+            missing.setdefault(dn[1:], {})[dn] = wanted_dn
+
+        for parent_dn, children in missing.items():
+            attrs = set().union(*children.values())
+            if len(children) == 1:
+                dn = list(children)[0]
+                try:
+                    entries = [self.get_effective_rights(dn, list(attrs))]
+                except errors.NotFound:
+                    continue
+            else:
+                filter = self.combine_filters(
+                    [self.make_filter({ava.attr: ava.value for ava in dn[0]},
+                                      rules=self.MATCH_ALL)
+                     for dn in children],
+                    rules=self.MATCH_ANY)
+                try:
+                    entries = self.get_entries(
+                        parent_dn, self.SCOPE_ONELEVEL, filter, list(attrs),
+                        get_effective_rights=True)
+                except errors.NotFound:
+                    continue
+            for entry in entries:
+                if entry.dn not in children:
+                    continue
+                entry_rights, attr_rights = self._parse_effective_rights(
+                    entry)
+                cached = cache.get(entry.dn)
+                if cached is not None:
+                    # keep rights of attributes requested earlier
+                    cached[2].update(attr_rights)
+                    attr_rights = cached[2]
+                cache[entry.dn] = (attrs, entry_rights, attr_rights)
+                result[entry.dn] = (entry_rights, attr_rights)
+
+        return result
+
+    def get_entry_rights(self, dn, attrs_list):
+        """Returns (entry_rights, attr_rights) for a single DN.
+
+        See get_rights(). Raises NotFound if the entry does not exist.
+        """
+        assert isinstance(dn, DN)
+        try:
+            return self.get_rights([dn], attrs_list)[dn]
+        except KeyError:
+            raise errors.NotFound(reason='no matching entry found')
+
     def can_write(self, dn, attr):
         """Returns True/False if the currently bound user has write permissions
            on the attribute. This only operates on a single attribute at a time.
         """
-
-        assert isinstance(dn, DN)
-
-        attrs = self.get_effective_rights(dn, [attr])
-        if 'attributelevelrights' in attrs:
-            attr_rights = attrs.get('attributelevelrights')[0]
-            (attr, rights) = attr_rights.split(':')
-            if 'w' in rights:
-                return True
-
-        return False
+        _entry_rights, attr_rights = self.get_entry_rights(dn, [attr])
+        return 'w' in attr_rights.get(attr.lower(), u'')
 
     def can_read(self, dn, attr):
         """Returns True/False if the currently bound user has read permissions
            on the attribute. This only operates on a single attribute at a time.
         """
-        assert isinstance(dn, DN)
-
-        attrs = self.get_effective_rights(dn, [attr])
-        if 'attributelevelrights' in attrs:
-            attr_rights = attrs.get('attributelevelrights')[0]
-            (attr, rights) = attr_rights.split(':')
-            if 'r' in rights:
-                return True
-
-        return False
+        _entry_rights, attr_rights = self.get_entry_rights(dn, [attr])
+        return 'r' in attr_rights.get(attr.lower(), u'')
 
     #
     # Entry-level effective rights
@@ -336,16 +422,8 @@ class ldap2(CrudBackend, LDAPCache):
         """Returns True/False if the currently bound user has delete permissions
            on the entry.
         """
-
-        assert isinstance(dn, DN)
-
-        attrs = self.get_effective_rights(dn, ["*"])
-        if 'entrylevelrights' in attrs:
-            entry_rights = attrs['entrylevelrights'][0]
-            if 'd' in entry_rights:
-                return True
-
-        return False
+        entry_rights, _attr_rights = self.get_entry_rights(dn, ["*"])
+        return 'd' in entry_rights
 
     def can_add(self, parent_dn, objectclass):
         """
@@ -380,6 +458,29 @@ class ldap2(CrudBackend, LDAPCache):
         except errors.NotFound:
             return False
 
+    # Writes may change group membership and therefore the outcome of ACI
+    # evaluation, drop rights cached by get_rights().
+
+    def add_entry(self, entry):
+        self._drop_cached_rights()
+        super(ldap2, self).add_entry(entry)
+
+    def update_entry(self, entry):
+        self._drop_cached_rights()
+        super(ldap2, self).update_entry(entry)
+
+    def delete_entry(self, entry_or_dn):
+        self._drop_cached_rights()
+        super(ldap2, self).delete_entry(entry_or_dn)
+
+    def move_entry(self, dn, new_dn, del_old=True):
+        self._drop_cached_rights()
+        super(ldap2, self).move_entry(dn, new_dn, del_old)
+
+    def modify_s(self, dn, modlist):
+        self._drop_cached_rights()
+        return super(ldap2, self).modify_s(dn, modlist)
+
     def modify_password(self, dn, new_pass, old_pass='', otp='', skip_bind=False):
         """Set user password."""
 
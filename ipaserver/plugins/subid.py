@@ -49,6 +49,8 @@ EXAMPLES:
 
 register = Registry()
 
+AUTO_ASSIGNED_DESCRIPTION = "auto-assigned subid"
+
 
 @register()
 class subid(LDAPObject):
@@ -263,14 +265,18 @@ class subid(LDAPObject):
             except errors.NotFound:
                 raise userobj.handle_not_found(owner)
 
-    def handle_subordinate_ids(self, ldap, dn, entry_attrs):
-        """Handle ipaSubordinateId object class"""
-
+    def check_enabled(self):
+        """Raise ValidationError if subordinate IDs are disabled"""
         if self.api.Object.config.is_config_option_present('SubID:Disable'):
             raise errors.ValidationError(
                 name="configuration state",
                 error=_("Support for subordinate IDs is disabled"))
 
+    def handle_subordinate_ids(self, ldap, dn, entry_attrs):
+        """Handle ipaSubordinateId object class"""
+
+        self.check_enabled()
+
         new_subuid = entry_attrs.single_value.get("ipasubuidnumber")
         new_subgid = entry_attrs.single_value.get("ipasubgidnumber")
 
@@ -305,6 +311,38 @@ class subid(LDAPObject):
 
         self.fixup_objectclass(entry_attrs)
 
+    def add_subid_entries(
+        self, ldap, owner_dns, description=AUTO_ASSIGNED_DESCRIPTION
+    ):
+        """Auto-assign subordinate ids to many users
+
+        Entries are written directly instead of going through subid_add,
+        so there is no per-owner command pipeline, owner lookup or
+        post-read. Owners which got a subordinate id in the meantime are
+        skipped. Returns the number of entries added.
+        """
+        self.check_enabled()
+
+        added = 0
+        for owner_dn in owner_dns:
+            ipauniqueid = str(uuid.uuid4())
+            entry = ldap.make_entry(
+                self.get_dn(ipauniqueid),
+                objectclass=list(self.object_class),
+                ipauniqueid=[ipauniqueid],
+                ipaowner=[owner_dn],
+            )
+            if description is not None:
+                entry["description"] = [description]
+            self.set_subordinate_ids(ldap, entry.dn, entry, DNA_MAGIC)
+            try:
+                ldap.add_entry(entry)
+            except errors.DuplicateEntry:
+                # owner already has a subordinate id (uniqueness plugin)
+                continue
+            added += 1
+        return added
+
     def get_subid_match_candidate_filter(
         self,
         ldap,
@@ -488,7 +526,7 @@ class subid_generate(LDAPQuery):
             owner_uid = owner_dn[0].value
 
         return self.api.Command.subid_add(
-            description="auto-assigned subid",
+            description=AUTO_ASSIGNED_DESCRIPTION,
             ipaowner=owner_uid,
             version=options["version"],
         )
@@ -583,10 +621,7 @@ class subid_stats(LDAPQuery):
         return int(entry.single_value["numSubordinates"])
 
     def execute(self, *keys, **options):
-        if self.api.Object.config.is_config_option_present('SubID:Disable'):
-            raise errors.ValidationError(
-                name="configuration state",
-                error=_("Support for subordinate IDs is disabled"))
+        self.obj.check_enabled()
 
         ldap = self.obj.backend
         dna_remaining = self.get_remaining_dna(ldap, **options)
@@ -29,7 +29,7 @@ import six
 
 from ipalib import api
 from ipalib import errors
-from ipalib import Bool, Flag, Str
+from ipalib import Bool, Command, Flag, Str
 from .baseuser import (
     baseuser,
     baseuser_add,
@@ -58,6 +58,7 @@ from .idviews import remove_ipaobject_overrides
 from ipalib.plugable import Registry
 from .baseldap import (
     LDAPObject,
+    failure_to_dict,
     pkey_to_unicode,
     pkey_to_value,
     LDAPCreate,
@@ -68,6 +69,7 @@ from . import baseldap
 from ipalib.request import context
 from ipalib import _, ngettext
 from ipalib import output
+from ipalib.parameters import Dict
 from ipaplatform.paths import paths
 from ipaplatform.constants import constants as platformconstants
 from ipapython.dn import DN
@@ -1421,3 +1423,59 @@ class user_add_passkey(baseuser_add_passkey):
 @register()
 class user_remove_passkey(baseuser_remove_passkey):
     __doc__ = _("Remove one or more passkey mappings from the user entry.")
+
+
+@register()
+class user_import_internal(Command):
+    __doc__ = _('Add multiple users in one call.')
+
+    NO_CLI = True
+
+    takes_args = (
+        Dict(
+            'records+',
+            doc=_('User records, each a dictionary of user-add options '
+                  'including the login name as "uid"'),
+        ),
+    )
+
+    takes_options = (
+        Flag(
+            'stage',
+            doc=_('Add the users to the staging area'),
+        ),
+    )
+
+    has_output = (
+        output.Output('count', int, doc=_('Number of records processed')),
+        output.Output('failed', int, doc=_('Number of records not added')),
+        output.Output('results', (list, tuple),
+                      doc=_('Per-record status, in input order')),
+    )
+
+    def execute(self, records, **options):
+        op_account = getattr(context, 'principal', '[autobind]')
+        if options.get('stage'):
+            cmd = self.api.Command.stageuser_add
+        else:
+            cmd = self.api.Command.user_add
+
+        results = []
+        for record in records:
+            kw = dict((str(k), v) for k, v in record.items())
+            kw.pop('version', None)
+            uid = kw.pop('uid', None)
+            kw.setdefault('no_members', True)
+            try:
+                if not uid:
+                    raise errors.RequirementError(name='uid')
+                cmd(uid, version=options['version'], **kw)
+            except Exception as e:
+                logger.info('%s: user_import: %s(%s): %s',
+                            op_account, cmd.name, uid, e.__class__.__name__)
+                results.append(failure_to_dict('uid', uid, e))
+            else:
+                results.append(dict(uid=uid, error=None))
+
+        failed = sum(1 for r in results if r['error'] is not None)
+        return dict(count=len(results), failed=failed, results=results)
@@ -0,0 +1,101 @@
+#
+# Copyright (C) 2026  FreeIPA Contributors see COPYING for license
+#
+
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import ipatests.util
+ipatests.util.check_ipaclient_unittests()  # noqa: E402
+
+from ipaclient import broker
+
+pytestmark = pytest.mark.tier0
+
+# front end running a command in the broker, with its output captured
+FRONTEND = textwrap.dedent("""
+    import sys
+    from ipaclient import broker
+    status = broker.forward(sys.argv[1:])
+    sys.exit(100 if status is None else status)
+""")
+
+
+class FakeCLI:
+    def run(self, argv):
+        # the file descriptors of the front end replace the standard ones
+        os.write(1, ('%s %s %s\n' % (
+            ' '.join(argv), os.getcwd(), os.environ.get('TEST_VALUE'))
+        ).encode())
+        return int(argv[1])
+
+
+class FakeBroker(broker.Broker):
+    def _run(self, argv):
+        return self.api.Backend.cli.run(argv)
+
+
+class FakeAPI:
+    class Backend:
+        cli = FakeCLI()
+
+
+@pytest.fixture
+def runtime_dir(tmpdir, monkeypatch):
+    os.chmod(str(tmpdir), 0o700)
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmpdir))
+    return str(tmpdir)
+
+
+@pytest.fixture
+def server(runtime_dir):
+    b = FakeBroker(FakeAPI(), broker.socket_path())
+    assert b.bind()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            b.serve()
+        finally:
+            os._exit(0)
+    b.sock.close()
+    yield b
+    os.kill(pid, 9)
+    os.waitpid(pid, 0)
+
+
+def frontend(args, cwd, **env):
+    env = dict(os.environ, **env)
+    return subprocess.run(
+        [sys.executable, '-c', FRONTEND] + args, cwd=cwd, env=env,
+        stdout=subprocess.PIPE, check=False)
+
+
+class TestBroker:
+    def test_socket_path(self, runtime_dir):
+        assert broker.socket_path() == os.path.join(
+            runtime_dir, broker.SOCKET_NAME)
+        os.chmod(runtime_dir, 0o755)
+        assert broker.socket_path() is None
+
+    def test_forward(self, server, tmpdir):
+        result = frontend(['show', '3'], str(tmpdir), TEST_VALUE='x')
+        assert result.returncode == 3
+        assert result.stdout.decode() == 'show 3 %s x\n' % tmpdir
+
+    def test_global_options(self, server, tmpdir):
+        result = frontend(['-v', 'show', '0'], str(tmpdir))
+        assert result.returncode == 100
+        assert result.stdout == b''
+
+    def test_bootstrap_env_mismatch(self, server, tmpdir):
+        result = frontend(['show', '0'], str(tmpdir),
+                          IPA_CONFDIR=str(tmpdir))
+        assert result.returncode == 100
+        assert result.stdout == b''
+
+    def test_second_broker(self, server):
+        assert not broker.Broker(FakeAPI(), server.path).bind()
@@ -0,0 +1,121 @@
+#
+# Copyright (C) 2026  FreeIPA Contributors see COPYING for license
+#
+
+import collections
+import logging
+import time
+
+import pytest
+from dns.exception import DNSException
+
+import ipatests.util
+ipatests.util.check_ipaclient_unittests()  # noqa: E402
+
+from ipaclient import discovery
+
+pytestmark = pytest.mark.tier0
+
+SRV = collections.namedtuple('SRV', ['target', 'port'])
+
+REALM = 'EXAMPLE.TEST'
+
+
+class FakeLDAP:
+    """
+    Answers the LDAP checks of IPADiscovery.
+
+    :param servers: maps a server to the delay of its check and whether it
+        is an IPA server
+    """
+    def __init__(self, servers):
+        self.servers = servers
+        self.checks = []
+
+    def __call__(self, thost, trealm, ca_cert_path, found):
+        delay, is_ipa = self.servers[thost]
+        time.sleep(delay)
+        self.checks.append((thost, trealm))
+        discovery.logger.debug("Checked %s", thost)
+        if not is_ipa:
+            return [discovery.NO_LDAP_SERVER]
+        found['basedn'] = 'dc=example,dc=test'
+        found['basedn_source'] = 'From IPA server %s' % thost
+        return [discovery.SUCCESS, thost, REALM]
+
+
+@pytest.fixture
+def dns(monkeypatch):
+    records = {}
+
+    def query_srv(qname):
+        try:
+            return [SRV(target + '.', port) for target, port in records[qname]]
+        except KeyError:
+            raise DNSException(qname)
+
+    def resolve(qname, rdtype):
+        raise DNSException(qname)
+
+    monkeypatch.setattr(discovery, 'query_srv', query_srv)
+    monkeypatch.setattr(discovery, 'resolve', resolve)
+    return records
+
+
+@pytest.fixture
+def ldap(monkeypatch):
+    def setup(servers):
+        fake = FakeLDAP(servers)
+        monkeypatch.setattr(discovery.IPADiscovery, '_checkldap', fake)
+        return fake
+    return setup
+
+
+def checked(caplog):
+    return [
+        r.getMessage() for r in caplog.records
+        if r.getMessage().startswith('Checked ')
+    ]
+
+
+def test_order(dns, ldap, caplog):
+    caplog.set_level(logging.DEBUG, logger=discovery.logger.name)
+    dns['_ldap._tcp.example.test'] = [('a', 389), ('b', 389), ('c', 389)]
+    ldap({'a': (0.2, False), 'b': (0.1, True), 'c': (0, True)})
+
+    d = discovery.IPADiscovery()
+    assert d.search(domain='example.test', realm=REALM) == discovery.SUCCESS
+    # the first IPA server in the SRV order wins, not the fastest one
+    assert d.servers == ['b']
+    assert d.basedn_source == 'From IPA server b'
+    # the records of the checks are logged as in a sequential search
+    assert checked(caplog) == ['Checked a', 'Checked b']
+
+
+def test_early_exit(dns, ldap, caplog):
+    caplog.set_level(logging.DEBUG, logger=discovery.logger.name)
+    dns['_ldap._tcp.example.test'] = [('a', 389), ('b', 389), ('c', 389)]
+    ldap({'a': (0, True), 'b': (0, True), 'c': (1, True)})
+
+    start = time.time()
+    d = discovery.IPADiscovery()
+    assert d.search(domain='example.test', realm=REALM) == discovery.SUCCESS
+    # the search does not wait for the checks it does not need
+    assert time.time() - start < 1
+    assert d.servers == ['a']
+    assert checked(caplog) == ['Checked a']
+    assert not any('Verifying that b' in r.getMessage()
+                   for r in caplog.records)
+
+
+def test_realm_change(dns, ldap):
+    fake = ldap({'a': (0.1, True), 'b': (0, True)})
+
+    d = discovery.IPADiscovery()
+    result = d.search(domain='example.test', servers=['a', 'b'])
+    assert result == discovery.SUCCESS
+    assert d.realm == REALM
+    assert d.servers == ['a', 'b']
+    # the realm found on a is used to check b again
+    assert ('a', None) in fake.checks
+    assert ('b', REALM) in fake.checks
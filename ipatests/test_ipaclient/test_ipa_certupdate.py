@@ -0,0 +1,182 @@
+#
+# Copyright (C) 2026  FreeIPA Contributors see COPYING for license
+#
+
+import datetime
+import os
+
+import pytest
+from cryptography import x509 as crypto_x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+import ipatests.util
+ipatests.util.check_ipaclient_unittests()  # noqa: E402
+
+from ipaclient.install import ipa_certupdate
+from ipalib import x509
+from ipapython import certdb
+
+pytestmark = pytest.mark.tier0
+
+
+def make_ca_cert(name):
+    key = ec.generate_private_key(ec.SECP256R1())
+    subject = crypto_x509.Name(
+        [crypto_x509.NameAttribute(NameOID.COMMON_NAME, name)])
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    cert = (
+        crypto_x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(subject)
+        .public_key(key.public_key())
+        .serial_number(crypto_x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            crypto_x509.BasicConstraints(ca=True, path_length=None), True)
+        .sign(key, hashes.SHA256())
+    )
+    return x509.load_der_x509_certificate(
+        cert.public_bytes(serialization.Encoding.DER))
+
+
+IPA_CA = make_ca_cert('IPA CA')
+EXTERNAL_CA = make_ca_cert('External CA')
+OTHER_CA = make_ca_cert('Other CA')
+
+
+def ca_entry(cert, nickname, eku=None):
+    if eku is None:
+        eku = certdb.IPA_CA_TRUST_FLAGS.usages
+    return (cert, nickname, True, eku, cert.serial_number)
+
+
+class FakeNSSDatabase:
+    def __init__(self):
+        self.certs = []
+        self.changes = []
+
+    def list_certs(self):
+        # the flags read back from certutil
+        return [
+            (nickname, certdb.parse_trust_flags(
+                certdb.unparse_trust_flags(flags)))
+            for nickname, _cert, flags in self.certs
+        ]
+
+    def get_all_certs(self, nickname):
+        certs = [c for n, c, _f in self.certs if n == nickname]
+        if not certs:
+            raise RuntimeError("no certificate %s" % nickname)
+        return certs
+
+    def add_cert(self, cert, nick, flags):
+        self.changes.append(('add', nick))
+        self.certs.append((nick, cert, flags))
+
+    def delete_cert(self, nick):
+        self.changes.append(('delete', nick))
+        for entry in self.certs:
+            if entry[0] == nick:
+                self.certs.remove(entry)
+                break
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeNSSDatabase()
+    db.secdir = '/fake/nssdb'
+    monkeypatch.setattr(certdb, 'NSSDatabase', lambda path: db)
+    return db
+
+
+def update(db, certs, **kwargs):
+    db.changes = []
+    ipa_certupdate.update_db(db.secdir, certs, **kwargs)
+    return db.changes
+
+
+class TestUpdateDB:
+    def test_add(self, db):
+        certs = [ca_entry(IPA_CA, 'IPA CA')]
+        assert update(db, certs) == [('add', 'IPA CA')]
+
+        certs.append(ca_entry(EXTERNAL_CA, 'External CA'))
+        assert update(db, certs) == [('add', 'External CA')]
+        assert update(db, certs) == []
+
+    def test_remove(self, db):
+        certs = [ca_entry(IPA_CA, 'IPA CA'),
+                 ca_entry(EXTERNAL_CA, 'External CA')]
+        update(db, certs)
+
+        assert update(db, certs[:1]) == [('delete', 'External CA')]
+        assert [n for n, _c, _f in db.certs] == ['IPA CA']
+
+    def test_obsolete(self, db):
+        update(db, [ca_entry(IPA_CA, 'IPA CA')])
+
+        certs = [ca_entry(IPA_CA, 'EXAMPLE.TEST IPA CA')]
+        assert update(db, certs, obsolete=('IPA CA',)) == [
+            ('delete', 'IPA CA'), ('add', 'EXAMPLE.TEST IPA CA')]
+
+    def test_changed_trust_flags(self, db):
+        update(db, [ca_entry(IPA_CA, 'IPA CA'),
+                    ca_entry(EXTERNAL_CA, 'External CA')])
+
+        certs = [ca_entry(IPA_CA, 'IPA CA'),
+                 ca_entry(EXTERNAL_CA, 'External CA',
+                          eku=certdb.EXTERNAL_CA_TRUST_FLAGS.usages)]
+        assert update(db, certs) == [
+            ('delete', 'External CA'), ('add', 'External CA')]
+        assert update(db, certs) == []
+
+    def test_changed_cert(self, db):
+        update(db, [ca_entry(EXTERNAL_CA, 'External CA')])
+
+        certs = [ca_entry(OTHER_CA, 'External CA')]
+        assert update(db, certs) == [
+            ('delete', 'External CA'), ('add', 'External CA')]
+        assert db.get_all_certs('External CA') == [OTHER_CA]
+
+
+class TestUpdateFile:
+    @pytest.fixture
+    def writes(self, monkeypatch):
+        writes = []
+        write_certificate_list = x509.write_certificate_list
+
+        def write(certs, filename, mode=None):
+            writes.append(filename)
+            write_certificate_list(certs, filename, mode=mode)
+
+        monkeypatch.setattr(x509, 'write_certificate_list', write)
+        return writes
+
+    def test_unchanged(self, tmpdir, writes):
+        filename = str(tmpdir.join('ca.crt'))
+        certs = [ca_entry(IPA_CA, 'IPA CA')]
+
+        ipa_certupdate.update_file(filename, certs)
+        assert writes == [filename]
+        with open(filename, 'rb') as f:
+            assert f.read() == IPA_CA.public_bytes(x509.Encoding.PEM)
+
+        ipa_certupdate.update_file(filename, certs)
+        assert writes == [filename]
+
+    def test_changed(self, tmpdir, writes):
+        filename = str(tmpdir.join('ca.crt'))
+        certs = [ca_entry(IPA_CA, 'IPA CA')]
+        ipa_certupdate.update_file(filename, certs)
+
+        certs.append(ca_entry(EXTERNAL_CA, 'External CA'))
+        ipa_certupdate.update_file(filename, certs)
+        assert writes == [filename] * 2
+
+        os.chmod(filename, 0o600)
+        ipa_certupdate.update_file(filename, certs)
+        assert writes == [filename] * 3
+        assert os.stat(filename).st_mode & 0o7777 == 0o644
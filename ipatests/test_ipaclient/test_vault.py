@@ -0,0 +1,64 @@
+#
+# Copyright (C) 2026  FreeIPA Contributors see COPYING for license
+#
+
+import json
+import os
+
+import pytest
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.padding import PKCS7
+
+import ipatests.util
+ipatests.util.check_ipaclient_unittests()  # noqa: E402
+
+from ipaclient.plugins import vault
+
+pytestmark = pytest.mark.tier0
+
+SIZE = vault.CIPHER_SEGMENT_SIZE
+SIZES = [0, 1, 15, 16, SIZE - 1, SIZE, SIZE + 1, 3 * SIZE + 5]
+
+
+def encrypt(algo, nonce, data):
+    padder = PKCS7(algo.block_size).padder()
+    encryptor = Cipher(
+        algo, modes.CBC(nonce), backend=default_backend()).encryptor()
+    padded = padder.update(data) + padder.finalize()
+    return encryptor.update(padded) + encryptor.finalize()
+
+
+def json_of_size(size):
+    return json.dumps('x' * (size - 2)).encode()
+
+
+@pytest.fixture
+def algo():
+    return algorithms.AES(os.urandom(32))
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_wrap_data(algo, size):
+    data = os.urandom(size)
+    nonce, wrapped = vault.vault_archive._wrap_data(None, algo, data)
+    assert isinstance(wrapped, bytes)
+    assert wrapped == encrypt(algo, nonce, data)
+
+
+@pytest.mark.parametrize('size', [s for s in SIZES if s >= 2])
+def test_unwrap_response(algo, size):
+    data = json_of_size(size)
+    nonce = os.urandom(algo.block_size // 8)
+    result = vault.vault_retrieve._unwrap_response(
+        None, algo, nonce, encrypt(algo, nonce, data))
+    assert result == json.loads(data)
+
+
+@pytest.mark.parametrize('size', [s for s in SIZES if s >= 2])
+def test_round_trip(algo, size):
+    data = json_of_size(size)
+    nonce, wrapped = vault.vault_archive._wrap_data(None, algo, data)
+    result = vault.vault_retrieve._unwrap_response(
+        None, algo, nonce, wrapped)
+    assert result == json.loads(data)
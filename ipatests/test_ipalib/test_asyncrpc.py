@@ -0,0 +1,156 @@
+#
+# Copyright (C) 2026  FreeIPA Contributors see COPYING for license
+#
+
+"""
+Test the `ipalib.asyncrpc` module.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from ipalib import asyncrpc, errors
+
+pytestmark = pytest.mark.tier0
+
+
+class FakeServer:
+    """JSON-RPC server echoing the arguments of the command"""
+
+    def __init__(self, keep_alive=True, delay=0.01):
+        self.keep_alive = keep_alive
+        self.delay = delay
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.server = None
+        self.open = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self.handle, '127.0.0.1', 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return 'http://127.0.0.1:%d/ipa/json' % port
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        # the handlers end when the client closes the connections
+        while self.open:
+            await asyncio.sleep(0.01)
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        self.open += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line == b'\r\n':
+                        break
+                    name, value = line.decode().split(':', 1)
+                    if name.lower() == 'content-length':
+                        length = int(value)
+                request = json.loads(await reader.readexactly(length))
+
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                await asyncio.sleep(self.delay)
+                self.in_flight -= 1
+
+                args, options = request['params']
+                if request['method'] == 'user_show':
+                    response = {'error': {'code': 4001,
+                                          'message': 'user not found',
+                                          'data': {'reason': 'not found'}}}
+                else:
+                    response = {'error': None, 'result': {
+                        'method': request['method'],
+                        'args': args,
+                        'version': options['version'],
+                    }}
+                body = json.dumps(response).encode()
+                writer.write(
+                    b'HTTP/1.1 200 OK\r\n'
+                    b'Content-Type: application/json\r\n'
+                    b'Content-Length: %d\r\n\r\n' % len(body) + body)
+                await writer.drain()
+                if not self.keep_alive:
+                    # close without telling the client
+                    break
+        finally:
+            writer.close()
+            self.open -= 1
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_concurrent_calls():
+    server = FakeServer()
+
+    async def calls():
+        url = await server.start()
+        try:
+            async with asyncrpc.AsyncJSONClient(url, concurrency=4) as client:
+                return await asyncio.gather(*(
+                    client.call('echo', i, version=u'2.251')
+                    for i in range(40)
+                ))
+        finally:
+            await server.stop()
+
+    results = run(calls())
+    assert [r['args'] for r in results] == [(i,) for i in range(40)]
+    assert all(r['version'] == u'2.251' for r in results)
+    assert server.max_in_flight == 4
+    assert server.connections == 4
+
+
+def test_error():
+    server = FakeServer()
+
+    async def call():
+        url = await server.start()
+        try:
+            async with asyncrpc.AsyncJSONClient(url) as client:
+                await client.call('user_show', u'nobody')
+        finally:
+            await server.stop()
+
+    with pytest.raises(errors.NotFound) as e:
+        run(call())
+    assert e.value.msg == 'user not found'
+
+
+def test_closed_keep_alive_connection():
+    server = FakeServer(keep_alive=False)
+
+    async def calls():
+        url = await server.start()
+        try:
+            async with asyncrpc.AsyncJSONClient(url, concurrency=1) as client:
+                results = []
+                for i in range(3):
+                    results.append(await client.call('echo', i))
+                    # let the client notice the connection has been closed,
+                    # or not
+                    await asyncio.sleep(i * 0.01)
+                return results
+        finally:
+            await server.stop()
+
+    results = run(calls())
+    assert [r['args'] for r in results] == [(0,), (1,), (2,)]
+    assert server.connections == 3
@@ -21,6 +21,8 @@
 Test the `ipalib.cli` module.
 """
 
+import json
+
 from ipatests.util import raises, ClassChecker
 from ipalib import cli, plugable
 
@@ -53,6 +55,22 @@ class test_textui(ClassChecker):
         assert o.max_col_width(rows, col=1) == 4
         assert o.max_col_width(rows, col=2) == 6
 
+    def test_print_json_lines(self, capsys):
+        """
+        Test the `ipalib.cli.textui.print_json_lines` method.
+        """
+        o = self.cls('the api instance')
+        entries = (
+            {'uid': (u'user%d' % i,), 'data': b'\x00%d' % i}
+            for i in range(2)
+        )
+        o.print_json_lines(entries)
+        lines = capsys.readouterr().out.splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {'uid': ['user0'], 'data': {'__base64__': 'ADA='}},
+            {'uid': ['user1'], 'data': {'__base64__': 'ADE='}},
+        ]
+
 
 def test_to_cli():
     """
@@ -795,6 +795,46 @@ class test_Command(ClassChecker):
             'nested', 'Subclass', 'world', 4, dict, tuple, nope
         )
 
+        # Structural validation does not look at the entries:
+        inst.validate_output(wrong, full=False)
+
+        wrong = dict(hello=18, world=okay)
+        e = raises(TypeError, inst.validate_output, wrong, full=False)
+        assert str(e) == '%s:\n  output[%r]: need %r; got %r: %r' % (
+            'nested.validate_output()', 'world', (list, tuple), dict, okay
+        )
+
+    @pytest.mark.parametrize('sample,random_value,expected', [
+        ('0', 0.0, False),
+        ('100', 0.999, True),
+        ('12.5', 0.12, True),
+        ('12.5', 0.13, False),
+        ('0.5', 0.004, True),
+        ('0.5', 0.006, False),
+        (0.5, 0.004, True),
+        ('-3', 0.0, False),
+        ('250', 0.999, True),
+        ('half', 0.0, False),
+    ])
+    def test_sample_output_validation(self, monkeypatch, sample,
+                                      random_value, expected):
+        """
+        Test the sampling of full output validation in production mode.
+        """
+        class api:
+            class env:
+                output_validation_sample = sample
+
+            @staticmethod
+            def is_production_mode():
+                return True
+
+        inst = self.cls(api)
+        monkeypatch.setattr(frontend.random, 'random', lambda: random_value)
+        sample_output_validation = getattr(
+            inst, '_Command__sample_output_validation')
+        assert sample_output_validation() is expected
+
     def test_get_output_params(self):
         """
         Test the `ipalib.frontend.Command.get_output_params` method.
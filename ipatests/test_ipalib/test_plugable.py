@@ -242,6 +242,39 @@ class test_API(ClassChecker):
         e = raises(Exception, api.finalize)
         assert str(e) == 'API.finalize() already called', str(e)
 
+    def test_on_demand(self):
+        """
+        Test that plugins with ``on_demand`` set are instantiated on use.
+        """
+        instantiated = []
+
+        class base(plugable.Plugin):
+            def __init__(self, api):
+                super(base, self).__init__(api)
+                instantiated.append(self.name)
+
+        class API(plugable.API):
+            bases = (base,)
+            modules = ()
+
+        api = API()
+        api.env.mode = 'unit_test'
+        api.env.in_tree = True
+        api.env.plugins_on_demand = False
+
+        class eager(base):
+            pass
+        api.add_plugin(eager)
+
+        class lazy(base):
+            on_demand = True
+        api.add_plugin(lazy)
+
+        api.finalize()
+        assert instantiated == ['eager']
+        assert isinstance(api.base.lazy, lazy)
+        assert instantiated == ['eager', 'lazy']
+
     def test_bootstrap(self):
         """
         Test the `ipalib.plugable.API.bootstrap` method.
@@ -23,8 +23,11 @@ Test the `ipalib.rpc` module.
 from __future__ import print_function
 
 from xmlrpc.client import Binary, Fault, dumps, loads
+import socket
+import time
 import urllib
 
+import gssapi
 import pytest
 import six
 
@@ -34,6 +37,7 @@ from ipatests.data import binary_bytes, utf8_bytes, unicode_str
 from ipalib.frontend import Command
 from ipalib.request import context, Connection
 from ipalib import rpc, errors, api, request as ipa_request
+from ipapython.cookie import Cookie
 from ipapython.version import API_VERSION
 
 if six.PY3:
@@ -254,6 +258,52 @@ class test_xmlclient(PluginTester):
 
         assert context.xmlclient.conn._calledall() is True
 
+    def test_forward_retry(self, monkeypatch):
+        """
+        Test that only idempotent commands are sent again after a network
+        error.
+        """
+        class user_add(Command):
+            pass
+
+        class user_show(Command):
+            pass
+
+        monkeypatch.setattr(rpc, 'RETRY_DELAY', 0)
+        o, _api, _home = self.instance(
+            'Backend', user_add, user_show, in_server=False)
+        args = (unicode_str,)
+        params = [args, {}]
+        result = (unicode_str,)
+        conn = DummyClass(
+            (
+                'user_show',
+                rpc.xml_wrap(params, API_VERSION),
+                {},
+                ConnectionResetError(),
+            ),
+            (
+                'user_show',
+                rpc.xml_wrap(params, API_VERSION),
+                {},
+                rpc.xml_wrap(result, API_VERSION),
+            ),
+            (
+                'user_add',
+                rpc.xml_wrap(params, API_VERSION),
+                {},
+                ConnectionResetError(),
+            ),
+        )
+
+        setattr(context, o.id, Connection(conn, lambda: None))
+        context.xmlclient = Connection(conn, lambda: None)
+
+        assert o.forward('user_show', *args) == result
+        raises(errors.NetworkError, o.forward, 'user_add', *args)
+
+        assert context.xmlclient.conn._calledall() is True
+
 
 @pytest.mark.skip_ipaclient_unittest
 @pytest.mark.needs_ipaapi
@@ -392,3 +442,120 @@ class test_rpcclient_context(PluginTester):
         session_cookie = getattr(context, 'session_cookie', None)
         unquoted = urllib.parse.unquote(session_cookie)
         assert(unquoted == fuzzy_cookie)
+
+
+def test_domain_cache(tmpdir):
+    cache_dir = str(tmpdir)
+    cache = rpc.DomainCache(cache_dir, u'example.com')
+    assert cache.get_srv_records() is None
+    assert cache.last_server is None
+
+    record = rpc._SRVRecord(0, 100, 389, 'ipa.example.com.')
+    cache.set_srv_records([record], 60)
+    cache.last_server = 'ipa.example.com'
+
+    cache = rpc.DomainCache(cache_dir, u'example.com')
+    assert cache.get_srv_records() == [record]
+    assert cache.last_server == 'ipa.example.com'
+
+    cache.set_srv_records([record], -1)
+    assert rpc.DomainCache(cache_dir, u'example.com').get_srv_records() is None
+
+
+def test_order_by_reachability():
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(5)
+    closed = socket.socket()
+    closed.bind(('127.0.0.1', 0))
+    try:
+        up = 'https://127.0.0.1:%d/ipa/json' % listener.getsockname()[1]
+        down = 'https://127.0.0.1:%d/ipa/json' % closed.getsockname()[1]
+        assert rpc.order_by_reachability([down, up]) == [up, down]
+        assert rpc.order_by_reachability([up, down]) == [up, down]
+    finally:
+        listener.close()
+        closed.close()
+
+
+def test_is_idempotent():
+    assert rpc.is_idempotent('ping/1')
+    assert rpc.is_idempotent('user_find')
+    assert rpc.is_idempotent('user_show/1')
+    assert not rpc.is_idempotent('user_add/1')
+    assert not rpc.is_idempotent('user_del')
+
+
+def test_session_cookie_expiration():
+    expiration = rpc.KerbTransport._session_cookie_expiration
+    cookie = Cookie('ipa_session', 'Token=abc&expiry=1700000000500000')
+    assert expiration(cookie) == 1700000000.5
+    cookie = Cookie('ipa_session', 'MagBearerToken=abc', max_age=60,
+                    timestamp=1700000000)
+    assert expiration(cookie) == 1700000060
+    cookie = Cookie('ipa_session', 'Token=abc&expiry=1700000030000000',
+                    max_age=60, timestamp=1700000000)
+    assert expiration(cookie) == 1700000030
+    assert expiration(Cookie('ipa_session', 'MagBearerToken=abc')) is None
+
+
+class TestKerbTransportSession:
+    """
+    Test the reuse and the renewal of the session in
+    `ipalib.rpc.KerbTransport`.
+    """
+    @pytest.fixture
+    def transport(self, monkeypatch):
+        class FakeSecurityContext:
+            def __init__(self, creds, name, flags):
+                pass
+
+            def step(self, token=None):
+                return b'token'
+
+        monkeypatch.setattr(gssapi, 'Name', lambda *args: None)
+        monkeypatch.setattr(gssapi, 'SecurityContext', FakeSecurityContext)
+        monkeypatch.setattr(rpc, 'update_persistent_client_session_data',
+                            lambda principal, cookie: None)
+        transport = rpc.KerbTransport(protocol='json', service='HTTP')
+        transport._connection = ('ipa.example.test', None)
+        context.request_url = 'https://ipa.example.test/ipa/json'
+        yield transport
+        context.__dict__.clear()
+
+    def test_reuse(self, transport):
+        transport._session_expiration = time.time() + 3600
+        transport.store_session_cookie(
+            'ipa_session=MagBearerToken=abc; path=/ipa; httponly; secure')
+        assert context.session_cookie == 'ipa_session=MagBearerToken=abc;'
+        assert context.session_expiration == transport._session_expiration
+
+        transport.get_auth_info()
+        headers = dict(transport._extra_headers)
+        assert headers['Cookie'] == 'ipa_session=MagBearerToken=abc;'
+        assert 'Authorization' not in headers
+
+    def test_renewal(self, transport):
+        context.session_cookie = 'ipa_session=MagBearerToken=abc;'
+        context.session_expiration = (
+            time.time() + rpc.SESSION_RENEWAL_MARGIN / 2)
+
+        transport.get_auth_info()
+        headers = dict(transport._extra_headers)
+        assert 'Cookie' not in headers
+        assert headers['Authorization'] == 'negotiate dG9rZW4='
+
+    def test_failed_renewal(self, transport, monkeypatch):
+        def fail(*args, **kwargs):
+            raise gssapi.exceptions.GSSError(0xd0000, 0)
+
+        monkeypatch.setattr(gssapi, 'SecurityContext', fail)
+        context.session_cookie = 'ipa_session=MagBearerToken=abc;'
+        context.session_expiration = (
+            time.time() + rpc.SESSION_RENEWAL_MARGIN / 2)
+
+        # the session is used until it expires
+        transport.get_auth_info()
+        headers = dict(transport._extra_headers)
+        assert headers['Cookie'] == 'ipa_session=MagBearerToken=abc;'
+        assert 'Authorization' not in headers
@@ -332,6 +332,25 @@ class test_x509:
         with pytest.raises(ValueError):
             x509.load_pem_x509_certificate(v1_cert)
 
+    def test_der_cache(self):
+        der = base64.b64decode(goodcert)
+        cert = x509.load_der_x509_certificate(der)
+        assert x509.load_der_x509_certificate(bytearray(der)) is cert
+
+        # memoized values must not leak mutations between callers
+        eku = cert.extended_key_usage
+        eku.add(x509.EKU_ANY)
+        assert cert.extended_key_usage == {'1.3.6.1.5.5.7.3.1'}
+        cert.san_general_names.append(DNSName('example.com'))
+        assert cert.san_general_names == []
+
+    def test_pickle_roundtrip(self):
+        cert = x509.load_pem_x509_certificate(goodcert_headers)
+        copy = pickle.loads(pickle.dumps(cert))
+        assert copy == cert
+        assert copy.serial_number_bytes == cert.serial_number_bytes
+        assert copy.san_general_names == []
+
 
 class test_ExternalCAProfile:
     def test_MSCSTemplateV1_good(self):
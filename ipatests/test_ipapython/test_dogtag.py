@@ -0,0 +1,119 @@
+#
+# Copyright (C) 2026  FreeIPA Contributors see COPYING for license
+#
+
+"""
+Test the persistent connection pool of ipapython.dogtag
+"""
+
+import socketserver
+import threading
+
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from ipapython import dogtag
+
+pytestmark = pytest.mark.tier0
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super(KeepAliveHandler, self).setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        self.server.requests += 1
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+        self.close_connection = self.server.close_after_response
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests += 1
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+        self.close_connection = self.server.close_after_response
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = socketserver.ThreadingTCPServer(('127.0.0.1', 0), KeepAliveHandler)
+    srv.daemon_threads = True
+    srv.connections = 0
+    srv.requests = 0
+    srv.close_after_response = False
+    thread = threading.Thread(target=srv.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield srv
+    dogtag.close_connections()
+    srv.shutdown()
+    srv.server_close()
+
+
+def request(srv, pool_key, method='POST', **kw):
+    host, port = srv.server_address
+    return dogtag._httplib_request(
+        'http', host, port, '/', HTTPConnection, 'a=b', method=method,
+        pool_key=pool_key, **kw)
+
+
+class TestConnectionPool:
+    def test_reuse(self, server):
+        key = server.server_address
+        for _i in range(3):
+            status, _headers, body = request(server, key)
+            assert status == 200
+            assert body == b'ok'
+        assert server.connections == 1
+
+    def test_no_pool_key(self, server):
+        for _i in range(2):
+            request(server, None)
+        assert server.connections == 2
+
+    @pytest.fixture
+    def stale(self, server, monkeypatch):
+        key = server.server_address
+        server.close_after_response = True
+        request(server, key)
+        # pretend the health check did not notice the closed socket
+        monkeypatch.setattr(
+            dogtag._ConnectionPool, '_is_usable',
+            staticmethod(lambda conn: True))
+        return key
+
+    @pytest.mark.parametrize('method,kw', [
+        ('GET', {}),
+        ('POST', {'idempotent': True}),
+    ])
+    def test_stale_connection(self, server, stale, method, kw):
+        status, _headers, _body = request(server, stale, method, **kw)
+        assert status == 200
+        assert server.connections == 2
+
+    def test_stale_connection_not_idempotent(self, server, stale):
+        # the server may have processed the request, it is not resent
+        with pytest.raises(dogtag.NetworkError):
+            request(server, stale)
+        assert server.requests == 1
+        assert server.connections == 1
+
+    def test_idle_timeout(self, server, monkeypatch):
+        key = server.server_address
+        request(server, key)
+        monkeypatch.setattr(dogtag, 'POOL_IDLE_TIMEOUT', -1)
+        request(server, key)
+        assert server.connections == 2
@@ -20,7 +20,10 @@
 Test the `kernel_keyring.py` module.
 """
 
+import os
+
 from ipapython import kernel_keyring
+from ipaplatform.paths import paths
 
 import pytest
 
@@ -44,8 +47,18 @@ class test_keyring:
     Test the kernel keyring interface
     """
 
+    @pytest.fixture(params=['libkeyutils', 'keyctl'])
+    def backend(self, request, monkeypatch):
+        if request.param == 'keyctl':
+            if not os.path.exists(paths.KEYCTL):
+                pytest.skip('%s is not available' % paths.KEYCTL)
+            monkeypatch.setattr(kernel_keyring, '_libkeyutils', None)
+        elif kernel_keyring._libkeyutils is None:
+            pytest.skip('libkeyutils is not available')
+        return request.param
+
     @pytest.fixture(autouse=True)
-    def keyring_setup(self):
+    def keyring_setup(self, backend):
         try:
             kernel_keyring.del_key(TEST_KEY)
         except ValueError:
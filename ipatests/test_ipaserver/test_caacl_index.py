@@ -0,0 +1,266 @@
+#
+# Copyright (C) 2026  FreeIPA Contributors see COPYING for license
+#
+
+"""
+Test the compiled CA ACLs of the `ipaserver.plugins.cert` module.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from ipapython.dn import DN
+from ipapython.kerberos import Principal
+from ipaserver.plugins import cert
+
+pytestmark = pytest.mark.tier0
+
+SERVICE = Principal('HTTP/web.example.test@EXAMPLE.TEST')
+
+
+def acl(name, enabled=True, **attrs):
+    entry = dict(cn=[name], ipaenabledflag=[enabled])
+    entry.update(attrs)
+    return entry
+
+
+def no_groups():
+    raise AssertionError("groups looked up")
+
+
+@pytest.fixture
+def index():
+    return cert._CAACLIndex([
+        acl('users',
+            ipamembercertprofile_certprofile=['IECUserRoles'],
+            memberuser_user=['Alice'],
+            memberuser_group=['admins']),
+        acl('hosts',
+            ipacacategory=['all'],
+            ipamembercertprofile_certprofile=['caIPAserviceCert'],
+            hostcategory=['all']),
+        acl('services',
+            ipamemberca_ca=['sub'],
+            ipacertprofilecategory=['all'],
+            memberservice_service=[SERVICE]),
+        acl('disabled', enabled=False,
+            ipacacategory=['all'],
+            ipacertprofilecategory=['all'],
+            usercategory=['all']),
+    ])
+
+
+class TestCAACLIndex:
+    def test_user_name(self, index):
+        assert index.evaluate(
+            'user', 'alice', no_groups, 'ipa', 'IECUserRoles')
+        assert index.evaluate(
+            'user', 'ALICE', no_groups, 'IPA', 'iecuserroles')
+
+    def test_user_group(self, index):
+        assert index.evaluate(
+            'user', 'bob', lambda: ['Admins'], 'ipa', 'IECUserRoles')
+        assert not index.evaluate(
+            'user', 'bob', lambda: ['editors'], 'ipa', 'IECUserRoles')
+
+    def test_no_ca_members(self, index):
+        # no CA members stands for the IPA CA only
+        assert not index.evaluate(
+            'user', 'alice', no_groups, 'sub', 'IECUserRoles')
+
+    def test_category_all(self, index):
+        assert index.evaluate(
+            'host', 'web.example.test', no_groups, 'sub',
+            'caIPAserviceCert')
+        assert not index.evaluate(
+            'host', 'web.example.test', no_groups, 'ipa', 'IECUserRoles')
+
+    def test_service(self, index):
+        assert index.evaluate(
+            'service', str(SERVICE), no_groups, 'sub', 'anyprofile')
+        assert not index.evaluate(
+            'service', str(SERVICE), no_groups, 'ipa', 'caIPAserviceCert')
+
+    def test_principal_type(self, index):
+        # rules only apply to their own type of principals
+        assert not index.evaluate(
+            'service', 'alice', no_groups, 'ipa', 'IECUserRoles')
+        assert not index.evaluate(
+            'user', 'web.example.test', lambda: [], 'sub',
+            'caIPAserviceCert')
+
+    def test_disabled(self, index):
+        assert not index.evaluate(
+            'user', 'carol', lambda: [], 'ipa', 'caIPAserviceCert')
+
+
+BASEDN = DN(('dc', 'example'), ('dc', 'test'))
+CAACLS_DN = DN(('cn', 'caacls'), ('cn', 'ca'), BASEDN)
+
+
+def member_dn(rdn_attr, name, *container):
+    return DN((rdn_attr, name), *(container + (BASEDN,)))
+
+
+class FakeEntry(dict):
+    def __init__(self, name, **attrs):
+        super(FakeEntry, self).__init__(attrs)
+        self.dn = DN(('cn', name), CAACLS_DN)
+
+    @property
+    def raw(self):
+        return {attr: [str(v).encode('utf-8') for v in values]
+                for attr, values in self.items()}
+
+
+def acl_entry(name, **attrs):
+    attrs.setdefault('ipaenabledflag', [True])
+    attrs.setdefault('ipacacategory', ['all'])
+    attrs.setdefault('ipacertprofilecategory', ['all'])
+    # an empty value stands for a missing attribute
+    return FakeEntry(name, **{k: v for k, v in attrs.items() if v})
+
+
+def user_dn(uid):
+    return member_dn('uid', uid, ('cn', 'users'), ('cn', 'accounts'))
+
+
+class FakeLDAP:
+    SCOPE_ONELEVEL = 1
+
+    def __init__(self):
+        self.entries = []
+        self.searches = 0
+
+    def find_entries(self, base_dn, scope, filter, attrs_list,
+                     time_limit, size_limit):
+        assert base_dn == CAACLS_DN
+        self.searches += 1
+        return list(self.entries), False
+
+
+class CountingIndex(cert._CAACLIndex):
+    compiled = 0
+
+    def __init__(self, acls):
+        super(CountingIndex, self).__init__(acls)
+        CountingIndex.compiled += 1
+
+
+class TestGetCAACLIndex:
+    @pytest.fixture
+    def api(self, monkeypatch):
+        api = SimpleNamespace(
+            env=SimpleNamespace(
+                container_caacl=DN(('cn', 'caacls'), ('cn', 'ca')),
+                container_group=DN(('cn', 'groups'), ('cn', 'accounts')),
+                container_hostgroup=DN(
+                    ('cn', 'hostgroups'), ('cn', 'accounts')),
+                basedn=BASEDN,
+            ),
+            Backend=SimpleNamespace(ldap2=FakeLDAP()),
+        )
+        monkeypatch.setattr(cert, 'api', api)
+        monkeypatch.setattr(cert, '_caacl_indexes', {})
+        monkeypatch.setattr(cert, '_CAACLIndex', CountingIndex)
+        CountingIndex.compiled = 0
+        return api
+
+    def test_members(self, api):
+        api.Backend.ldap2.entries = [
+            acl_entry(
+                'users',
+                ipacacategory=[],
+                ipacertprofilecategory=[],
+                ipamemberca=[member_dn('cn', 'sub', ('cn', 'cas'),
+                                       ('cn', 'ca'))],
+                ipamembercertprofile=[member_dn(
+                    'cn', 'IECUserRoles', ('cn', 'certprofiles'),
+                    ('cn', 'ca'))],
+                memberuser=[user_dn('alice'), member_dn(
+                    'cn', 'admins', ('cn', 'groups'), ('cn', 'accounts'))]),
+            acl_entry(
+                'hosts',
+                memberhost=[
+                    member_dn('fqdn', 'web.example.test',
+                              ('cn', 'computers'), ('cn', 'accounts')),
+                    member_dn('cn', 'webservers', ('cn', 'hostgroups'),
+                              ('cn', 'accounts'))],
+                memberservice=[member_dn(
+                    'krbprincipalname', str(SERVICE), ('cn', 'services'),
+                    ('cn', 'accounts'))]),
+            acl_entry('disabled', ipaenabledflag=[False],
+                      usercategory=['all']),
+        ]
+        index = cert.get_caacl_index()
+
+        assert index.evaluate('user', 'alice', no_groups, 'sub',
+                              'IECUserRoles')
+        assert not index.evaluate('user', 'alice', no_groups, 'ipa',
+                                  'IECUserRoles')
+        assert index.evaluate('user', 'bob', lambda: ['admins'], 'sub',
+                              'IECUserRoles')
+        assert not index.evaluate('user', 'bob', lambda: [], 'sub',
+                                  'IECUserRoles')
+        assert index.evaluate('host', 'web.example.test', no_groups,
+                              'ipa', 'caIPAserviceCert')
+        assert index.evaluate('host', 'db.example.test',
+                              lambda: ['webservers'], 'ipa',
+                              'caIPAserviceCert')
+        assert index.evaluate('service', str(SERVICE), no_groups, 'ipa',
+                              'caIPAserviceCert')
+
+    def test_reuse(self, api):
+        api.Backend.ldap2.entries = [
+            acl_entry('users', usercategory=['all'])]
+        index = cert.get_caacl_index()
+        assert cert.get_caacl_index() is index
+        assert api.Backend.ldap2.searches == 2
+        assert CountingIndex.compiled == 1
+
+    def test_rebuild(self, api):
+        ldap = api.Backend.ldap2
+        ldap.entries = [acl_entry('users', memberuser=[user_dn('alice')])]
+        assert not cert.get_caacl_index().evaluate(
+            'user', 'bob', list, 'ipa', 'p')
+
+        ldap.entries = [acl_entry(
+            'users', memberuser=[user_dn('alice'), user_dn('bob')])]
+        assert cert.get_caacl_index().evaluate(
+            'user', 'bob', list, 'ipa', 'p')
+
+        ldap.entries.append(acl_entry('new', usercategory=['all']))
+        assert cert.get_caacl_index().evaluate(
+            'user', 'carol', list, 'ipa', 'p')
+
+        del ldap.entries[-1]
+        assert not cert.get_caacl_index().evaluate(
+            'user', 'carol', list, 'ipa', 'p')
+        assert CountingIndex.compiled == 3
+
+    def test_restricted_view(self, api):
+        # the ACIs of the second caller hide the members of an ACL
+        full = [acl_entry('users', memberuser=[user_dn('alice')])]
+        restricted = [acl_entry('users')]
+
+        for first, second in ((full, restricted), (restricted, full)):
+            api.Backend.ldap2.entries = first
+            first_index = cert.get_caacl_index()
+            api.Backend.ldap2.entries = second
+            second_index = cert.get_caacl_index()
+
+            assert first_index is not second_index
+            for index, entries in ((first_index, first),
+                                   (second_index, second)):
+                assert index.evaluate(
+                    'user', 'alice', list, 'ipa', 'p') is (entries is full)
+        assert CountingIndex.compiled == 2
+
+    def test_cache_size(self, api, monkeypatch):
+        monkeypatch.setattr(cert, '_CAACL_INDEX_CACHE_SIZE', 2)
+        for uid in ('alice', 'bob', 'carol'):
+            api.Backend.ldap2.entries = [
+                acl_entry('users', memberuser=[user_dn(uid)])]
+            cert.get_caacl_index()
+        assert len(cert._caacl_indexes) == 1
@@ -0,0 +1,76 @@
+#
+# Copyright (C) 2026  FreeIPA Contributors see COPYING for license
+#
+
+"""
+Test the evaluation of cert_find criteria on certificates stored in LDAP,
+as done by `ipaserver.plugins.cert` in deployments without a CA.
+"""
+
+import datetime
+
+import pytest
+from cryptography import x509 as crypto_x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from ipalib import x509
+from ipapython.dn import DN
+from ipaserver.plugins import cert
+
+pytestmark = pytest.mark.tier0
+
+NOT_BEFORE = datetime.datetime(2026, 1, 1)
+NOT_AFTER = datetime.datetime(2026, 7, 1)
+
+
+def make_cert(cn, serial_number, issuer_cn='External CA'):
+    key = ec.generate_private_key(ec.SECP256R1())
+    cert = (
+        crypto_x509.CertificateBuilder()
+        .subject_name(crypto_x509.Name(
+            [crypto_x509.NameAttribute(NameOID.COMMON_NAME, cn)]))
+        .issuer_name(crypto_x509.Name(
+            [crypto_x509.NameAttribute(NameOID.COMMON_NAME, issuer_cn)]))
+        .public_key(key.public_key())
+        .serial_number(serial_number)
+        .not_valid_before(NOT_BEFORE)
+        .not_valid_after(NOT_AFTER)
+        .sign(key, hashes.SHA256())
+    )
+    return x509.load_der_x509_certificate(
+        cert.public_bytes(serialization.Encoding.DER))
+
+
+CERT = make_cert('web.example.test', 100)
+
+
+def matches(cert_obj, **options):
+    return cert.cert_find._ldap_cert_matches(None, cert_obj, **options)
+
+
+@pytest.mark.parametrize('options,expected', [
+    ({}, True),
+    ({'issuer': DN(('CN', 'External CA'))}, True),
+    ({'issuer': DN(('CN', 'Other CA'))}, False),
+    ({'min_serial_number': 100, 'max_serial_number': 100}, True),
+    ({'min_serial_number': 101}, False),
+    ({'max_serial_number': 99}, False),
+    ({'validnotafter_from': datetime.datetime(2026, 6, 1),
+      'validnotafter_to': datetime.datetime(2026, 7, 31)}, True),
+    ({'validnotafter_to': datetime.datetime(2026, 6, 30)}, False),
+    ({'validnotbefore_from': datetime.datetime(2026, 1, 2)}, False),
+    ({'validnotbefore_to': NOT_BEFORE}, True),
+    ({'subject': 'WEB.example'}, True),
+    ({'subject': 'web.example.test', 'exactly': True}, True),
+    ({'subject': 'web.example', 'exactly': True}, False),
+    ({'subject': 'mail'}, False),
+])
+def test_ldap_cert_matches(options, expected):
+    assert matches(CERT, **options) is expected
+
+
+def test_ldap_cert_matches_ignores_ca_criteria():
+    # revocation data is only known to the CA
+    assert matches(CERT, status='REVOKED', revocation_reason=1)
@@ -0,0 +1,97 @@
+#
+# Copyright (C) 2026  FreeIPA Contributors see COPYING for license
+#
+
+"""
+Test the `ipaserver.crlsummary` module.
+"""
+
+import datetime
+
+import pytest
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from ipaserver.crlsummary import CRLSummary
+
+pytestmark = pytest.mark.tier0
+
+LAST_UPDATE = datetime.datetime(2026, 1, 2, 3, 4, 5)
+NEXT_UPDATE = datetime.datetime(2026, 1, 2, 7, 4, 5)
+REVOKED = [1, 0x80, 0xffff, 2 ** 64 + 1, 2 ** 158 + 7]
+
+
+def write_crl(filename, serials, crl_number=None):
+    key = ec.generate_private_key(ec.SECP256R1())
+    issuer = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'Test CA')])
+    builder = (
+        x509.CertificateRevocationListBuilder()
+        .issuer_name(issuer)
+        .last_update(LAST_UPDATE)
+        .next_update(NEXT_UPDATE)
+    )
+    if crl_number is not None:
+        builder = builder.add_extension(x509.CRLNumber(crl_number), False)
+    for serial in serials:
+        builder = builder.add_revoked_certificate(
+            x509.RevokedCertificateBuilder()
+            .serial_number(serial)
+            .revocation_date(LAST_UPDATE)
+            .build()
+        )
+    crl = builder.sign(key, hashes.SHA256())
+    with open(filename, 'wb') as f:
+        f.write(crl.public_bytes(serialization.Encoding.DER))
+
+
+@pytest.fixture
+def crl_filename(tmpdir):
+    filename = str(tmpdir.join('MasterCRL.bin'))
+    write_crl(filename, REVOKED, crl_number=42)
+    return filename
+
+
+class TestCRLSummary:
+    def test_read(self, crl_filename):
+        crl = CRLSummary.read(crl_filename)
+        assert crl.revoked == len(REVOKED)
+        assert crl.this_update == LAST_UPDATE
+        assert crl.next_update == NEXT_UPDATE
+        assert crl.crl_number == 42
+
+    def test_no_crl_number(self, tmpdir):
+        filename = str(tmpdir.join('nonumber.crl'))
+        write_crl(filename, [7])
+        crl = CRLSummary.read(filename)
+        assert crl.revoked == 1
+        assert crl.crl_number is None
+
+    def test_empty_crl(self, tmpdir):
+        filename = str(tmpdir.join('empty.crl'))
+        write_crl(filename, [])
+        crl = CRLSummary.read(filename)
+        assert crl.revoked == 0
+        assert crl.this_update == LAST_UPDATE
+
+    def test_read_only(self, tmpdir, crl_filename):
+        CRLSummary.read(crl_filename)
+        assert tmpdir.listdir() == [tmpdir.join('MasterCRL.bin')]
+
+    def test_not_a_crl(self, tmpdir):
+        filename = str(tmpdir.join('garbage.crl'))
+        with open(filename, 'wb') as f:
+            f.write(b'\x02\x01\x00')
+        with pytest.raises(ValueError):
+            CRLSummary.read(filename)
+
+    def test_truncated(self, tmpdir, crl_filename):
+        with open(crl_filename, 'rb') as f:
+            data = f.read()
+        filename = str(tmpdir.join('truncated.crl'))
+        with open(filename, 'wb') as f:
+            f.write(data[:len(data) // 2])
+        with pytest.raises(ValueError):
+            CRLSummary.read(filename)
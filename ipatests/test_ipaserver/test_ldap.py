@@ -141,6 +141,27 @@ class test_ldap:
         cert = entry_attrs.get('usercertificate')[0]
         assert cert.serial_number is not None
 
+    def test_get_rights(self):
+        """
+        Test evaluating effective rights for several entries at once
+        """
+        self.conn = ldap2(api)
+        self.conn.connect(autobind=AUTOBIND_DISABLED)
+        services_dn = self.dn[1:]
+        http_dn = DN(('krbprincipalname',
+                      'HTTP/%s@%s' % (api.env.host, api.env.realm)),
+                     services_dn)
+        missing_dn = DN(('krbprincipalname', 'missing'), services_dn)
+        rights = self.conn.get_rights(
+            [self.dn, http_dn, missing_dn], ['usercertificate'])
+        assert set(rights) == {self.dn, http_dn}
+        for entry_rights, attr_rights in rights.values():
+            assert 'v' in entry_rights
+            assert 'r' in attr_rights['usercertificate']
+        assert self.conn.can_read(self.dn, 'userCertificate')
+        with pytest.raises(errors.NotFound):
+            self.conn.can_read(missing_dn, 'usercertificate')
+
     def test_generalized_time(self):
         """
         Test that LDAP generalized time is converted to/from datetime
@@ -0,0 +1,99 @@
+#
+# Copyright (C) 2026  FreeIPA Contributors see COPYING for license
+#
+
+"""
+Test the bulk assignment of subordinate ids of `ipaserver.plugins.subid`.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from ipalib import constants, errors
+from ipapython.dn import DN
+from ipaserver.plugins import subid
+
+pytestmark = pytest.mark.tier0
+
+BASEDN = DN(('cn', 'subids'), ('cn', 'accounts'), ('dc', 'example'),
+            ('dc', 'test'))
+
+
+def owner_dn(uid):
+    return DN(('uid', uid), ('cn', 'users'), ('cn', 'accounts'),
+              ('dc', 'example'), ('dc', 'test'))
+
+
+class FakeEntry(dict):
+    def __init__(self, dn, **attrs):
+        super(FakeEntry, self).__init__(attrs)
+        self.dn = dn
+
+
+class FakeLDAP:
+    """Adds entries, rejecting a second subordinate id of an owner"""
+    def __init__(self):
+        self.owners = set()
+        self.added = []
+
+    def make_entry(self, dn, **attrs):
+        return FakeEntry(dn, **attrs)
+
+    def add_entry(self, entry):
+        owner = entry['ipaowner'][0]
+        if owner in self.owners:
+            raise errors.DuplicateEntry()
+        self.owners.add(owner)
+        self.added.append(entry)
+
+
+class FakeSubID:
+    object_class = subid.subid.object_class
+
+    check_enabled = subid.subid.check_enabled
+    add_subid_entries = subid.subid.add_subid_entries
+    set_subordinate_ids = subid.subid.set_subordinate_ids
+    fixup_objectclass = subid.subid.fixup_objectclass
+
+    def __init__(self, disabled=False):
+        config = SimpleNamespace(
+            is_config_option_present=lambda option: disabled)
+        self.api = SimpleNamespace(Object=SimpleNamespace(config=config))
+
+    def get_dn(self, ipauniqueid):
+        return DN(('ipauniqueid', ipauniqueid), BASEDN)
+
+
+def test_add_subid_entries():
+    ldap = FakeLDAP()
+    owners = [owner_dn('alice'), owner_dn('bob')]
+
+    assert FakeSubID().add_subid_entries(ldap, owners) == 2
+    assert [e['ipaowner'] for e in ldap.added] == [[o] for o in owners]
+    for entry in ldap.added:
+        assert entry['ipasubuidnumber'] == subid.DNA_MAGIC
+        assert entry['ipasubgidnumber'] == subid.DNA_MAGIC
+        assert entry['ipasubuidcount'] == constants.SUBID_COUNT
+        assert entry['description'] == [subid.AUTO_ASSIGNED_DESCRIPTION]
+        assert 'ipasubordinateid' in entry['objectclass']
+        assert entry.dn == DN(
+            ('ipauniqueid', entry['ipauniqueid'][0]), BASEDN)
+
+
+def test_add_subid_entries_existing():
+    ldap = FakeLDAP()
+    # bob got a subordinate id after the owners were searched
+    ldap.owners.add(owner_dn('bob'))
+    owners = [owner_dn('alice'), owner_dn('bob'), owner_dn('carol')]
+
+    assert FakeSubID().add_subid_entries(ldap, owners) == 2
+    assert [e['ipaowner'][0] for e in ldap.added] == [
+        owner_dn('alice'), owner_dn('carol')]
+
+
+def test_add_subid_entries_disabled():
+    ldap = FakeLDAP()
+    with pytest.raises(errors.ValidationError):
+        FakeSubID(disabled=True).add_subid_entries(ldap, [owner_dn('alice')])
+    assert ldap.added == []
@@ -561,3 +561,73 @@ class test_cert_remove_hold(BaseCert):
         with pytest.raises(errors.NotFound,
                            match=r'Certificate ID 0x.* not found'):
             api.Command['cert_remove_hold'](9999)
+
+
+@pytest.mark.tier1
+class test_cert_revoke_batch(BaseCert):
+
+    def test_revoke_and_remove_hold_batch(self):
+        # add host
+        assert 'result' in api.Command['host_add'](self.host_fqdn, force=True)
+
+        # generate CSR, request certificate, obtain serial number
+        self.csr = self.generateCSR(str(self.subject))
+        res = api.Command['cert_request'](self.csr,
+                                          principal=self.service_princ,
+                                          add=True, all=True)['result']
+        serial_number = res['serial_number']
+
+        # put the certificates of the service on hold, plus a missing one
+        # given twice in decimal and hexadecimal
+        res2 = api.Command['cert_revoke_batch'](
+            [u'9999', u'0x270f'], service=[self.service_princ],
+            revocation_reason=6)
+        assert res2['count'] == 2
+        assert res2['failed'] == 1
+        by_serial = {r['serial_number']: r for r in res2['results']}
+        assert by_serial[u'9999']['error_name'] == u'NotFound'
+        assert by_serial[unicode(serial_number)]['error'] is None
+
+        res3 = api.Command['cert_show'](serial_number, all=True)['result']
+        assert res3['revoked']
+        assert res3['revocation_reason'] == 6
+
+        # take them off hold again
+        res4 = api.Command['cert_remove_hold_batch'](
+            service=[self.service_princ])
+        assert res4['count'] == 1
+        assert res4['failed'] == 0
+
+        res5 = api.Command['cert_show'](serial_number, all=True)['result']
+        assert not res5['revoked']
+
+        # remove host
+        assert 'result' in api.Command['host_del'](self.host_fqdn)
+
+
+@pytest.mark.tier1
+class test_cert_request_batch(BaseCert):
+
+    def test_request_batch(self):
+        # add host
+        assert 'result' in api.Command['host_add'](self.host_fqdn, force=True)
+
+        csr = self.generateCSR(str(self.subject))
+        res = api.Command['cert_request_batch']([
+            dict(csr=csr, principal=self.service_princ, add=True),
+            dict(csr=csr, principal=self.service_princ),
+            dict(principal=self.service_princ),
+        ])
+        assert res['count'] == 3
+        assert res['failed'] == 1
+        first, second, third = res['results']
+        assert first['error'] is None
+        assert second['error'] is None
+        assert first['serial_number'] != second['serial_number']
+        assert third['error_name'] == u'RequirementError'
+
+        cert = api.Command['cert_show'](first['serial_number'])['result']
+        assert DN(cert['subject']) == self.subject
+
+        # remove host
+        assert 'result' in api.Command['host_del'](self.host_fqdn)
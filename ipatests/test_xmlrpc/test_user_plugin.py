@@ -1233,6 +1233,36 @@ class TestDeniedBindWithExpiredPrincipal(XMLRPC_test):
             str(get_user_dn(user.uid)), self.password
         )
 
+
+@pytest.mark.tier1
+class TestImport(XMLRPC_test):
+    def test_import_users(self, user, user2):
+        """ Import new, existing, repeated and invalid users in one call """
+        user.ensure_exists()
+        user2.ensure_missing()
+        result = api.Command['user_import_internal']([
+            dict(uid=user.uid, givenname=u'Test', sn=u'User1'),
+            dict(uid=user2.uid, givenname=u'Test2', sn=u'User2'),
+            dict(uid=user2.uid, givenname=u'Test2', sn=u'Again'),
+            dict(uid=invaliduser1, givenname=u'Test', sn=u'Invalid'),
+            dict(givenname=u'No', sn=u'Login'),
+        ])
+        user2.track_create()
+
+        assert result['count'] == 5
+        assert result['failed'] == 4
+        statuses = result['results']
+        assert [s['uid'] for s in statuses] == [
+            user.uid, user2.uid, user2.uid, invaliduser1, None]
+        assert statuses[0]['error_name'] == u'DuplicateEntry'
+        assert statuses[1]['error'] is None
+        assert statuses[2]['error_name'] == u'DuplicateEntry'
+        assert statuses[3]['error_name'] == u'ValidationError'
+        assert statuses[4]['error_name'] == u'RequirementError'
+
+        user2.retrieve()
+
+
 # This set of functions (get_*, upg_check, not_upg_check)
 # is mostly for legacy purposes here, tests using UserTracker
 # should not rely on them
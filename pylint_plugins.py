@@ -481,6 +481,8 @@ AstroidBuilder(MANAGER).string_build(textwrap.dedent(
     api.env.mode = ''
     api.env.mount_ipa = ''
     api.env.nss_dir = ''  # object
+    api.env.output_format = ''
+    api.env.output_validation_sample = 0
     api.env.plugins_on_demand = False  # object
     api.env.prompt_all = False
     api.env.ra_plugin = ''